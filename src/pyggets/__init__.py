@@ -12,48 +12,71 @@ Usage:
     set_default_theme(Theme(font_name="My Font", widget_radius=5))
 """
 
-# Color utilities
-from .color import brighten
-
-# Containers
-from .containers import HBox, Modal, Panel, ScrollBox, VBox
-
-# File dialogs
-from .filedialog import open_file, pick_directory, save_file
-
-# Geometry
-from .geometry import Rect, collidepoint
-
-# Declarative UI loader
-from .loader import UIResult, WindowSpec, build_widget, load_theme, load_ui, register_widget, run_ui
-
-# Drawing primitives
-from .primitives import makeCircle, makeLabel, makeRectangle, makeSprite
-from .shapes import RoundedRectangle, makeRoundedRectangle
-
-# Style
-from .style import Style
-
-# Theme
-from .theme import Theme, get_default_theme, set_default_theme
-
-# Widgets
-from .widgets import (
-    Button,
-    Checkbox,
-    Dropdown,
-    Image,
-    Label,
-    ProgressBar,
-    RadioGroup,
-    Separator,
-    Slider,
-    Spacer,
-    TextInput,
-    Toggle,
-    Tooltip,
-    Widget,
-)
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+from ._exports import EXPORTS
+
+if TYPE_CHECKING:
+    # Color utilities
+    from .color import brighten
+
+    # Containers
+    from .containers import HBox, Modal, Panel, ScrollBox, VBox
+
+    # File dialogs
+    from .filedialog import open_file, pick_directory, save_file
+
+    # Geometry
+    from .geometry import Rect, collidepoint
+
+    # Declarative UI loader
+    from .loader import UIResult, WindowSpec, build_widget, load_theme, load_ui, register_widget, run_ui
+
+    # Drawing primitives
+    from .primitives import makeCircle, makeLabel, makeRectangle, makeSprite
+    from .shapes import RoundedRectangle, makeRoundedRectangle
+
+    # Style
+    from .style import Style
+
+    # Theme
+    from .theme import Theme, get_default_theme, set_default_theme
+
+    # Widgets
+    from .widgets import (
+        Button,
+        Checkbox,
+        Dropdown,
+        Image,
+        Label,
+        ProgressBar,
+        RadioGroup,
+        Separator,
+        Slider,
+        Spacer,
+        TextInput,
+        Toggle,
+        Tooltip,
+        Widget,
+    )
+
+
+def __getattr__(name: str):  # the submodules are imported on first use, see _exports
+    module = EXPORTS.get(name)
+    if module is None:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *EXPORTS])
+
 
 __all__ = [
     "Button",
@@ -0,0 +1,33 @@
+"""Where the names exported by :mod:`pyggets` are defined."""
+
+# The submodules are imported on first use: most of them import pyglet, which
+# is slow to import and opens the display, while the geometry, style and theme
+# helpers are usable without it.
+SUBMODULES = {
+    "color": ["brighten"],
+    "containers": ["HBox", "Modal", "Panel", "ScrollBox", "VBox"],
+    "filedialog": ["open_file", "pick_directory", "save_file"],
+    "geometry": ["Rect", "collidepoint"],
+    "loader": ["UIResult", "WindowSpec", "build_widget", "load_theme", "load_ui", "register_widget", "run_ui"],
+    "primitives": ["makeCircle", "makeLabel", "makeRectangle", "makeSprite"],
+    "shapes": ["RoundedRectangle", "makeRoundedRectangle"],
+    "style": ["Style"],
+    "theme": ["Theme", "get_default_theme", "set_default_theme"],
+    "widgets": [
+        "Button",
+        "Checkbox",
+        "Dropdown",
+        "Image",
+        "Label",
+        "ProgressBar",
+        "RadioGroup",
+        "Separator",
+        "Slider",
+        "Spacer",
+        "TextInput",
+        "Toggle",
+        "Tooltip",
+        "Widget",
+    ],
+}
+EXPORTS = {name: module for module, names in SUBMODULES.items() for name in names}
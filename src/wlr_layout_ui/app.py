@@ -1,24 +1,47 @@
-"""Application entry points for wlr-layout-ui."""
+"""Application entry points for wlr-layout-ui.
 
-import os
-import sys
-import time
-from typing import cast
+The GUI stack (pyglet, pyggets widgets, :mod:`.gui`) is only imported when
+the GUI is started: the command line options don't need it, and importing
+it takes longer than applying a profile.
 
-import pyglet
+Only one GUI runs at a time: the next invocations talk to it through the
+:mod:`.control` socket.
+"""
 
-from pyggets import Theme, set_default_theme
+import io
+import logging
+import queue
+import subprocess
+import sys
+from collections.abc import Callable
+from contextlib import redirect_stdout
+from typing import cast
 
-from .gui import UI
-from .profiles import load_profiles
-from .screens import displayInfo, load
+from . import cache, compiled, control
+from .daemon import run_daemon
+from .hotplug import coalesce
+from .matching import find_profile
+from .plan import OutputState, layout_digest, same_layout, snapshot
+from .profiles import get_index, load_profiles, match_profile
+from .screens import displayInfo, load, probe_timings, query_screens
 from .settings import LEGACY, PROG_NAME, UI_RATIO, reload_pre_commands
+from .transaction import ApplyResult, apply_layout
 from .types import Mode
-from .utils import Rect, get_size, make_command
+from .utils import Rect, config, get_size, layout_positions
+
+log = logging.getLogger(__name__)
+
+STARTUP_WAIT = 2.0  # how long to wait for a starting GUI to answer
+REQUESTS_INTERVAL = 0.05  # how often the event loop runs the control requests
+
+# control requests waiting for the event loop (see _in_event_loop)
+_pending: queue.SimpleQueue[Callable[[], None]] = queue.SimpleQueue()
 
 
 def _patch_x11_drag_drop():
     """Wrap X11 drag-drop to ignore exceptions (pyglet bug workaround)."""
+    import pyglet  # ruff: ignore[import-outside-top-level]
+
     try:
         original = pyglet.window.xlib.XlibWindow._event_drag_drop
     except AttributeError:
@@ -33,14 +56,18 @@ def _patch_x11_drag_drop():
     pyglet.window.xlib.XlibWindow._event_drag_drop = safe_drag_drop  # type: ignore[method-assign]
 
 
-_patch_x11_drag_drop()
+def _setup_gui():
+    """Prepare pyglet and the default pyggets theme for this application."""
+    from pyggets import Theme, set_default_theme  # ruff: ignore[import-outside-top-level]
+
+    _patch_x11_drag_drop()
+
+    theme = Theme.dark()
+    theme.default_style.highlight = (100, 200, 150)
+    theme.widget_radius = 3
 
-# Configure the default pyggets theme for this application
-_theme = Theme.dark()
-_theme.default_style.highlight = (100, 200, 150)
-_theme.widget_radius = 3
+    set_default_theme(theme)
 
-set_default_theme(_theme)
 
 try:
     import setproctitle
@@ -50,9 +77,20 @@ except ImportError:
     pass
 
 
-def apply_profile(profile: list[dict[str, float | bool | str]]):
-    load()
-    screen_info = {p["uid"]: p for p in profile}
+def _report(result: ApplyResult):
+    if not result.commands:
+        print("Layout already applied")
+        return
+    print("\n".join(result.commands))
+    if not result.ok:
+        print(f"Failed applying the layout ({', '.join(result.mismatches)})")
+        if result.rollback is not None:
+            print("Restored the previous layout")
+
+
+def _profile_target(profile: list[dict[str, float | bool | str]]) -> dict[str, OutputState]:
+    """Resolve *profile* on :data:`displayInfo`, which is updated accordingly."""
+    screen_info = match_profile(profile, displayInfo) or {cast("str", p["uid"]): p for p in profile}
     rects = []
     for di in displayInfo:
         si = screen_info[di.uid]
@@ -63,16 +101,93 @@ def apply_profile(profile: list[dict[str, float | bool | str]]):
             w, h = get_size(
                 cast("int", si["width"]), cast("int", si["height"]), cast("float", si.get("scale", 1)), cast("int", si.get("transform", 0))
             )
-            di.mode = Mode(w, h, cast("float", si["freq"]))
+            res = (cast("int", si["width"]), cast("int", si["height"]))
+            di.mode = di.match_mode(res, cast("float", si["freq"])) or Mode(*res, cast("float", si["freq"]))
             rects.append(Rect(int(si["x"]), -int(si["y"]) - h, w, h))
         else:
             rects.append(Rect(0, 0, 0, 0))  # width & height not used
+    return snapshot(displayInfo, layout_positions(rects))
+
+
+def _apply_compiled(name: str, profile, outputs: str | None = None) -> ApplyResult | None:
+    """Apply the compiled plan of profile *name*, None if there is no up to date one.
+
+    Args:
+        outputs: the fingerprint of the outputs in :data:`displayInfo`, whose
+            state is then taken as the live one.  Else both are queried.
+    """
+    live = None
+    monitors = None
+    if outputs is None:
+        outputs, monitors = cache.current_fingerprint()
+    else:
+        live = snapshot(displayInfo)
+    plan = compiled.read(name, profile, compiled.fingerprint(outputs))
+    if plan is None:
+        return None
+    config.update(plan.config)
+    if live is None:
+        try:
+            live = snapshot(query_screens(monitors))
+        except (OSError, ValueError, subprocess.SubprocessError):
+            return None
+    return apply_layout(plan.target, live, wayland=not LEGACY)
+
+
+def apply_profile(
+    profile: list[dict[str, float | bool | str]], *, reload: bool = True, name: str | None = None, outputs: str | None = None
+) -> ApplyResult:
+    """Apply *profile* and return the result.
 
-    cmd = make_command(displayInfo, rects, not LEGACY)
-    time.sleep(0.5)
-    if os.system(cmd):
-        print("Failed applying the layout")
-    print(cmd)
+    Args:
+        reload: probe the displays first, else use :data:`displayInfo` as it is.
+        name: the name of the profile, to run its compiled plan (see
+            :mod:`.compiled`) instead of probing and resolving it again.
+        outputs: without *reload*, the fingerprint returned by the
+            :func:`load` which filled :data:`displayInfo`.  The compiled plans
+            are neither read nor written without it.
+    """
+    if name is not None and (reload or outputs is not None):
+        result = _apply_compiled(name, profile, None if reload else outputs)
+        if result is not None:
+            if result.ok:
+                get_index().mark_used(name)
+            _report(result)
+            return result
+    if reload:
+        outputs = load()
+    live = snapshot(displayInfo)
+    target = _profile_target(profile)
+    result = apply_layout(target, live, wayland=not LEGACY)
+    if name is not None and result.ok:
+        compiled.write(name, profile, compiled.fingerprint(outputs), {k: config.get(k, False) for k in ("hyprland", "sway")}, target)
+        get_index().mark_used(name)
+    _report(result)
+    return result
+
+
+def profile_applied(profile: list[dict[str, float | bool | str]]) -> bool:
+    """Tell whether the outputs already have the layout of *profile* (probes the displays)."""
+    load()
+    live = snapshot(displayInfo)
+    return same_layout(_profile_target(profile), live)
+
+
+def apply_matching_profile() -> int:
+    """Apply the profile matching the connected displays (``wlrlui -m``), return the exit status."""
+    outputs = load(cached=True)
+    found = find_profile(get_index(), displayInfo)
+    if found is None:
+        print("No profile found: -m")
+        return 1
+    key, profile, exact = found
+    if exact:
+        print(f"Matched profile {key}. Applying it...")
+        result = apply_profile(profile, reload=False, name=key, outputs=outputs)
+    else:
+        print(f"Partially matched profile {key}. Applying it to the connected outputs...")
+        result = apply_profile(profile, reload=False)
+    return 0 if result.ok else 1
 
 
 def main():
@@ -83,17 +198,33 @@ def main():
             for p in profiles:
                 print(f" - {p}")
         elif sys.argv[1] == "-m":
+            status, output = coalesce(apply_matching_profile)
+            print(output, end="")
+            sys.exit(status)
+        elif sys.argv[1] == "-t":
             load()
-            current_uids = set(di.uid for di in displayInfo)
-            for key in sorted(profiles):
-                prof_uids = {p["uid"] for p in profiles[key]}
-                # check that the two sets have the same elements
-                if prof_uids == current_uids:
-                    print(f"Matched profile {key}. Applying it...")
-                    apply_profile(profiles[key])
-                    sys.exit(0)
-            print(f"No profile found: {sys.argv[1]}")
-            sys.exit(1)
+            for name, duration in probe_timings.items():
+                print(f"{name:>24}: {duration * 1000:7.1f} ms")
+        elif sys.argv[1] == "--check" and len(sys.argv) > 2:
+            name = sys.argv[2]
+            if name not in profiles:
+                print(f"No such profile: {name}")
+                sys.exit(2)
+            if not profile_applied(profiles[name]):
+                print(f"Profile {name} is not applied")
+                sys.exit(1)
+            print(f"Profile {name} is applied")
+        elif sys.argv[1] == "--digest":
+            load()
+            print(layout_digest(snapshot(displayInfo)))
+        elif sys.argv[1] == "--reload":
+            if control.send("reload") is None:
+                print("The GUI isn't running")
+                sys.exit(1)
+        elif sys.argv[1] == "--daemon":
+            if not run_daemon(apply_profile):
+                print("The daemon mode requires Hyprland")
+                sys.exit(1)
 
         elif sys.argv[1][0] == "-":
             load()
@@ -101,20 +232,119 @@ def main():
                 """With no options, launches the GUI
 Options:
              -l : list profiles
+             -t : probe the displays and show how long each query took
              -m : find a profile that matches the currently plugged display set, and apply it.
-                  No-op if not found; will apply first in alphabetical order if multiple found.
- <profile name> : loads a profile
+                  Will apply the most recently used one if multiple found (then the first in
+                  alphabetical order). Without an exact match, applies the profile covering most
+                  of the displays, the others placed on the right. No-op if none is found.
+                  Concurrent runs (eg. from udev rules) are merged into one, once they settle.
+ --check <name> : exit with 0 if the displays have the layout of that profile (1 otherwise)
+       --digest : print a digest of the current layout, which only changes with the layout
+       --reload : make the running GUI probe the displays again
+       --daemon : stay in the background and do what -m does on every monitor (un)plug (Hyprland only)
+ <profile name> : loads a profile (in the running GUI, if any)
             """
             )
         else:
+            reply = control.send("apply", profile=sys.argv[1])
+            if reply is not None:  # applied by the running GUI
+                if reply["message"]:
+                    print(reply["message"].rstrip("\n"))
+                sys.exit(0 if reply["ok"] else 1)
             reload_pre_commands()
             try:
                 profile = profiles[sys.argv[1]]
             except KeyError as e:
                 print(f"No such profile: {sys.argv[1]}")
                 raise SystemExit(1) from e
-            apply_profile(profile)
+            apply_profile(profile, name=sys.argv[1])
+        return
+    run_gui()
+
+
+def run_gui():
+    """Probe the displays and run the layout editor, or raise the one already running."""
+    try:
+        instance = control.Instance.acquire()
+    except OSError:
+        log.warning("Can't take the single-instance lock, running without the control socket", exc_info=True)
+        _run_event_loop(None)
+        return
+    if instance is None:
+        if control.send("raise", wait=STARTUP_WAIT) is None:
+            print("Another instance is running but doesn't answer")
+            sys.exit(1)
         return
+    try:
+        _run_event_loop(instance)
+    finally:
+        instance.close()
+
+
+def _run_event_loop(instance: control.Instance | None):
+    """Open the window and run the pyglet event loop, answering the requests sent to *instance*."""
+    import pyglet  # ruff: ignore[import-outside-top-level]
+
+    if instance is not None:
+        # the requests are queued until the event loop runs, once the window exists
+        instance.serve(lambda request: _handle_request(window, request), _in_event_loop)
+        pyglet.clock.schedule_interval(_run_pending, REQUESTS_INTERVAL)
+    window = make_window()
+    pyglet.app.run()
+
+
+def _in_event_loop(func: Callable[[], None]):
+    """Run *func* in the pyglet event loop (from any thread).
+
+    The pyglet clock isn't thread-safe: *func* is queued for :func:`_run_pending`.
+    """
+    import pyglet  # ruff: ignore[import-outside-top-level]
+
+    _pending.put(func)
+    pyglet.app.platform_event_loop.notify()  # wake the loop up
+
+
+def _run_pending(_dt: float = 0):
+    """Run the queued :func:`_in_event_loop` calls, scheduled in the event loop."""
+    while True:
+        try:
+            func = _pending.get_nowait()
+        except queue.Empty:
+            return
+        func()
+
+
+def _handle_request(window, request: dict) -> dict:
+    """Answer a :mod:`.control` request in the GUI *window*."""
+    command = request["command"]
+    if command == "raise":
+        window.set_visible(True)
+        window.activate()
+        return {"ok": True, "message": ""}
+    if command == "reload":
+        window.action_reload()
+        window.set_current_modes_as_ref()
+        return {"ok": True, "message": ""}
+    name = request.get("profile")
+    profile = load_profiles().get(name)
+    if profile is None:
+        return {"ok": False, "message": f"No such profile: {name}"}
+    reload_pre_commands()
+    output = io.StringIO()
+    with redirect_stdout(output):
+        result = apply_profile(profile, name=name)
+    window.sync_profiles()
+    window.reset_sel()
+    window.center_layout(immediate=True)
+    window.set_current_modes_as_ref()
+    return {"ok": result.ok, "message": output.getvalue()}
+
+
+def make_window():
+    """Probe the displays and open the layout editor window."""
+    from .gui import UI  # ruff: ignore[import-outside-top-level]
+
+    _setup_gui()
     load()
     max_width = int(sum(max(screen.available, key=lambda mode: mode.width).width for screen in displayInfo) // UI_RATIO)
     max_height = int(sum(max(screen.available, key=lambda mode: mode.height).height for screen in displayInfo) // UI_RATIO)
@@ -130,4 +360,4 @@ Options:
     window = UI(width, height)  # type: ignore[abstract]
     if hasattr(window, "set_wm_class"):
         window.set_wm_class(PROG_NAME)
-    pyglet.app.run()
+    return window
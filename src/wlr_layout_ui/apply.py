@@ -0,0 +1,61 @@
+"""Execution of the commands generated by :func:`utils.make_command`."""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import time
+
+from .hyprland import run_hyprctl_command, watch_outputs
+from .sway import run_swaymsg_command
+from .wlr_output import run_wlr_randr_command
+from .x11_randr import run_xrandr_command
+
+log = logging.getLogger(__name__)
+
+SLEEP_RE = re.compile(r"sleep (\d+(?:\.\d*)?)$")
+
+
+def run_command(cmd: str) -> bool:
+    """Run a single command, over IPC when possible. Returns True on success."""
+    result = run_hyprctl_command(cmd)
+    if result is None:
+        result = run_swaymsg_command(cmd)
+    if result is None:
+        result = run_wlr_randr_command(cmd)
+    if result is None:
+        result = run_xrandr_command(cmd)
+    if result is None:
+        result = os.system(cmd) == 0
+    return result
+
+
+def run_commands(cmds: list[str]) -> bool:
+    """Run all the commands in order. Returns True if all of them succeeded.
+
+    A ``sleep N`` following a command toggling Hyprland outputs only lasts
+    until the outputs are in the requested state (at most N seconds).
+    """
+    ok = True
+    waited = False  # the sleep following the previous command was replaced by a readiness wait
+    for i, cmd in enumerate(cmds):
+        delay = SLEEP_RE.match(cmd)
+        if delay:
+            if not waited:
+                time.sleep(float(delay[1]))
+            waited = False
+            continue
+        delay = SLEEP_RE.match(cmds[i + 1]) if i + 1 < len(cmds) else None
+        watcher = watch_outputs(cmd) if delay else None
+        if not run_command(cmd):
+            ok = False
+        if watcher is not None:
+            start = time.perf_counter()
+            try:
+                ready = watcher.wait(float(delay[1]))  # type: ignore[index]
+            finally:
+                watcher.close()
+            log.debug("Outputs %s after %.3fs", "ready" if ready else "not ready", time.perf_counter() - start)
+            waited = True
+    return ok
@@ -0,0 +1,173 @@
+"""Persisted snapshot of the display tables, keyed by the connected outputs.
+
+Parsing every mode of every output is the expensive part of
+:func:`screens.load`.  The parsed :class:`Screen` / :class:`Mode` tables are
+saved under ``$XDG_RUNTIME_DIR`` together with a fingerprint of the
+connected outputs (names and descriptions), so the next run only needs the
+cheap fingerprint query as long as the same monitors are plugged.
+
+The fingerprint comes from the Hyprland IPC socket when available and from
+the DRM connectors in sysfs otherwise.  Snapshots are dropped on compositor
+configuration reloads (see :func:`invalidate`).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+from typing import TYPE_CHECKING
+
+from .edid import DRM_ROOT
+from .hyprland import IPCError, get_client
+from .runtime import runtime_dir, write_atomic
+from .types import Mode, Screen
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+MAX_ENTRIES = 4  # eg. docked, undocked, projector...
+
+
+def cache_file() -> Path:
+    return runtime_dir() / "wlr-layout-ui-displays.json"
+
+
+# ---------------------------------------------------------------------------
+# Fingerprints
+# ---------------------------------------------------------------------------
+
+
+def _digest(kind: str, items) -> str:
+    return kind + ":" + hashlib.sha1(json.dumps(sorted(items)).encode()).hexdigest()
+
+
+def fingerprint_from_monitors(monitors: list[dict]) -> str:
+    """Return the fingerprint of a ``hyprctl -j monitors all`` reply."""
+    signature = os.environ.get("HYPRLAND_INSTANCE_SIGNATURE", "")
+    return _digest("hyprland-" + signature, [(m["name"], m["description"]) for m in monitors])
+
+
+def drm_fingerprint(root: Path | None = None) -> str | None:
+    """Return a fingerprint of the connected DRM connectors, None if there are none."""
+    items = []
+    for connector in sorted((root or DRM_ROOT).glob("card*-*")):
+        try:
+            if (connector / "status").read_text().strip() != "connected":
+                continue
+            edid = (connector / "edid").read_bytes()
+        except OSError:
+            continue
+        name = connector.name.split("-", 1)[1]
+        items.append((name, hashlib.sha1(edid).hexdigest()))
+    return _digest("drm", items) if items else None
+
+
+def current_fingerprint() -> tuple[str | None, list[dict] | None]:
+    """Run the cheapest query identifying the connected outputs.
+
+    Returns:
+        The fingerprint (None if it can't be computed) and the Hyprland
+        monitors (None when not running Hyprland), which carry the live state.
+    """
+    client = get_client()
+    if client:
+        try:
+            monitors = client.query("monitors all")
+        except (IPCError, ValueError):
+            log.debug("Can't query Hyprland monitors", exc_info=True)
+        else:
+            return fingerprint_from_monitors(monitors), monitors
+    return drm_fingerprint(), None
+
+
+# ---------------------------------------------------------------------------
+# Serialization
+# ---------------------------------------------------------------------------
+
+
+def _mode_to_list(mode: Mode | None):
+    return None if mode is None else [mode.width, mode.height, mode.freq]
+
+
+def screen_to_dict(screen: Screen) -> dict:
+    return {
+        "uid": screen.uid,
+        "name": screen.name,
+        "active": screen.active,
+        "position": list(screen.position),
+        "mode": _mode_to_list(screen.mode),
+        "scale": screen.scale,
+        "transform": screen.transform,
+        "identity": screen.identity,
+        "available": [_mode_to_list(m) for m in screen.available],
+    }
+
+
+def screen_from_dict(data: dict) -> Screen:
+    available = [Mode(*m) for m in data["available"]]
+    mode = None if data["mode"] is None else Mode(*data["mode"])  # interned: same object as in available
+    return Screen(
+        uid=data["uid"],
+        name=data["name"],
+        active=data["active"],
+        position=tuple(data["position"]),  # type: ignore[arg-type]
+        mode=mode,
+        scale=data["scale"],
+        available=available,
+        transform=data["transform"],
+        identity=data.get("identity"),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Storage
+# ---------------------------------------------------------------------------
+
+
+def _read_all() -> dict:
+    try:
+        with cache_file().open() as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def read(fingerprint: str | None) -> tuple[list[Screen], dict] | None:
+    """Return the cached screens and backend config for *fingerprint*, if any."""
+    if fingerprint is None:
+        return None
+    entry = _read_all().get(fingerprint)
+    if entry is None:
+        return None
+    try:
+        return [screen_from_dict(s) for s in entry["screens"]], entry["config"]
+    except (KeyError, TypeError, ValueError):
+        log.debug("Ignoring corrupted display cache entry", exc_info=True)
+        return None
+
+
+def write(fingerprint: str | None, screens: list[Screen], config: dict):
+    """Store a snapshot for *fingerprint*, keeping the most recent entries only."""
+    if fingerprint is None:
+        return
+    entries = _read_all()
+    entries.pop(fingerprint, None)
+    entries[fingerprint] = {"config": config, "screens": [screen_to_dict(s) for s in screens]}
+    while len(entries) > MAX_ENTRIES:
+        entries.pop(next(iter(entries)))
+    try:
+        write_atomic(cache_file(), json.dumps(entries))
+    except OSError:
+        log.debug("Can't write the display cache", exc_info=True)
+
+
+def invalidate():
+    """Drop all the snapshots (eg. after a compositor configuration reload)."""
+    with contextlib.suppress(OSError):
+        cache_file().unlink()
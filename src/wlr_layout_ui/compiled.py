@@ -0,0 +1,134 @@
+"""Compiled apply plans of the profiles.
+
+Applying a profile by name means probing every output (:func:`screens.load`),
+matching the profile entries with them and resolving their modes, which gives
+the same result every time the same monitors are plugged.  The resolved target
+state is saved under ``$XDG_RUNTIME_DIR`` with the fingerprint of the outputs
+(see :func:`cache.current_fingerprint`), the compositor instance it was
+built for and a digest of the profile, so the next application of that
+profile only runs the cheap fingerprint query and the live state query.
+``wlrlui -m`` and the daemon, which already know both from
+``load(cached=True)``, only skip the resolution.
+
+The plans hold target states rather than command strings since the commands
+only carry the differences with the live state (see :mod:`.plan`).  A plan is
+rebuilt whenever the outputs, the compositor or the profile change.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .plan import OutputState
+from .runtime import runtime_dir, write_atomic
+from .types import Mode
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+FORMAT = 1  # bump when the stored layout changes
+
+
+def plans_file() -> Path:
+    return runtime_dir() / "wlr-layout-ui-plans.json"
+
+
+@dataclass
+class CompiledPlan:
+    """The resolved target of a profile, for one set of outputs."""
+
+    #: the outputs and compositor it was built for, see :func:`fingerprint`
+    fingerprint: str
+    #: digest of the profile entries, see :func:`profile_digest`
+    digest: str
+    #: backend selection (:data:`.utils.config`)
+    config: dict
+    target: dict[str, OutputState]
+
+
+def compositor_instance() -> str:
+    """Identify the running compositor (a new instance may be a new version)."""
+    for key in ("HYPRLAND_INSTANCE_SIGNATURE", "SWAYSOCK", "WAYLAND_DISPLAY", "DISPLAY"):
+        value = os.environ.get(key)
+        if value:
+            return f"{key}={value}"
+    return ""
+
+
+def fingerprint(outputs: str | None) -> str | None:
+    """Combine the *outputs* fingerprint with the compositor instance, None if unknown."""
+    if outputs is None:
+        return None
+    return f"{FORMAT}/{outputs}/{compositor_instance()}"
+
+
+def profile_digest(profile) -> str:
+    return hashlib.sha1(json.dumps(profile, sort_keys=True).encode()).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Serialization
+# ---------------------------------------------------------------------------
+
+
+def state_to_list(state: OutputState) -> list:
+    mode = None if state.mode is None else [state.mode.width, state.mode.height, state.mode.freq]
+    return [state.active, mode, list(state.position), state.scale, state.transform]
+
+
+def state_from_list(data: list) -> OutputState:
+    active, mode, position, scale, transform = data
+    return OutputState(active, None if mode is None else Mode(*mode), tuple(position), scale, transform)  # type: ignore[arg-type]
+
+
+# ---------------------------------------------------------------------------
+# Storage
+# ---------------------------------------------------------------------------
+
+
+def _read_all() -> dict:
+    try:
+        with plans_file().open() as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def read(name: str, profile, key: str | None) -> CompiledPlan | None:
+    """Return the plan of profile *name* if it was built for *key* (see :func:`fingerprint`) and *profile*."""
+    if key is None:
+        return None
+    entry = _read_all().get(name)
+    if entry is None or entry.get("fingerprint") != key or entry.get("digest") != profile_digest(profile):
+        return None
+    try:
+        target = {uid: state_from_list(state) for uid, state in entry["target"].items()}
+        return CompiledPlan(key, entry["digest"], entry["config"], target)
+    except (KeyError, TypeError, ValueError):
+        log.debug("Ignoring corrupted plan of %s", name, exc_info=True)
+        return None
+
+
+def write(name: str, profile, key: str | None, config: dict, target: dict[str, OutputState]):
+    """Store the plan of profile *name*, replacing the previous one."""
+    if key is None:
+        return
+    entries = _read_all()
+    entries[name] = {
+        "fingerprint": key,
+        "digest": profile_digest(profile),
+        "config": config,
+        "target": {uid: state_to_list(state) for uid, state in target.items()},
+    }
+    try:
+        write_atomic(plans_file(), json.dumps(entries))
+    except OSError:
+        log.debug("Can't write the compiled plans", exc_info=True)
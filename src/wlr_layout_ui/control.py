@@ -0,0 +1,170 @@
+"""Single-instance lock and control socket of the GUI.
+
+The running GUI holds an exclusive lock on
+``$XDG_RUNTIME_DIR/wlr-layout-ui.lock`` and listens on
+``$XDG_RUNTIME_DIR/wlr-layout-ui.sock``, so starting ``wlrlui`` again (eg.
+from a keybinding) asks the open window to raise itself instead of probing
+the displays and taking screenshots in a second process.  The same channel
+reloads the displays or applies a profile in the open window::
+
+    {"command": "raise" | "reload" | "apply", "profile": "<name>"}
+
+is sent as one JSON line, and answered with one JSON line:
+``{"ok": true, "message": "..."}``.
+
+Nothing here imports the GUI stack: the command line paths use :func:`send`.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import functools
+import json
+import logging
+import socket
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from .runtime import runtime_dir
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+COMMANDS = frozenset({"raise", "reload", "apply"})
+MAX_REQUEST = 4096
+
+
+def socket_path() -> Path:
+    return runtime_dir() / "wlr-layout-ui.sock"
+
+
+def lock_path() -> Path:
+    return runtime_dir() / "wlr-layout-ui.lock"
+
+
+def send(command: str, timeout: float = 30.0, wait: float = 0.0, **args: object) -> dict | None:
+    """Send *command* to the running GUI and return its reply, None if no GUI is listening.
+
+    Args:
+        timeout: how long to wait for the reply (applying a profile may take a few seconds).
+        wait: keep trying to connect for that long, for a GUI which is still starting.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(str(socket_path()))
+        except OSError:
+            sock.close()
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.02)
+            continue
+        try:
+            sock.sendall(json.dumps({"command": command, **args}).encode() + b"\n")
+            with sock.makefile("rb") as reply:
+                line = reply.readline()
+        except OSError:
+            log.warning("No reply to %r from the running instance", command, exc_info=True)
+            return None
+        finally:
+            sock.close()
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+
+class Instance:
+    """The single-instance lock, held for as long as the GUI runs."""
+
+    def __init__(self, lock_file):
+        self._lock_file = lock_file
+        self._server: socket.socket | None = None
+
+    @classmethod
+    def acquire(cls) -> Instance | None:
+        """Take the lock, None if another instance holds it."""
+        lock_file = lock_path().open("a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+        return cls(lock_file)
+
+    def serve(self, handler: Callable[[dict], dict], dispatch: Callable[[Callable[[], None]], None] | None = None):
+        """Answer the requests in a background thread.
+
+        Args:
+            handler: returns the reply to a (validated) request.
+            dispatch: runs its argument in the thread owning the GUI, by
+                default the request is handled in the background thread.
+        """
+        path = socket_path()
+        with contextlib.suppress(FileNotFoundError):
+            path.unlink()  # left behind by a crashed instance, we hold the lock
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(path))
+        path.chmod(0o600)
+        server.listen()
+        self._server = server
+
+        def answer(conn: socket.socket, request: dict):
+            try:
+                reply = handler(request)
+            except Exception as e:
+                log.exception("Failed handling %r", request)
+                reply = {"ok": False, "message": str(e)}
+            _reply(conn, reply)
+
+        def worker():
+            while True:
+                try:
+                    conn, _ = server.accept()
+                except OSError:
+                    return  # closed
+                request = _read_request(conn)
+                if request is None:
+                    conn.close()
+                elif request.get("command") not in COMMANDS:
+                    _reply(conn, {"ok": False, "message": f"Unknown command: {request.get('command')}"})
+                elif dispatch is None:
+                    answer(conn, request)
+                else:
+                    dispatch(functools.partial(answer, conn, request))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def close(self):
+        if self._server is not None:
+            with contextlib.suppress(OSError):
+                self._server.shutdown(socket.SHUT_RDWR)  # wakes the accept() up
+            self._server.close()
+            with contextlib.suppress(FileNotFoundError):
+                socket_path().unlink()
+            self._server = None
+        self._lock_file.close()
+
+
+def _read_request(conn: socket.socket) -> dict | None:
+    conn.settimeout(1.0)
+    try:
+        with conn.makefile("rb") as stream:
+            line = stream.readline(MAX_REQUEST)
+        request = json.loads(line)
+    except (OSError, ValueError):
+        return None
+    return request if isinstance(request, dict) else None
+
+
+def _reply(conn: socket.socket, reply: dict):
+    with contextlib.suppress(OSError):
+        conn.sendall(json.dumps(reply).encode() + b"\n")
+    conn.close()
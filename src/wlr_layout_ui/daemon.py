@@ -0,0 +1,118 @@
+"""Long-running mode applying the matching profile on monitor hotplug.
+
+Listens to Hyprland's event socket and, whenever the set of connected
+outputs changes, runs the same matching as ``wlrlui -m``.  Profiles and the
+display model stay in memory between events, so a hotplug costs one display
+query instead of a full process start.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+from . import cache
+from .hyprland import IPCError, open_events
+from .matching import find_profile
+from .profiles import get_index
+from .screens import displayInfo, load
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from .hyprland import HyprlandEvents
+
+log = logging.getLogger(__name__)
+
+# Events which may change the set of connected outputs
+TRIGGER_EVENTS = frozenset({"monitoradded", "monitoraddedv2", "monitorremoved", "monitorremovedv2", "configreloaded"})
+
+# Events arrive in bursts (eg. v1 + v2 flavours, several outputs of a dock), wait for this long
+# without new events before probing
+SETTLE_DELAY = 0.3
+
+
+class Daemon:
+    """Keeps profiles & displays warm and applies the matching profile on changes."""
+
+    def __init__(self, apply: Callable[..., object], settle_delay: float = SETTLE_DELAY):
+        self.apply = apply
+        self.settle_delay = settle_delay
+        # outputs (uid & monitor identity) the last update ran for
+        self.applied: frozenset[tuple[str, str | None]] | None = None
+
+    def update(self, *, force: bool = False) -> str | None:
+        """Probe the displays and apply the matching profile if the output set changed.
+
+        Another monitor plugged into the same connector counts as a change.
+
+        Returns:
+            The name of the applied profile, if any.
+        """
+        fingerprint = load(cached=True)
+        outputs = frozenset((screen.uid, screen.identity) for screen in displayInfo)
+        if outputs == self.applied and not force:
+            return None
+        self.applied = outputs
+        found = find_profile(get_index(), displayInfo)  # the profiles are only parsed again if the file changed
+        if found is None:
+            log.info("No profile found for %s", ", ".join(sorted(uid for uid, _ in outputs)))
+            return None
+        key, profile, exact = found
+        if exact:
+            print(f"Matched profile {key}. Applying it...")
+            self.apply(profile, reload=False, name=key, outputs=fingerprint)
+        else:
+            print(f"Partially matched profile {key}. Applying it to the connected outputs...")
+            self.apply(profile, reload=False)
+        return key
+
+    def wait_changes(self, events: HyprlandEvents) -> bool:
+        """Wait for a burst of events which may change the outputs.
+
+        Returns:
+            Whether the burst reloaded the configuration.
+
+        Raises:
+            IPCError: when the event socket is closed.
+        """
+        while (event := events.next_event()) is None or event[0] not in TRIGGER_EVENTS:
+            pass
+        force = event[0] == "configreloaded"
+        # let the burst settle
+        while (event := events.next_event(self.settle_delay)) is not None:
+            force = force or event[0] == "configreloaded"
+        return force
+
+    def safe_update(self, *, force: bool = False):
+        """Run :meth:`update`, logging its errors: a failed update must not stop the daemon."""
+        try:
+            self.update(force=force)
+        except Exception:
+            log.exception("Failed updating the layout")
+            self.applied = None  # retry on the next event
+
+    def run(self, events: HyprlandEvents):
+        """Process events until the compositor goes away."""
+        self.safe_update(force=True)
+        while True:
+            try:
+                force = self.wait_changes(events)
+            except IPCError:
+                log.info("Event socket closed, exiting", exc_info=True)
+                return
+            if force:
+                cache.invalidate()
+            self.safe_update(force=force)
+
+
+def run_daemon(apply: Callable[..., object]) -> bool:
+    """Run the daemon on the current Hyprland instance. Returns False if it's not available."""
+    events = open_events()
+    if events is None:
+        return False
+    try:
+        Daemon(apply).run(events)
+    finally:
+        events.close()
+    return True
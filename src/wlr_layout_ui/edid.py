@@ -0,0 +1,77 @@
+"""Stable monitor identities read from the EDID blobs exposed in sysfs.
+
+Connector names (``DP-3``...) depend on how the GPU and docks enumerate their
+ports; the EDID of the monitor doesn't.  :func:`read_identities` reads
+``/sys/class/drm/card*-*/edid`` for the connected connectors and reduces each
+EDID to a short hash of the manufacturer, product code and serial numbers,
+which profiles can match on.
+
+This is only file reads, so it's much cheaper than any compositor query and
+works while the compositor is still settling after a hotplug.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+DRM_ROOT = Path("/sys/class/drm")
+HEADER = b"\x00\xff\xff\xff\xff\xff\xff\x00"
+BLOCK_SIZE = 128
+
+
+@dataclass(frozen=True)
+class EdidInfo:
+    vendor: str  # PNP id, eg. "DEL"
+    product: int
+    serial: int
+    serial_text: str = ""  # from the "display product serial number" descriptor
+    model: str = ""  # from the "display product name" descriptor
+
+    @property
+    def identity(self) -> str:
+        """A compact hash of the fields identifying this very monitor."""
+        key = f"{self.vendor}:{self.product}:{self.serial}:{self.serial_text}"
+        return f"{self.vendor}-{hashlib.sha1(key.encode()).hexdigest()[:10]}"
+
+
+def parse_edid(data: bytes) -> EdidInfo | None:
+    """Decode the identification fields of the base EDID block, None if it's invalid."""
+    if len(data) < BLOCK_SIZE or not data.startswith(HEADER):
+        return None
+    if sum(data[:BLOCK_SIZE]) % 256:
+        log.debug("EDID checksum mismatch")
+        return None
+    (packed_vendor,) = struct.unpack_from(">H", data, 8)  # big endian, unlike the rest
+    product, serial = struct.unpack_from("<HI", data, 10)
+    vendor = "".join(chr(ord("A") - 1 + ((packed_vendor >> shift) & 0x1F)) for shift in (10, 5, 0))
+    texts = {}
+    for offset in range(54, 126, 18):
+        descriptor = data[offset : offset + 18]
+        if descriptor[:3] == b"\x00\x00\x00" and descriptor[3] in (0xFF, 0xFC):
+            texts[descriptor[3]] = descriptor[5:].split(b"\n", 1)[0].decode("cp437").strip()
+    return EdidInfo(vendor, product, serial, texts.get(0xFF, ""), texts.get(0xFC, ""))
+
+
+def read_identities(root: Path | None = None) -> dict[str, str]:
+    """Return the identity of the monitor plugged in each connected connector.
+
+    Connectors are named like the compositors do, without the ``cardN-`` prefix.
+    """
+    identities = {}
+    for connector in sorted((root or DRM_ROOT).glob("card*-*")):
+        try:
+            if (connector / "status").read_text().strip() != "connected":
+                continue
+            data = (connector / "edid").read_bytes()
+        except OSError:
+            continue
+        info = parse_edid(data)
+        if info is not None:
+            identities[connector.name.split("-", 1)[1]] = info.identity
+    return identities
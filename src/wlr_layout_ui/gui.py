@@ -1,7 +1,6 @@
 """GUI for managing monitor layouts."""
 
 import math
-import os
 import threading
 import time
 
@@ -12,20 +11,19 @@ from pyggets import makeLabel, makeRectangle
 
 from .displaywidget import GuiScreen
 from .icons import icon_path
-from .profiles import delete_profile, load_profiles, save_profile
+from .plan import snapshot
+from .profiles import delete_profile, load_profiles, match_profile, save_profile
 from .screens import displayInfo, load
 from .screenshots import capture_screenshots
 from .settings import ALLOW_DESELECT, LEGACY, PROG_NAME, UI_RATIO, WINDOW_MARGIN, reload_pre_commands
+from .transaction import apply_layout, current_state, revert_layout
 from .utils import (
     Rect,
     compute_bounding_box,
     config,
-    find_matching_mode,
     get_screen_size,
-    make_command,
+    layout_positions,
     simplify_model_name,
-    sorted_frequencies,
-    sorted_resolutions,
     trim_rects_flip_y,
 )
 from .widgets import (
@@ -228,7 +226,7 @@ class UI(pyglet.window.Window):
             self.resolutions,
             self.freqs,
         ]
-        if config.get("hyprland"):
+        if config.get("hyprland") or config.get("sway"):
             base_widgets.append(self.rotation)
             base_widgets.append(self.scale_ratio)
 
@@ -254,15 +252,17 @@ class UI(pyglet.window.Window):
         # pyglet.clock.schedule_interval(self._refresh_screenshots, 10.0)
         # Ensure correct positioning
         self.on_resize(width, height)
-        self.set_current_modes_as_ref()
-
-    def set_current_modes_as_ref(self):
-        """Set original cmd to allow reverting the selected mode."""
-        self.original_cmd = make_command(
-            [s.screen for s in self.gui_screens],
-            [s.rect.scaled(UI_RATIO) for s in self.gui_screens],
-            not LEGACY,
-        )
+        self.set_current_modes_as_ref(snapshot(s.screen for s in self.gui_screens))  # just probed
+
+    def set_current_modes_as_ref(self, state=None):
+        """Set the state to revert to, the live one of the outputs by default.
+
+        It is also the base the changes are computed from, so it holds the
+        compositor positions, not the ones of the GUI (which start at 0, 0).
+        """
+        if state is None:
+            state = current_state() or snapshot(s.screen for s in self.gui_screens)
+        self.reference_state = self.live_state = state
 
     @property
     def widgets(self):
@@ -553,11 +553,12 @@ class UI(pyglet.window.Window):
         if symbol == KEY_RETURN:
             if self.confirmation_needed:
                 self.confirmation_needed = 0.0
-                self.set_current_modes_as_ref()
+                self.set_current_modes_as_ref(self.live_state)  # the applied layout
             else:
                 self.action_save_layout()
         elif symbol == KEY_ESCAPE and self.confirmation_needed:
-            os.system(self.original_cmd)
+            revert_layout(self.reference_state, wayland=not LEGACY)
+            self.live_state = self.reference_state
             self.confirmation_needed = 0.0
             self.reset_sel()
         elif symbol == KEY_TAB:
@@ -636,7 +637,8 @@ class UI(pyglet.window.Window):
         """Draw the countdown for the confirmation."""
         delay = time.time() - self.confirmation_needed
         if delay >= CONFIRM_DELAY:
-            os.system(self.original_cmd)
+            revert_layout(self.reference_state, wayland=not LEGACY)
+            self.live_state = self.reference_state
             self.confirmation_needed = 0.0
         else:
             w, h = self.get_size()
@@ -758,6 +760,8 @@ class UI(pyglet.window.Window):
                 "scale": gs.screen.scale,
                 "transform": gs.screen.transform,
             })
+            if gs.screen.identity is not None:
+                ret[-1]["identity"] = gs.screen.identity
         return ret
 
     def action_save_new_profile(self, name):
@@ -787,33 +791,28 @@ class UI(pyglet.window.Window):
             self.set_error("No profile selected!")
             return
 
-        def findScreen(uid):
-            """Find the screen with the given uid."""
-            for screen in self.gui_screens:
-                if screen.screen.uid == uid:
-                    return screen
-
-        for screen_info in self.profile_list.get_value():
-            # try to match screen info with current screens & update accordingly
-            found = findScreen(screen_info["uid"])
-            if found:
-                info = screen_info.copy()
-                found.screen.transform = info.get("transform", 0)
-                found.screen.scale = info.get("scale", 1)
-                info.pop("uid")
-                found.screen.active = info.pop("active")
-                mode = find_matching_mode(
-                    found.screen.available,
-                    (info["width"], info["height"]),
-                    info["freq"],
-                )
-                if mode:
-                    found.screen.mode = mode
-                else:
-                    self.set_error(f"No matching mode for {found.screen.uid}")
-                w, h = get_screen_size(found.screen, scale=1)
-                rect = Rect(info["x"], -info["y"] - h, w, h)
-                found.target_rect = rect.scaled(1 / UI_RATIO)
+        profile = self.profile_list.get_value()
+        screens = {screen.screen.uid: screen for screen in self.gui_screens}
+        mapping = match_profile(profile, [screen.screen for screen in self.gui_screens])
+        if mapping is None:  # partial match, by connector name
+            mapping = {p["uid"]: p for p in profile if p["uid"] in screens}
+
+        for uid, screen_info in mapping.items():
+            # update the current screens with the matched profile info
+            found = screens[uid]
+            info = screen_info.copy()
+            found.screen.transform = info.get("transform", 0)
+            found.screen.scale = info.get("scale", 1)
+            info.pop("uid")
+            found.screen.active = info.pop("active")
+            mode = found.screen.match_mode((info["width"], info["height"]), info["freq"])
+            if mode:
+                found.screen.mode = mode
+            else:
+                self.set_error(f"No matching mode for {found.screen.uid}")
+            w, h = get_screen_size(found.screen, scale=1)
+            rect = Rect(info["x"], -info["y"] - h, w, h)
+            found.target_rect = rect.scaled(1 / UI_RATIO)
         self.center_layout()
 
     def action_update_scale(self):
@@ -826,24 +825,27 @@ class UI(pyglet.window.Window):
     def action_update_frequencies(self, screen, mode=None):
         """Update the frequencies of the selected screen."""
         cur_mode = (screen.screen.mode.width, screen.screen.mode.height) if mode is None else mode
-        freqs = sorted_frequencies(screen.screen.available, cur_mode[0], cur_mode[1])
+        freqs = screen.screen.mode_index.frequencies(cur_mode)
         self.freqs.options = [{"name": f"{r:.2f} Hz", "value": r} for r in freqs]
-        if mode is None:
+        if mode is None and screen.screen.mode.freq in freqs:
             self.freqs.selected_index = freqs.index(screen.screen.mode.freq)
         else:
             self.freqs.selected_index = 0
 
     def action_save_layout(self):
         """Save the current layout."""
-        cmds = make_command(
-            [s.screen for s in self.gui_screens],
-            [s.target_rect.scaled(UI_RATIO) for s in self.gui_screens],
-            not LEGACY,
-        )
-        for cmd in cmds:
-            if os.system(cmd):
-                self.set_error("Failed applying the layout")
-        print("\n".join(cmds))
+        screens = [s.screen for s in self.gui_screens]
+        rects = [s.target_rect.scaled(UI_RATIO) for s in self.gui_screens]
+        target = snapshot(screens, layout_positions(rects))
+        result = apply_layout(target, self.live_state, wayland=not LEGACY)
+        if not result.commands:  # nothing changed
+            return
+        print("\n".join(result.commands))
+        if not result.ok:
+            self.set_error(f"Layout refused for {', '.join(result.mismatches)}, restored the previous one")
+            self.reset_sel()
+            return
+        self.live_state = target
 
         self.confirmation_needed = time.time()
 
@@ -870,7 +872,7 @@ class UI(pyglet.window.Window):
         """Update the mode of the selected screen."""
         assert self.selected_item
         screen = self.selected_item.screen
-        screen.mode = find_matching_mode(screen.available, self.resolutions.get_value(), self.freqs.get_value())
+        screen.mode = screen.mode_index.find(self.resolutions.get_value(), self.freqs.get_value())
         self.selected_item.target_rect.width = screen.mode.width // UI_RATIO
         self.selected_item.target_rect.height = screen.mode.height // UI_RATIO
 
@@ -887,7 +889,7 @@ class UI(pyglet.window.Window):
         values = [o["value"] for o in self.scale_ratio.options]
         self.scale_ratio.selected_index = values.index(get_closest_match(values, screen.screen.scale))
         # update resolution dropdown
-        res = sorted_resolutions(screen.screen.available)
+        res = screen.screen.mode_index.resolutions
         self.resolutions.options = [{"name": f"{r[0]} x {r[1]}", "value": r} for r in res]
         i = -1
         for i, r in enumerate(res):  # ruff: ignore[unused-loop-control-variable]
@@ -0,0 +1,102 @@
+"""Coalescing of concurrent ``wlrlui -m`` runs.
+
+Plugging a dock fires several udev events within a second, and a rule
+running ``wlrlui -m`` on each of them would probe the displays and
+reconfigure the compositor as many times, concurrently.  :func:`coalesce`
+serializes the runs on a per-user lock (``$XDG_RUNTIME_DIR``) and debounces
+them: every run records its event, the one holding the lock waits for the
+events to settle then probes and applies once, and the runs which were
+waiting for the lock exit with its result when it covers their event.
+
+A run is covered when the probe started after its event was recorded and
+the cycle succeeded, otherwise (eg. an output plugged while the previous
+profile was applied) it runs the cycle again.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import io
+import json
+import logging
+import os
+import time
+from contextlib import redirect_stdout
+from typing import TYPE_CHECKING
+
+from .daemon import SETTLE_DELAY
+from .runtime import runtime_dir, write_atomic
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+MAX_SETTLE = 3.0  # don't wait longer than that for a burst to end
+
+
+def _runtime_file(suffix: str) -> Path:
+    return runtime_dir() / f"wlr-layout-ui-match.{suffix}"
+
+
+def _record_event(path: Path) -> int:
+    """Record an event now, return its time."""
+    now = time.time_ns()
+    path.touch()
+    os.utime(path, ns=(now, now))
+    return now
+
+
+def _last_event(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def _read_result(path: Path) -> dict | None:
+    try:
+        result = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return result if isinstance(result, dict) else None
+
+
+def _write_result(path: Path, result: dict):
+    try:
+        write_atomic(path, json.dumps(result))
+    except OSError:
+        log.warning("Can't save %s", path, exc_info=True)
+
+
+def coalesce(run: Callable[[], int], settle_delay: float = SETTLE_DELAY) -> tuple[int, str]:
+    """Run *run* once for a burst of concurrent calls.
+
+    Args:
+        run: probes the displays and applies a profile, returns the exit status.
+        settle_delay: wait for that long without new calls before running.
+
+    Returns:
+        The exit status and the output of the run which covered this call.
+        Only the successful runs cover the waiting calls: after a failure
+        they run again.
+    """
+    events = _runtime_file("events")
+    results = _runtime_file("json")
+    stamp = _record_event(events)
+    with _runtime_file("lock").open("a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)  # released when closed
+        shared = _read_result(results)
+        if shared is not None and shared.get("generation", 0) >= stamp:
+            return shared["status"], shared["output"]
+        deadline = time.monotonic() + MAX_SETTLE
+        while (idle := (time.time_ns() - _last_event(events)) / 1e9) < settle_delay and time.monotonic() < deadline:
+            time.sleep(settle_delay - idle)
+        generation = time.time_ns()  # the events recorded until now are covered by this probe
+        output = io.StringIO()
+        with redirect_stdout(output):
+            status = run()
+        if status == 0:
+            _write_result(results, {"generation": generation, "status": status, "output": output.getvalue()})
+    return status, output.getvalue()
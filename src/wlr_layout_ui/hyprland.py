@@ -0,0 +1,316 @@
+"""Native client for the Hyprland IPC socket.
+
+Talks directly to ``$XDG_RUNTIME_DIR/hypr/$HYPRLAND_INSTANCE_SIGNATURE/.socket.sock``
+instead of forking ``hyprctl`` for every query.  When the socket cannot be
+found (not running under Hyprland, very old versions, sandboxes...) every
+helper transparently falls back to the ``hyprctl`` binary.
+
+Hyprland answers exactly one request per connection and then closes it, so
+the client keeps the resolved socket path for the whole process and opens a
+short-lived connection per request (or per ``[[BATCH]]`` of requests).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import socket
+import subprocess
+import time
+from functools import lru_cache
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+SOCKET_NAME = ".socket.sock"
+BATCH_PREFIX = "[[BATCH]]"
+JSON_PREFIX = "j/"
+
+
+class IPCError(OSError):
+    """Raised when the Hyprland socket cannot be reached or misbehaves."""
+
+
+def instance_dir() -> Path | None:
+    """Return the runtime directory of the current Hyprland instance, if any."""
+    signature = os.environ.get("HYPRLAND_INSTANCE_SIGNATURE")
+    if not signature:
+        return None
+    candidates = []
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        candidates.append(Path(runtime_dir) / "hypr" / signature)
+    candidates.append(Path("/tmp/hypr") / signature)  # Hyprland < 0.40
+    for candidate in candidates:
+        if (candidate / SOCKET_NAME).exists():
+            return candidate
+    return None
+
+
+class HyprlandIPC:
+    """Minimal request/response client for Hyprland's command socket."""
+
+    def __init__(self, path: str | Path, timeout: float = 2.0):
+        self.path = str(path)
+        self.timeout = timeout
+
+    def __repr__(self):
+        return f"<HyprlandIPC {self.path}>"
+
+    def request(self, command: str, timeout: float | None = None) -> str:
+        """Send a raw command and return the decoded reply."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout if timeout is None else timeout)
+        try:
+            sock.connect(self.path)
+            sock.sendall(command.encode())
+            chunks = _read_all(sock)
+        except OSError as e:
+            msg = f"Hyprland IPC request {command!r} failed: {e}"
+            raise IPCError(msg) from e
+        finally:
+            sock.close()
+        return b"".join(chunks).decode(errors="replace")
+
+    def query(self, command: str):
+        """Send a command with the JSON prefix and decode the reply."""
+        return json.loads(self.request(JSON_PREFIX + command))
+
+    def batch(self, commands: list[str]) -> list[str]:
+        """Run several commands in a single round trip, returning one reply per command."""
+        reply = self.request(BATCH_PREFIX + " ; ".join(commands))
+        return reply.split("\n\n") if reply else []
+
+
+def _read_all(sock: socket.socket) -> list[bytes]:
+    """Read until the peer closes the connection."""
+    chunks = []
+    while chunk := sock.recv(65536):
+        chunks.append(chunk)
+    return chunks
+
+
+@lru_cache(maxsize=1)
+def get_client() -> HyprlandIPC | None:
+    """Return the process-wide IPC client, or None if the socket is missing."""
+    directory = instance_dir()
+    if directory is None:
+        return None
+    return HyprlandIPC(directory / SOCKET_NAME)
+
+
+def hyprctl(command: str, *, json_output: bool = False, timeout: float | None = None) -> str:
+    """Run a ``hyprctl`` command, preferring the IPC socket over a subprocess.
+
+    Raises:
+        subprocess.TimeoutExpired: if the ``hyprctl`` fallback takes more than *timeout* seconds.
+    """
+    client = get_client()
+    if client:
+        try:
+            return client.request((JSON_PREFIX if json_output else "") + command, timeout)
+        except IPCError:
+            log.debug("IPC failed, falling back to hyprctl", exc_info=True)
+    if timeout is None:
+        return subprocess.getoutput(f"hyprctl {'-j ' if json_output else ''}{command}")
+    args = ["hyprctl", "-j", *command.split()] if json_output else ["hyprctl", *command.split()]
+    try:
+        proc = subprocess.run(args, capture_output=True, text=True, timeout=timeout, check=False)
+    except FileNotFoundError:
+        return ""
+    return proc.stdout
+
+
+def hyprctl_json(command: str, timeout: float | None = None):
+    """Run a ``hyprctl -j`` query and decode the JSON reply.
+
+    Raises:
+        json.JSONDecodeError: when the reply is not valid JSON (eg. Hyprland not running).
+        subprocess.TimeoutExpired: if the ``hyprctl`` fallback takes more than *timeout* seconds.
+    """
+    return json.loads(hyprctl(command, json_output=True, timeout=timeout))
+
+
+def _reply_ok(reply: str) -> bool:
+    """Tell whether a Hyprland reply looks like a success."""
+    return not any(line.strip().lower().startswith(("error", "invalid", "unknown")) for line in reply.splitlines())
+
+
+def run_hyprctl_command(cmd: str) -> bool | None:
+    """Execute a ``hyprctl`` shell command (as built by ``make_command``) over IPC.
+
+    Returns:
+        Whether the command succeeded, or None if *cmd* can't be sent over
+        IPC (not a supported ``hyprctl`` invocation, socket missing...), in
+        which case the caller should run it through the shell.
+    """
+    client = get_client()
+    if client is None:
+        return None
+    for prefix, quote in (("hyprctl --batch ", '"'), ("hyprctl eval ", "'")):
+        if cmd.startswith(prefix + quote) and cmd.endswith(quote):
+            payload = cmd[len(prefix) + 1 : -1]
+            break
+    else:
+        return None
+    try:
+        if prefix == "hyprctl eval ":
+            replies = [client.request("eval " + payload)]
+        else:
+            replies = client.batch([part.strip() for part in payload.split(";")])
+    except IPCError:
+        log.debug("IPC failed, falling back to hyprctl", exc_info=True)
+        return None
+    return all(_reply_ok(reply) for reply in replies)
+
+
+# ---------------------------------------------------------------------------
+# Event socket
+# ---------------------------------------------------------------------------
+
+EVENT_SOCKET_NAME = ".socket2.sock"
+
+
+class HyprlandEvents:
+    """Line-based reader for Hyprland's ``.socket2.sock`` event stream."""
+
+    def __init__(self, path: str | Path):
+        self.path = str(path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._sock.connect(self.path)
+        except OSError as e:
+            self._sock.close()
+            msg = f"Can't connect to Hyprland events on {self.path}: {e}"
+            raise IPCError(msg) from e
+        self._buffer = b""
+
+    def __repr__(self):
+        return f"<HyprlandEvents {self.path}>"
+
+    def next_event(self, timeout: float | None = None) -> tuple[str, str] | None:
+        """Return the next ``(event, data)`` pair, or None if *timeout* expires first.
+
+        Raises:
+            IPCError: when the compositor closed the socket.
+        """
+        while b"\n" not in self._buffer:
+            self._sock.settimeout(timeout)
+            try:
+                chunk = self._sock.recv(4096)
+            except TimeoutError:
+                return None
+            except OSError as e:
+                msg = f"Hyprland event socket error: {e}"
+                raise IPCError(msg) from e
+            if not chunk:
+                msg = "Hyprland closed the event socket"
+                raise IPCError(msg)
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        event, _, data = line.decode(errors="replace").partition(">>")
+        return event, data
+
+    def close(self):
+        self._sock.close()
+
+
+def open_events() -> HyprlandEvents | None:
+    """Connect to the event socket of the current Hyprland instance, if any."""
+    directory = instance_dir()
+    if directory is None or not (directory / EVENT_SOCKET_NAME).exists():
+        return None
+    return HyprlandEvents(directory / EVENT_SOCKET_NAME)
+
+
+# ---------------------------------------------------------------------------
+# Output readiness
+# ---------------------------------------------------------------------------
+
+# enable/disable calls of the Lua syntax, as emitted by _make_command_hyprland_lua
+MONITOR_TOGGLE_RE = re.compile(r'hl\.monitor\(\{output="(?P<name>[^"]+)", disabled?=(?P<disabled>true|false)\}\)')
+
+# Events telling an output was enabled or disabled
+OUTPUT_EVENTS = frozenset({"monitoradded", "monitoraddedv2", "monitorremoved", "monitorremovedv2"})
+
+# Longest wait between two state queries, in case an event gets lost
+POLL_INTERVAL = 0.25
+
+
+class OutputWatcher:
+    """Wait until the outputs reached the enabled/disabled state requested by a command.
+
+    The state is queried once, then again on every output event of the
+    compositor (or every :data:`POLL_INTERVAL` without an event socket), so
+    the wait ends as soon as the compositor is done.
+    """
+
+    def __init__(self, client: HyprlandIPC, expected: dict[str, bool], events: HyprlandEvents | None = None):
+        self.client = client
+        self.expected = expected  # output name -> enabled
+        self.events = events
+
+    def __repr__(self):
+        return f"<OutputWatcher {self.expected}>"
+
+    def ready(self) -> bool:
+        """Tell whether all the outputs are in the expected state."""
+        enabled = {monitor["name"]: not monitor.get("disabled", False) for monitor in self.client.query("monitors all")}
+        return all(enabled.get(name, False) == state for name, state in self.expected.items())
+
+    def _next_event(self, timeout: float):
+        if self.events is None:
+            time.sleep(timeout)
+            return
+        try:
+            deadline = time.monotonic() + timeout
+            while (remaining := deadline - time.monotonic()) > 0:
+                event = self.events.next_event(remaining)
+                if event is None or event[0] in OUTPUT_EVENTS:
+                    return
+        except IPCError:
+            log.debug("Lost the event socket, polling", exc_info=True)
+            self.events.close()
+            self.events = None
+
+    def wait(self, timeout: float) -> bool:
+        """Block until the outputs are ready, at most *timeout* seconds. Returns whether they are."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if self.ready():
+                    return True
+            except (IPCError, ValueError):
+                log.debug("Can't query the outputs state", exc_info=True)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                log.debug("Outputs still not ready after %.1fs", timeout)
+                return False
+            self._next_event(min(remaining, POLL_INTERVAL))
+
+    def close(self):
+        if self.events is not None:
+            self.events.close()
+            self.events = None
+
+
+def watch_outputs(cmd: str) -> OutputWatcher | None:
+    """Prepare to wait for the outputs toggled by the ``hyprctl eval`` command *cmd*.
+
+    Must be called before running *cmd*, so that no event is missed.
+
+    Returns:
+        None if *cmd* doesn't toggle outputs or Hyprland can't be reached over IPC.
+    """
+    client = get_client()
+    expected = {match["name"]: match["disabled"] == "false" for match in MONITOR_TOGGLE_RE.finditer(cmd)}
+    if client is None or not expected or not cmd.startswith("hyprctl eval "):
+        return None
+    try:
+        events = open_events()
+    except IPCError:
+        log.debug("No event socket, polling", exc_info=True)
+        events = None
+    return OutputWatcher(client, expected, events)
@@ -0,0 +1,144 @@
+"""Best-fit matching of the profiles with a partial set of outputs.
+
+When no profile uses exactly the connected outputs (eg. a projector plugged
+into a docked laptop), :func:`best_fit` picks the profile covering them best
+and :func:`derive_profile` turns it into a profile of the connected outputs:
+the paired ones keep their profile entry, the others are placed on the right
+of the layout, and the entries of missing outputs are dropped.
+
+Profiles are compared on a score (see :class:`Fit`), then on their last use
+and their name (see :class:`.profiles.ProfileIndex`), so the choice is
+deterministic.  Only the profiles sharing outputs with the screens are
+scored, the most promising first, and the scoring stops when the others
+can't pair enough outputs to win: this stays in the milliseconds with a
+thousand profiles.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .profiles import pair_entries
+from .utils import get_size
+
+if TYPE_CHECKING:
+    from .profiles import ProfileIndex
+    from .types import Screen
+
+
+@dataclass(frozen=True, slots=True)
+class Fit:
+    """How well a profile covers the connected screens."""
+
+    name: str
+    #: the profile entry of each paired screen uid
+    entries: dict[str, dict]
+    #: paired screens, -entries of missing outputs, pairs on the monitor identity, pairs with an available mode
+    score: tuple[int, int, int, int]
+
+
+def score_profile(name: str, profile, screens: list[Screen]) -> Fit:
+    """Pair *profile* with *screens* as far as possible and score the result."""
+    matched, pending = pair_entries(profile, screens)
+    by_uid = {screen.uid: screen for screen in screens}
+    identities = modes = 0
+    for uid, entry in matched.items():
+        screen = by_uid[uid]
+        if entry.get("identity") is not None and entry["identity"] == screen.identity:
+            identities += 1
+        if not entry.get("active", False) or screen.match_mode((entry["width"], entry["height"]), entry["freq"]) is not None:
+            modes += 1
+    return Fit(name, matched, (len(matched), -len(pending), identities, modes))
+
+
+def best_fit(index: ProfileIndex, screens: list[Screen]) -> Fit | None:
+    """Return the profile covering *screens* best, None if no profile shares any output with them.
+
+    Profiles which would leave every screen off are skipped.
+    """
+    profiles = index.refresh()
+    best: Fit | None = None
+    best_rank: tuple[tuple[int, int, int, int], float] | None = None
+    for name, shared in sorted(index.sharing(screens).items(), key=lambda item: -item[1]):
+        if best is not None and shared < best.score[0]:
+            break  # can't pair as many screens
+        fit = score_profile(name, profiles[name], screens)
+        if not fit.entries or not _turns_on(fit, screens):
+            continue
+        rank = (fit.score, index.used.get(name, 0))
+        if best is None or best_rank is None or rank > best_rank or (rank == best_rank and name < best.name):
+            best, best_rank = fit, rank
+    return best
+
+
+def _turns_on(fit: Fit, screens: list[Screen]) -> bool:
+    """Whether the profile derived from *fit* enables at least one of the *screens*.
+
+    Eg. the laptop panel turned off by a docked profile must not be the only
+    output left once undocked.
+    """
+    for screen in screens:
+        entry = fit.entries.get(screen.uid)
+        if entry is None:
+            if screen.mode or screen.available:
+                return True
+        elif entry.get("active", False):
+            return True
+    return False
+
+
+def _size(entry) -> tuple[int, int]:
+    return get_size(entry["width"], entry["height"], entry.get("scale", 1), entry.get("transform", 0))
+
+
+def derive_profile(fit: Fit, screens: list[Screen]) -> list[dict]:
+    """Return a profile of the *screens*, laid out like the profile of *fit*.
+
+    The screens without profile entry are enabled with their current mode
+    (or their first one), side by side on the right of the others.
+    """
+    active = [entry for entry in fit.entries.values() if entry.get("active", False)]
+    right = max((int(entry["x"]) + _size(entry)[0] for entry in active), default=0)
+    top = min((int(entry["y"]) for entry in active), default=0)
+    profile = []
+    for screen in screens:
+        entry = fit.entries.get(screen.uid)
+        if entry is not None:
+            profile.append(dict(entry, uid=screen.uid))
+            continue
+        mode = screen.mode or (screen.available[0] if screen.available else None)
+        if mode is None:
+            profile.append({"name": screen.name, "uid": screen.uid, "active": False})
+            continue
+        entry = {
+            "name": screen.name,
+            "uid": screen.uid,
+            "active": True,
+            "width": mode.width,
+            "height": mode.height,
+            "freq": mode.freq,
+            "x": right,
+            "y": top,
+            "scale": screen.scale,
+            "transform": screen.transform,
+        }
+        profile.append(entry)
+        right += _size(entry)[0]
+    return profile
+
+
+def find_profile(index: ProfileIndex, screens: list[Screen]) -> tuple[str, list[dict], bool] | None:
+    """Return the profile to apply on *screens*, None if there is none.
+
+    Returns:
+        The name of the profile, its entries (derived from it for a partial
+        match, see :func:`derive_profile`) and whether it matched exactly.
+    """
+    name = index.match(screens)
+    if name is not None:
+        return name, index.refresh()[name], True
+    fit = best_fit(index, screens)
+    if fit is None:
+        return None
+    return fit.name, derive_profile(fit, screens), False
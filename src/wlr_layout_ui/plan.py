@@ -0,0 +1,179 @@
+"""Minimal apply plans: the changes turning the live layout into a target one.
+
+The command builders of :mod:`.utils` used to re-emit the full configuration
+of every output, making the compositor redo modesets (and flicker) on outputs
+which didn't change.  :func:`plan_layout` compares the target screens with a
+:func:`snapshot` of the live state and returns one :class:`Change` per output
+which actually needs one, telling what kind of change it is:
+
+- ``enable`` / ``disable``: the output is switched on or off
+- ``mode``: the mode, scale or transform changes (implies a modeset)
+- ``move``: only the position changes
+
+Without a snapshot every output gets an ``enable`` or ``disable`` change,
+which is the full configuration.
+
+:func:`canonical_layout` gives a hashable form of a layout which doesn't
+depend on the origin of the coordinates or on the rounding of the scales, so
+checking whether a layout is already in place (see :func:`same_layout` and
+:func:`layout_digest`) costs one comparison.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .types import FREQ_TOLERANCE
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from .types import Mode, Screen
+
+ENABLE = "enable"
+DISABLE = "disable"
+MODE = "mode"
+MOVE = "move"
+
+SCALE_TOLERANCE = 1e-3  # compositors report eg. 1.3333334 for 1.333333
+VERIFY_SCALE_TOLERANCE = 0.05  # Hyprland rounds the scales to values giving integer logical sizes
+
+
+@dataclass(frozen=True, slots=True)
+class OutputState:
+    """The configuration of one output."""
+
+    active: bool
+    mode: Mode | None
+    position: tuple[int, int]
+    scale: float = 1
+    transform: int = 0
+
+    def same_config(self, other: OutputState) -> bool:
+        """Tell whether both states have the same mode, scale and transform."""
+        return self.mode is other.mode and self.transform == other.transform and abs(self.scale - other.scale) < SCALE_TOLERANCE
+
+    def matches(self, other: OutputState, *, strict: bool = True) -> bool:
+        """Tell whether *other*, as reported by the compositor, fulfils this state.
+
+        The refresh rate and scale can be adjusted by the compositor, so they
+        are compared loosely; and only when *strict*, like the transform, since
+        the ``wlr-randr`` / ``xrandr`` commands don't set them.
+        """
+        if self.active != other.active:
+            return False
+        if not self.active:
+            return True
+        if self.position != other.position or self.mode is None or other.mode is None:
+            return False
+        if (self.mode.width, self.mode.height) != (other.mode.width, other.mode.height):
+            return False
+        if not strict:
+            return True
+        return (
+            abs(self.mode.freq - other.mode.freq) <= FREQ_TOLERANCE
+            and self.transform == other.transform
+            and abs(self.scale - other.scale) < VERIFY_SCALE_TOLERANCE
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Change:
+    """One step of a plan: bring output *uid* to *state*."""
+
+    kind: str
+    uid: str
+    state: OutputState
+
+
+def output_state(screen: Screen, position: tuple[int, int] | None = None) -> OutputState:
+    """Return the state of *screen*, optionally at another *position*."""
+    return OutputState(screen.active, screen.mode, screen.position if position is None else position, screen.scale, screen.transform)
+
+
+def snapshot(screens: Iterable[Screen], positions: Iterable[tuple[int, int]] | None = None) -> dict[str, OutputState]:
+    """Capture the state of *screens* (at their own positions unless *positions* are given)."""
+    if positions is None:
+        return {screen.uid: output_state(screen) for screen in screens}
+    return {screen.uid: output_state(screen, position) for screen, position in zip(screens, positions)}
+
+
+def plan_layout(
+    screens: Iterable[Screen], positions: Iterable[tuple[int, int]], live: dict[str, OutputState] | None = None
+) -> list[Change]:
+    """Return the changes bringing the outputs from the *live* state to *screens* at *positions*.
+
+    Args:
+        screens: the target screens.
+        positions: the target position of each screen, in compositor coordinates.
+        live: the current state, see :func:`snapshot`; outputs missing from it are fully configured.
+    """
+    return diff_states(snapshot(screens, positions), live)
+
+
+def diff_states(target: dict[str, OutputState], live: dict[str, OutputState] | None = None) -> list[Change]:
+    """Return the changes bringing the outputs from the *live* state to the *target* one."""
+    changes = []
+    for uid, state in target.items():
+        before = live.get(uid) if live else None
+        if before is None:
+            kind = ENABLE if state.active else DISABLE
+        elif not state.active:
+            if not before.active:
+                continue
+            kind = DISABLE
+        elif not before.active:
+            kind = ENABLE
+        elif not state.same_config(before):
+            kind = MODE
+        elif state.position != before.position:
+            kind = MOVE
+        else:
+            continue
+        changes.append(Change(kind, uid, state))
+    return changes
+
+
+def mismatches(target: dict[str, OutputState], actual: dict[str, OutputState], *, strict: bool = True) -> list[str]:
+    """Return the outputs of *target* which the *actual* state doesn't match (see :meth:`OutputState.matches`)."""
+    return [uid for uid, state in target.items() if uid not in actual or not state.matches(actual[uid], strict=strict)]
+
+
+def canonical_layout(states: dict[str, OutputState]) -> tuple:
+    """Return a hashable form of the layout *states*, equal for the layouts which look the same.
+
+    The outputs are sorted by uid, the positions are relative to the top left
+    corner of the active outputs, the scales are rounded and the inactive
+    outputs only keep their uid.
+    """
+    active = [state for state in states.values() if state.active]
+    left = min((state.position[0] for state in active), default=0)
+    top = min((state.position[1] for state in active), default=0)
+    layout: list[tuple] = []
+    for uid in sorted(states):
+        state = states[uid]
+        if not state.active:
+            layout.append((uid, False))
+            continue
+        mode = None if state.mode is None else (state.mode.width, state.mode.height, state.mode.freq)
+        position = (int(state.position[0] - left), int(state.position[1] - top))
+        layout.append((uid, True, mode, position, round(float(state.scale), 3), int(state.transform)))
+    return tuple(layout)
+
+
+def same_layout(target: dict[str, OutputState], live: dict[str, OutputState]) -> bool:
+    """Tell whether the *live* outputs already have the *target* layout.
+
+    The outputs missing from *target* keep their live state, and count for the
+    origin of the layout.
+    """
+    if not target.keys() <= live.keys():
+        return False
+    return canonical_layout({**live, **target}) == canonical_layout(live)
+
+
+def layout_digest(states: dict[str, OutputState]) -> str:
+    """Return a digest of :func:`canonical_layout`, eg. to compare layouts from scripts."""
+    return hashlib.sha1(repr(canonical_layout(states)).encode()).hexdigest()
@@ -1,38 +1,346 @@
+"""The saved profiles (``~/.config/wlrlui.toml``) and their matching with the screens."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import tomli
 import tomli_w
 
+from .runtime import cache_dir, write_atomic
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from .types import Screen
+
+log = logging.getLogger(__name__)
+
 cfg_file = Path("~/.config/wlrlui.toml").expanduser()
 
 
-def load_profiles():
-    try:
-        with cfg_file.open("rb") as f:
-            return tomli.load(f)
-    except FileNotFoundError:
-        return {}
+class ProfileStore:
+    """The profiles of a TOML file, parsed once and kept in memory.
 
+    The parsed data is reused as long as the file keeps the same mtime, size
+    and inode, so it is only parsed again when another process (or an editor)
+    changed it.  Writes go to a temporary file renamed over the original, so
+    readers never see a partially written file.
+
+    The mappings returned by :meth:`load` must not be modified: changes go
+    through :meth:`save` and :meth:`delete`, which replace the mapping.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._profiles: dict = {}
+        self._stamp: tuple[int, int, int] | None = None
+
+    @staticmethod
+    def _stamp_of(st: os.stat_result) -> tuple[int, int, int]:
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    @property
+    def stamp(self) -> tuple[int, int, int] | None:
+        """Identify the version of the file read by the last :meth:`load`, None if there was no file."""
+        return self._stamp
+
+    def load(self) -> dict:
+        """Return the profiles, parsing the file only if it changed."""
+        try:
+            stamp = self._stamp_of(self.path.stat())
+        except FileNotFoundError:
+            self._profiles, self._stamp = {}, None
+            return self._profiles
+        if stamp != self._stamp:
+            with self.path.open("rb") as f:
+                stamp = self._stamp_of(os.fstat(f.fileno()))
+                self._profiles = tomli.load(f)
+            self._stamp = stamp
+        return self._profiles
+
+    def save(self, name: str, profile_data):
+        """Add or replace the profile *name*."""
+        profiles = dict(self.load())
+        profiles[name] = profile_data
+        self._write(profiles)
+
+    def delete(self, name: str):
+        """Remove the profile *name*, if it exists."""
+        profiles = self.load()
+        if name not in profiles:
+            return
+        profiles = dict(profiles)
+        del profiles[name]
+        self._write(profiles)
+
+    def _write(self, profiles: dict):
+        target = self.path.resolve()  # keep symlinked configurations (eg. dotfiles) working
+        try:
+            mode = target.stat().st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        with tempfile.NamedTemporaryFile("wb", dir=target.parent, prefix=f".{target.name}.", suffix=".tmp", delete=False) as f:
+            tmp = Path(f.name)
+            try:
+                tomli_w.dump(profiles, f)
+                f.flush()
+                os.fchmod(f.fileno(), mode)
+                stamp = self._stamp_of(os.fstat(f.fileno()))
+                tmp.replace(target)
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+        self._profiles, self._stamp = profiles, stamp
 
-def save_profile(name: str, profile_data):
-    try:
-        profiles = load_profiles()
-    except FileNotFoundError:
-        profiles = {}
 
-    profiles[name] = profile_data
+@lru_cache(maxsize=None)
+def _store(path: Path) -> ProfileStore:
+    return ProfileStore(path)
 
-    with cfg_file.open("wb") as f:
-        tomli_w.dump(profiles, f)
+
+def get_store() -> ProfileStore:
+    """Return the store of :data:`cfg_file`, shared by everything in the process."""
+    return _store(cfg_file)
+
+
+def load_profiles() -> dict:
+    return get_store().load()
+
+
+def save_profile(name: str, profile_data):
+    get_store().save(name, profile_data)
 
 
 def delete_profile(name: str):
-    try:
-        profiles = load_profiles()
-    except FileNotFoundError:
-        return
+    get_store().delete(name)
+
+
+def pair_entries(profile, screens) -> tuple[dict[str, dict], list[dict]]:
+    """Pair as many entries of *profile* as possible with the given screens (see :func:`match_profile`).
+
+    Returns:
+        The profile entry for each paired screen uid, and the entries left.
+    """
+    free = list(screens)
+    matched: dict[str, dict] = {}
+
+    def take(entry, rule) -> bool:
+        screen = next((s for s in free if rule(entry, s)), None)
+        if screen is None:
+            return False
+        free.remove(screen)
+        matched[screen.uid] = entry
+        return True
+
+    pending = list(profile)
+    for rule in (
+        # identical monitors share an identity: keep them on their connectors when possible
+        lambda e, s: e.get("identity") is not None and s.identity == e["identity"] and s.uid == e["uid"],
+        lambda e, s: e.get("identity") is not None and s.identity == e["identity"],
+        lambda e, s: s.uid == e["uid"] and (e.get("identity") is None or s.identity is None),
+    ):
+        pending = [entry for entry in pending if not take(entry, rule)]
+    return matched, pending
+
+
+def match_profile(profile, screens) -> dict[str, dict] | None:
+    """Pair the entries of *profile* with the given screens.
+
+    Entries saved with a monitor ``identity`` (see :mod:`.edid`) match the
+    screen showing that monitor, whatever connector it's plugged in.  The
+    others, or all of them when the screens identity is unknown, match on
+    their ``uid`` (connector name).
+
+    Returns:
+        The profile entry for each screen uid, or None if the profile doesn't
+        use exactly these screens.
+    """
+    if len(profile) != len(screens):
+        return None
+    matched, pending = pair_entries(profile, screens)
+    return None if pending else matched
+
+
+def find_matching_profile(profiles, screens) -> str | None:
+    """Return the name of the first profile (alphabetically) using exactly the given screens."""
+    for key in sorted(profiles):
+        if match_profile(profiles[key], screens) is not None:
+            return key
+    return None
+
+
+def _key(kind: str, items: Iterable[str]) -> str:
+    return "\x1f".join([kind, *sorted(items)])
+
+
+def profile_keys(profile) -> set[str]:
+    """Return the index keys of *profile*.
+
+    They are its set of connectors and its set of monitors (named by their
+    identity, or their connector when it's unknown); plus its size, and
+    whether it mixes monitors with and without identity, for the matches
+    not covered by the sets (see :meth:`ProfileIndex.match`); and each of its
+    outputs (see :func:`output_keys`), for the partial matches.
+    """
+    size = str(len(profile))
+    keys = {
+        _key("uids", (entry["uid"] for entry in profile)),
+        _key("monitors", (entry.get("identity") or "uid:" + entry["uid"] for entry in profile)),
+        _key("size", [size]),
+    }
+    if len({entry.get("identity") is None for entry in profile}) == 2:
+        keys.add(_key("mixed", [size]))
+    keys.update(output_keys(profile))
+    return keys
+
+
+def output_keys(profile) -> set[str]:
+    """Return the keys of the outputs of *profile*: its connectors and monitor identities."""
+    keys = {_key("output", [entry["uid"]]) for entry in profile}
+    keys.update(_key("monitor", [entry["identity"]]) for entry in profile if entry.get("identity"))
+    return keys
+
+
+def screens_keys(screens: Iterable[Screen]) -> set[str]:
+    """Return the index keys of the profiles which may match *screens* (see :func:`profile_keys`)."""
+    screens = list(screens)
+    return {
+        _key("uids", (screen.uid for screen in screens)),
+        _key("monitors", (screen.identity or "uid:" + screen.uid for screen in screens)),
+    }
+
+
+class ProfileIndex:
+    """Persistent hash index of the profiles of a :class:`ProfileStore`, by output set.
+
+    Maps the keys of :func:`profile_keys` to the profiles having them, so
+    finding the profiles of the plugged screens takes two lookups however
+    large the library is.  The index is saved with the version (see
+    :attr:`ProfileStore.stamp`) of the profiles it was built from, and
+    rebuilt when they change.
+
+    It also records when each profile was last applied: when several
+    profiles match, the most recently used one wins, then the first in
+    alphabetical order.  Saving merges the times recorded by the other
+    processes (eg. the daemon and ``wlrlui -m``) since the index was read.
+    """
+
+    def __init__(self, store: ProfileStore, path: Path):
+        self.store = store
+        self.path = path
+        self.used: dict[str, float] = {}
+        self._keys: dict[str, list[str]] = {}
+        self._stamp: tuple[int, int, int] | None = None
+        self._read = False
+
+    def _read_file(self) -> tuple[tuple | None, dict[str, list[str]], dict[str, float]] | None:
+        try:
+            with self.path.open() as f:
+                data = json.load(f)
+            stamp = None if data["stamp"] is None else tuple(data["stamp"])
+            keys, used = data["keys"], dict(data["used"])
+        except (OSError, ValueError, KeyError, TypeError):
+            log.debug("Can't read the profile index", exc_info=True)
+            return None
+        return stamp, keys, used
+
+    def _load(self):
+        self._read = True
+        saved = self._read_file()
+        if saved is None:
+            self._stamp, self._keys, self.used = (-1, -1, -1), {}, {}
+        else:
+            self._stamp, self._keys, self.used = saved
+
+    def _save(self):
+        saved = self._read_file()
+        if saved is not None:
+            profiles = self.store.load()
+            for name, used in saved[2].items():
+                if name in profiles and used > self.used.get(name, 0):
+                    self.used[name] = used
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(self.path, json.dumps({"stamp": self._stamp, "keys": self._keys, "used": self.used}))
+        except OSError:
+            log.debug("Can't write the profile index", exc_info=True)
+
+    def refresh(self) -> dict:
+        """Bring the index up to date with the store, returning the profiles."""
+        profiles = self.store.load()
+        if not self._read:
+            self._load()
+        if self.store.stamp != self._stamp:
+            keys: dict[str, list[str]] = {}
+            for name, profile in profiles.items():
+                for key in profile_keys(profile):
+                    keys.setdefault(key, []).append(name)
+            self._keys = keys
+            self.used = {name: used for name, used in self.used.items() if name in profiles}
+            self._stamp = self.store.stamp
+            self._save()
+        return profiles
+
+    def match(self, screens: list[Screen]) -> str | None:
+        """Return the name of the profile using exactly the given screens, if any."""
+        profiles = self.refresh()
+        names = {name for key in screens_keys(screens) for name in self._keys.get(key, ())}
+        found = self._first_match(profiles, names, screens)
+        if found is None:
+            # some monitors matched by identity on other connectors, the others by connector:
+            # only possible if either the profile or the screens mix monitors with and without identity
+            bucket = "size" if len({screen.identity is None for screen in screens}) == 2 else "mixed"
+            found = self._first_match(profiles, self._keys.get(_key(bucket, [str(len(screens))]), []), screens)
+        return found
+
+    def sharing(self, screens: list[Screen]) -> dict[str, int]:
+        """Return the profiles sharing outputs with *screens*, with the number of keys they share.
+
+        A profile can't pair more entries with the screens than that number
+        (see :func:`pair_entries`).
+        """
+        self.refresh()
+        counts: dict[str, int] = {}
+        screen_keys = [_key("output", [screen.uid]) for screen in screens]
+        screen_keys += [_key("monitor", [screen.identity]) for screen in screens if screen.identity]
+        for key in screen_keys:
+            for name in self._keys.get(key, ()):
+                counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def _first_match(self, profiles: dict, names: Iterable[str], screens: list[Screen]) -> str | None:
+        for name in sorted(names, key=lambda name: (-self.used.get(name, 0), name)):
+            if match_profile(profiles[name], screens) is not None:
+                return name
+        return None
+
+    def mark_used(self, name: str):
+        """Record that the profile *name* was just applied."""
+        self.refresh()
+        self.used[name] = time.time()
+        self._save()
+
+
+def index_file(path: Path) -> Path:
+    """Return where the index of the profiles file *path* is kept: in the cache directory, not next to it."""
+    digest = hashlib.sha1(str(path).encode()).hexdigest()[:16]
+    return cache_dir() / f"{path.stem}-{digest}.index.json"
+
+
+@lru_cache(maxsize=None)
+def _index(path: Path) -> ProfileIndex:
+    return ProfileIndex(_store(path), index_file(path))
 
-    profiles.pop(name, None)
 
-    with cfg_file.open("wb") as f:
-        tomli_w.dump(profiles, f)
+def get_index() -> ProfileIndex:
+    """Return the index of the profiles of :data:`cfg_file` (see :func:`get_store`)."""
+    return _index(cfg_file)
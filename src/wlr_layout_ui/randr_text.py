@@ -0,0 +1,258 @@
+"""Streaming parsers for the text output of ``wlr-randr`` and ``xrandr``.
+
+Each tool has its own small state machine driven by precompiled regular
+expressions.  Lines are consumed one at a time, so :func:`run` parses
+straight from the subprocess pipe while the tool is still writing, and the
+:class:`Screen` / :class:`Mode` objects are built in that single pass.
+
+Lines that don't fit the grammar don't stop the parsing: they are collected
+in :attr:`Parser.errors` (and logged at debug level).
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import subprocess
+import threading
+from typing import TYPE_CHECKING
+
+from .types import Mode, Screen
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+log = logging.getLogger(__name__)
+
+TRANSFORMS = {
+    "normal": 0,
+    "90": 1,
+    "180": 2,
+    "270": 3,
+    "flipped": 4,
+    "flipped-90": 5,
+    "flipped-180": 6,
+    "flipped-270": 7,
+}
+
+
+class Parser:
+    """Base class of the parsers: :meth:`feed` lines, then :meth:`close`."""
+
+    HEAD_RE: re.Pattern
+
+    def __init__(self):
+        self.screens: list[Screen] = []
+        #: (line number, line) of the lines which couldn't be parsed
+        self.errors: list[tuple[int, str]] = []
+        self._screen: Screen | None = None
+        self._modes: list[Mode] = []
+        self._state = self._skip
+        self._lineno = 0
+
+    def feed(self, line: str):
+        """Parse one line of output (with or without its line ending)."""
+        self._lineno += 1
+        if line[:1] in (" ", "\t"):
+            self._state(line)
+            return
+        line = line.rstrip()
+        if not line:
+            return
+        self._finish_screen()
+        match = self.HEAD_RE.match(line)
+        if match is None:
+            self._error(line)
+            self._state = self._skip
+        else:
+            self._state = self._head(match)
+
+    def feed_lines(self, lines: Iterable[str]):
+        for line in lines:
+            self.feed(line)
+
+    def close(self) -> list[Screen]:
+        """Finish the parsing and return the screens."""
+        self._finish_screen()
+        if self.errors:
+            log.debug("%s: %d line(s) couldn't be parsed, first one: %r", type(self).__name__, len(self.errors), self.errors[0][1])
+        return self.screens
+
+    def _head(self, match: re.Match):
+        """Handle a head line, return the state for the following lines."""
+        raise NotImplementedError
+
+    def _start_screen(self, screen: Screen):
+        self._screen = screen
+        self._modes = []
+        self.screens.append(screen)
+
+    def _finish_screen(self):
+        if self._screen is not None:
+            self._screen.available = self._modes
+            self._screen = None
+
+    def _error(self, line: str):
+        if not line.isspace():
+            self.errors.append((self._lineno, line.rstrip("\n")))
+
+    def _skip(self, line: str):
+        """State of the lines belonging to nothing we parse."""
+
+
+class WlrRandrParser(Parser):
+    """Parser for ``wlr-randr``.
+
+    Heads are introduced by ``NAME "description"`` and followed by indented
+    ``Key: value`` properties; the modes are listed under ``Modes:``.
+    """
+
+    HEAD_RE = re.compile(r'(?P<uid>\S+)\s+"?(?P<name>[^"]*)"?\s*$')
+    PROPERTY_RE = re.compile(r"  (?P<key>\S[^:]*):\s*(?P<value>.*?)\s*$")
+    MODE_RE = re.compile(r"    \s*(?P<width>\d+)x(?P<height>\d+) px, (?P<freq>\d+(?:\.\d+)?) Hz(?: \((?P<flags>[^)]*)\))?\s*$")
+    POSITION_RE = re.compile(r"(-?\d+),\s*(-?\d+)$")
+
+    def _head(self, match):
+        self._start_screen(Screen(uid=match["uid"], name=match["name"]))
+        return self._property
+
+    def _property(self, line):
+        match = self.PROPERTY_RE.match(line)
+        if match is None:
+            self._error(line)
+            return
+        key, value = match["key"], match["value"]
+        screen = self._screen
+        assert screen
+        if key == "Modes":
+            self._state = self._mode
+        elif key == "Enabled":
+            screen.active = value == "yes"
+        elif key == "Position":
+            position = self.POSITION_RE.match(value)
+            if position is None:
+                self._error(line)
+            else:
+                screen.position = (int(position[1]), int(position[2]))
+        elif key == "Transform":
+            try:
+                screen.transform = TRANSFORMS[value]
+            except KeyError:
+                self._error(line)
+        elif key == "Scale":
+            try:
+                screen.scale = float(value)
+            except ValueError:
+                self._error(line)
+
+    def _mode(self, line):
+        match = self.MODE_RE.match(line)
+        if match is not None:
+            width, height, freq, flags = match.groups()
+            mode = Mode(int(width), int(height), float(freq))
+            self._modes.append(mode)
+            if flags and "current" in flags:
+                self._screen.mode = mode  # type: ignore[union-attr]
+        elif not line.startswith("   "):  # back to the properties
+            self._state = self._property
+            self._property(line)
+        else:
+            self._error(line)
+
+
+class XrandrParser(Parser):
+    """Parser for ``xrandr``.
+
+    Outputs are introduced by ``NAME connected [primary] [WxH+X+Y] ...`` and
+    followed by one line per resolution listing its refresh rates, the
+    current one flagged with ``*``.  Disconnected outputs, interlaced modes
+    and the ``Screen N:`` summary are skipped.
+    """
+
+    HEAD_RE = re.compile(r"(?P<uid>\S+) (?P<name>(?P<status>\S+).*?)\s*$")
+    GEOMETRY_RE = re.compile(r"\s(?P<width>\d+)x(?P<height>\d+)(?P<x>[+-]\d+)(?P<y>[+-]\d+)\s")
+    MODE_RE = re.compile(r"\s+(?P<width>\d+)x(?P<height>\d+)(?P<interlaced>i?)\s+(?P<rates>\d.*?)\s*$")
+    RATE_RE = re.compile(r"(\d+(?:\.\d+)?)(\*?)\s*\+?\s*")
+
+    def _head(self, match):
+        if match["uid"] == "Screen" or match["status"] == "disconnected":
+            return self._skip
+        screen = Screen(uid=match["uid"], name=match["name"])
+        geometry = self.GEOMETRY_RE.search(" " + match["name"].split("(", 1)[0] + " ")
+        if geometry is not None:
+            screen.active = True
+            screen.position = (int(geometry["x"]), int(geometry["y"]))
+        self._start_screen(screen)
+        return self._mode
+
+    def _mode(self, line):
+        match = self.MODE_RE.match(line)
+        if match is None:
+            self._error(line)
+            return
+        width, height, interlaced, rates = match.groups()
+        if interlaced:
+            return
+        width, height = int(width), int(height)
+        end = 0
+        for rate in self.RATE_RE.finditer(rates):
+            if rate.start() != end:
+                break
+            freq, current = rate.groups()
+            mode = Mode(width, height, float(freq))
+            self._modes.append(mode)
+            if current:
+                self._screen.mode = mode  # type: ignore[union-attr]
+            end = rate.end()
+        if end != len(rates):
+            self._error(line)
+
+
+PARSERS: dict[str, type[Parser]] = {"wlr-randr": WlrRandrParser, "xrandr": XrandrParser}
+
+
+def parse(lines: Iterable[str] | str, tool: str) -> Parser:
+    """Parse the output of *tool* (``wlr-randr`` or ``xrandr``).
+
+    Returns:
+        The closed parser, holding :attr:`~Parser.screens` and :attr:`~Parser.errors`.
+    """
+    parser = PARSERS[tool]()
+    parser.feed_lines(lines.splitlines() if isinstance(lines, str) else lines)
+    parser.close()
+    return parser
+
+
+def run(tool: str, timeout: float | None = None, args: list[str] | None = None) -> list[Screen]:
+    """Run *tool* and parse its output while it is produced.
+
+    Args:
+        tool: ``wlr-randr`` or ``xrandr``, selects the grammar.
+        timeout: kill the process if it's still running after that many seconds.
+        args: command line to run instead of just *tool*.
+
+    Raises:
+        OSError: if the tool can't be run.
+        subprocess.TimeoutExpired: if the *timeout* expired.
+    """
+    parser = PARSERS[tool]()
+    cmd = args or [tool]
+    expired = threading.Event()
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True) as proc:
+        assert proc.stdout
+
+        def kill():
+            expired.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, kill) if timeout else None
+        if timer:
+            timer.start()
+        try:
+            parser.feed_lines(proc.stdout)
+        finally:
+            if timer:
+                timer.cancel()
+    if expired.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)  # type: ignore[arg-type]
+    return parser.close()
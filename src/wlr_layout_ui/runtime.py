@@ -0,0 +1,55 @@
+"""Files shared by the processes of the user: runtime and cache directories, atomic writes."""
+
+from __future__ import annotations
+
+import os
+import stat
+import tempfile
+from pathlib import Path
+
+
+def runtime_dir() -> Path:
+    """Return ``$XDG_RUNTIME_DIR``, or a private directory in the temporary one when it is unset.
+
+    Raises:
+        PermissionError: if that directory exists but isn't private to the user.
+    """
+    path = os.environ.get("XDG_RUNTIME_DIR")
+    if path:
+        return Path(path)
+    private = Path(tempfile.gettempdir()) / f"wlr-layout-ui-{os.getuid()}"
+    private.mkdir(mode=0o700, exist_ok=True)
+    st = private.lstat()
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        msg = f"{private} isn't a private directory"
+        raise PermissionError(msg)
+    return private
+
+
+def cache_dir() -> Path:
+    """Return the cache directory of the application, in ``$XDG_CACHE_HOME`` (``~/.cache``).
+
+    It may not exist yet.
+    """
+    base = os.environ.get("XDG_CACHE_HOME")
+    return (Path(base) if base else Path("~/.cache").expanduser()) / "wlr-layout-ui"
+
+
+def write_atomic(path: Path, text: str):
+    """Replace the content of *path*, readers never see a partially written file.
+
+    The data goes to a uniquely named temporary file next to *path* (readable
+    by the user only), renamed over it.
+
+    Raises:
+        OSError: if the file can't be written, it is left untouched then.
+    """
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False) as f:
+        tmp = Path(f.name)
+        try:
+            f.write(text)
+            f.flush()
+            tmp.replace(path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
@@ -1,16 +1,23 @@
-import difflib
-import json
+from __future__ import annotations
+
+import logging
 import os
-import re
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 
+from . import cache, edid, randr_text, sway, x11_randr
+from .hyprland import hyprctl_json
 from .types import Mode, Screen
 from .utils import config
+from .wlr_output import WaylandError, load_screens
+
+__all__ = ["LEGACY", "Mode", "Screen", "load", "probe_timings", "query_screens"]
 
-__all__ = ["LEGACY", "Mode", "Screen", "load"]
+log = logging.getLogger(__name__)
 
 LEGACY = not os.environ.get("WAYLAND_DISPLAY")
-MODE_RE = re.compile(r"^(?P<width>\d+)x(?P<height>\d+)(?P<x>[+-]\d+)(?P<y>[+-]\d+)$")
+PROBE_TIMEOUT = 2.0  # seconds, for each display probe
 
 
 def _parse_hyprland_version(data: dict) -> bool:
@@ -24,6 +31,9 @@ def _parse_hyprland_version(data: dict) -> bool:
 
 displayInfo: list[Screen] = []
 
+# Duration of each probe of the last load(), in seconds
+probe_timings: dict[str, float] = {}
+
 
 def _parseMode(txt):
     res, freq = txt.split("@")
@@ -31,108 +41,235 @@ def _parseMode(txt):
     return (int(x), int(y), float(freq[:-2]))
 
 
-def load_from_hyprctl():
-    monitors = json.loads(subprocess.getoutput("hyprctl -j monitors all"))
+def _current_mode(monitor, screen: Screen) -> Mode:
+    res = (monitor["width"], monitor["height"])
+    mode = screen.match_mode(res, monitor["refreshRate"])
+    if mode is None:  # custom mode
+        log.debug("No listed mode matching %s for %s", monitor["refreshRate"], screen.uid)
+        mode = Mode(*res, round(monitor["refreshRate"], 2))
+    return mode
+
+
+def _update_from_monitor(screen: Screen, monitor):
+    """Refresh the live state of *screen* from a ``hyprctl -j monitors`` entry."""
+    screen.active = bool(monitor["activeWorkspace"]["name"]) and not monitor.get("disabled", False)
+    screen.scale = monitor["scale"]
+    screen.position = (monitor["x"], monitor["y"])
+    screen.mode = _current_mode(monitor, screen)
+    screen.transform = monitor["transform"]
+
+
+def _screens_from_monitors(monitors) -> list[Screen]:
+    screens = []
     for monitor in monitors:
-        modes = [Mode(*_parseMode(m)) for m in monitor["availableModes"]]
-        cur_mode = f"{monitor['width']}x{monitor['height']}@{monitor['refreshRate']:.2f}Hz"
-        modes_str = [repr(m) for m in modes]
-        try:
-            idx = modes_str.index(cur_mode)
-        except (IndexError, ValueError):
-            idx = modes_str.index(difflib.get_close_matches(cur_mode, modes_str)[0])
         current_screen = Screen(
             uid=monitor["name"],
             name=monitor["description"],
-            active=bool(monitor["activeWorkspace"]["name"]),  # NOTE: move to "disabled" later
-            scale=monitor["scale"],
-            position=(monitor["x"], monitor["y"]),
-            available=modes,
-            mode=modes[idx],
-            transform=monitor["transform"],
+            available=[Mode(*_parseMode(m)) for m in monitor["availableModes"]],
         )
-        displayInfo.append(current_screen)
+        _update_from_monitor(current_screen, monitor)
+        screens.append(current_screen)
+    return screens
+
+
+def load_from_hyprctl(monitors=None):
+    if monitors is None:
+        monitors = hyprctl_json("monitors all")
+    displayInfo.extend(_screens_from_monitors(monitors))
+
+
+def _timed(name, func):
+    def wrapper():
+        start = time.perf_counter()
+        try:
+            return func()
+        finally:
+            probe_timings[name] = time.perf_counter() - start
+
+    return wrapper
+
+
+def run_probes(probes, timeout=PROBE_TIMEOUT):
+    """Run independent display probes concurrently.
+
+    Args:
+        probes: dict of probe name -> callable taking no argument.
+        timeout: deadline for all the probes, in seconds.
+
+    Returns:
+        dict of probe name -> result, None if the probe failed or missed the deadline.
+    """
+    pool = ThreadPoolExecutor(max_workers=len(probes), thread_name_prefix="probe")
+    futures = {name: pool.submit(_timed(name, func)) for name, func in probes.items()}
+    done, _ = wait(futures.values(), timeout=timeout)
+    pool.shutdown(wait=False)
+    results: dict[str, object] = {}
+    for name, future in futures.items():
+        if future not in done:
+            log.warning("Display probe %r timed out after %.1fs", name, timeout)
+            results[name] = None
+        elif future.exception() is not None:
+            log.debug("Display probe %r failed: %s", name, future.exception())
+            results[name] = None
+        else:
+            results[name] = future.result()
+    return results
+
+
+def _probe_hyprland_version():
+    return _parse_hyprland_version(hyprctl_json("version", timeout=PROBE_TIMEOUT))
+
+
+def _probe_hyprland_monitors():
+    return hyprctl_json("monitors all", timeout=PROBE_TIMEOUT)
+
 
+def _probe_text(tool):
+    return randr_text.run(tool, timeout=PROBE_TIMEOUT)
 
-def load():
+
+def load(cached=False) -> str | None:
+    """Probe the displays and fill :data:`displayInfo`.
+
+    Args:
+        cached: reuse the mode tables and identities saved by a previous
+            run if the same outputs are connected (see :mod:`.cache`).  The
+            live state (position, mode...) is always queried: it comes with
+            the Hyprland fingerprint, and from :func:`query_screens` with the
+            other compositors.
+
+    Returns:
+        The fingerprint of the connected outputs, None if it can't be computed.
+    """
     if displayInfo:
         displayInfo.clear()
+    probe_timings.clear()
+    start = time.perf_counter()
+    try:
+        if cached:
+            fingerprint, monitors = _timed("fingerprint", cache.current_fingerprint)()
+            snapshot = cache.read(fingerprint)
+            if snapshot is not None:
+                screens, backend_config = snapshot
+                config.update(backend_config)
+                if _refresh_live_state(screens, monitors):
+                    displayInfo.extend(screens)
+                    return fingerprint
+        monitors = _load()
+        _attach_identities(displayInfo)
+        fingerprint = cache.fingerprint_from_monitors(monitors) if monitors else cache.drm_fingerprint()
+        cache.write(fingerprint, displayInfo, {key: config.get(key, False) for key in ("hyprland", "sway")})
+        return fingerprint
+    finally:
+        probe_timings["total"] = time.perf_counter() - start
+
 
+def _refresh_live_state(screens: list[Screen], monitors) -> bool:
+    """Update the cached *screens* with the live state, False if it can't be queried."""
+    if monitors:
+        by_uid = {m["name"]: m for m in monitors}
+        for screen in screens:
+            _update_from_monitor(screen, by_uid[screen.uid])
+        return True
     try:
-        data = json.loads(subprocess.getoutput("hyprctl -j version"))
-        new_hyprland = _parse_hyprland_version(data)
-    except (KeyError, json.JSONDecodeError, ValueError):
-        new_hyprland = not LEGACY
+        live = {screen.uid: screen for screen in _timed("live state", query_screens)()}
+    except (OSError, ValueError, subprocess.SubprocessError):
+        log.debug("Can't query the live state of the outputs", exc_info=True)
+        return False
+    if live.keys() != {screen.uid for screen in screens}:
+        return False
+    for screen in screens:
+        current = live[screen.uid]
+        screen.active = current.active
+        screen.position = current.position
+        screen.mode = current.mode
+        screen.scale = current.scale
+        screen.transform = current.transform
+    return True
 
-    if new_hyprland:
-        config["hyprland"] = True
-        load_from_hyprctl()
-        return
-
-    out = subprocess.getoutput("xrandr" if LEGACY else "wlr-randr")
-    current_screen: Screen | None = None
-    mode_mode = False
-    for line in out.splitlines():
-        if LEGACY and ("disconnected" in line or line.startswith("Screen")):
-            continue
-        if line[0] != " ":
-            uid, name = line.split(None, 1)
-            current_screen = Screen(uid=uid, name=name.strip('"'))
-            try:
-                chim = name.split("(", 1)[0].strip().rsplit(None, 1)[1]
-            except IndexError:
-                current_screen.active = False
-            else:
-                mode_re = MODE_RE.match(chim)
-                if mode_re:
-                    current_screen.position = (
-                        int(mode_re.group("x")),
-                        int(mode_re.group("y")),
-                    )
-
-            displayInfo.append(current_screen)
-            mode_mode = False
-        else:
-            if line[2] != " ":
-                mode_mode = False
-            assert current_screen
-            sline = line.strip()
-            if LEGACY:
-                res, freq = sline.split(None, 1)
-                if not res.endswith("i"):
-                    w, h = (int(x) for x in res.split("x"))
-                    current = "*" in freq
-                    freq = freq.split(None, 1)[0].rstrip("*+")
-                    current_screen.available.append(Mode(w, h, float(freq)))
-                    if current:
-                        current_screen.mode = current_screen.available[-1]
-            else:
-                if mode_mode:
-                    try:
-                        res, freq = sline.split(",", 1)
-                    except ValueError:
-                        print(f"Unable to parse: {sline}")
-                    else:
-                        res = res.split(None, 1)[0]
-                        w, h = (int(x) for x in res.split("x"))
-                        freq, comment = freq.strip().split(None, 1)
-                        current_screen.available.append(Mode(w, h, float(freq)))
-                        if "current" in comment:
-                            current_screen.mode = current_screen.available[-1]
-
-                elif sline.startswith("Modes:"):
-                    mode_mode = True
-                elif sline.startswith("Enabled"):
-                    current_screen.active = "yes" in sline
-                elif sline.startswith("Position"):
-                    pos_parts = [int(x) for x in sline.split(":")[1].strip().split(",")]
-                    current_screen.position = (pos_parts[0], pos_parts[1])
+
+def query_screens(monitors=None) -> list[Screen]:
+    """Query the current state of the screens, leaving :data:`displayInfo` alone.
+
+    Uses the backend found by the last :func:`load`.
+
+    Args:
+        monitors: a ``hyprctl -j monitors all`` reply to use instead of querying Hyprland.
+
+    Raises:
+        OSError, ValueError: if the backend can't be queried.
+    """
+    if config.get("hyprland"):
+        if monitors is None:
+            monitors = hyprctl_json("monitors all", timeout=PROBE_TIMEOUT)
+        return _screens_from_monitors(monitors)
+    if config.get("sway"):
+        return sway.load_screens()
     try:
-        monitors = json.loads(subprocess.getoutput("hyprctl -j monitors all"))
-    except json.decoder.JSONDecodeError:
-        pass
+        return x11_randr.load_screens() if LEGACY else load_screens()
+    except (x11_randr.XRandRError, WaylandError):
+        return _probe_text("xrandr" if LEGACY else "wlr-randr")
+
+
+def _attach_identities(screens):
+    """Set the EDID based identity of the screens, read from sysfs."""
+    identities = _timed("edid", edid.read_identities)()
+    for screen in screens:
+        screen.identity = identities.get(screen.uid, screen.identity)
+
+
+def _retry_hyprland_monitors(deadline: float):
+    """Query the Hyprland monitors until the *deadline*, None if Hyprland doesn't answer."""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return None
+    try:
+        return hyprctl_json("monitors all", timeout=remaining)
+    except (OSError, ValueError, subprocess.SubprocessError):
+        log.debug("Can't query the Hyprland monitors", exc_info=True)
+        return None
+
+
+def _load():
+    """Run the probes, returning the Hyprland monitors if any (used as fingerprint)."""
+    deadline = time.monotonic() + PROBE_TIMEOUT
+    probes = {}
+    if os.environ.get("HYPRLAND_INSTANCE_SIGNATURE"):
+        probes.update({"hyprctl version": _probe_hyprland_version, "hyprctl monitors": _probe_hyprland_monitors})
+    if os.environ.get("SWAYSOCK"):
+        probes["sway outputs"] = sway.load_screens
+    results = run_probes(probes, PROBE_TIMEOUT) if probes else {}
+    new_hyprland = results.get("hyprctl version")
+    if new_hyprland is None:
+        new_hyprland = "hyprctl version" in results and not LEGACY
+    monitors = results.get("hyprctl monitors")
+    if new_hyprland and monitors is None:
+        monitors = _retry_hyprland_monitors(deadline)
+
+    if new_hyprland and monitors is not None:
+        config["hyprland"] = True
+        load_from_hyprctl(monitors)
+        return monitors
+
+    screens = results.get("sway outputs")
+    if screens is not None:
+        config["sway"] = True
+        displayInfo.extend(screens)
+        return None
+
+    if LEGACY:
+        screens = run_probes({"libXrandr": x11_randr.load_screens})["libXrandr"]
     else:
-        monitors = {o["name"]: o for o in monitors}
+        screens = run_probes({"wlr-output-management": load_screens})["wlr-output-management"]
+    if screens is None:
+        tool = "xrandr" if LEGACY else "wlr-randr"
+        screens = run_probes({tool: lambda: _probe_text(tool)})[tool] or []
+    displayInfo.extend(screens)
+
+    if monitors:
+        by_uid = {o["name"]: o for o in monitors}
         for info in displayInfo:
-            info.active = monitors[info.uid]["activeWorkspace"]["id"] >= 0
-            info.scale = monitors[info.uid]["scale"]
+            if info.uid in by_uid:
+                info.active = by_uid[info.uid]["activeWorkspace"]["id"] >= 0
+                info.scale = by_uid[info.uid]["scale"]
+    return monitors
@@ -1,5 +1,7 @@
 import os
 
+from . import cache
+
 PROG_NAME = "WLR Layout"
 WINDOW_MARGIN = 10
 UI_RATIO = 8
@@ -8,5 +10,6 @@ ALLOW_DESELECT = True
 
 
 def reload_pre_commands():
+    cache.invalidate()
     os.system("hyprctl reload")
     os.system("pypr relayout")
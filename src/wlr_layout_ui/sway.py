@@ -0,0 +1,212 @@
+"""Client for the sway IPC socket (the i3-ipc binary protocol).
+
+Messages are framed as ``"i3-ipc" <payload length> <message type> <payload>``
+(native byte order) on the Unix socket pointed to by ``$SWAYSOCK``.  Unlike
+Hyprland, sway serves any number of requests on a connection, so the client
+keeps a single connection open for the whole process.
+
+Only the two messages needed by the application are used: ``GET_OUTPUTS`` to
+list the outputs and their modes, and ``RUN_COMMAND`` to apply a layout, with
+all the ``output ...`` commands batched in one message.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shlex
+import socket
+import struct
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .randr_text import TRANSFORMS
+from .types import Mode, Screen
+
+if TYPE_CHECKING:
+    from .plan import OutputState
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"i3-ipc"
+HEADER = struct.Struct("=6sII")
+
+# Message types
+RUN_COMMAND = 0
+GET_OUTPUTS = 3
+GET_VERSION = 7
+
+TRANSFORM_NAMES = {value: name for name, value in TRANSFORMS.items()}
+
+
+class SwayError(OSError):
+    """Raised when the sway socket cannot be reached or misbehaves."""
+
+
+def socket_path() -> Path | None:
+    """Return the IPC socket of the current sway instance, if any."""
+    path = os.environ.get("SWAYSOCK")
+    if path and Path(path).exists():
+        return Path(path)
+    return None
+
+
+class SwayIPC:
+    """Request/response client keeping one connection to the sway socket."""
+
+    def __init__(self, path: str | Path, timeout: float = 2.0):
+        self.path = str(path)
+        self.timeout = timeout
+        self._sock: socket.socket | None = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<SwayIPC {self.path}>"
+
+    def _connect(self) -> socket.socket:
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self._sock = sock
+        return self._sock
+
+    def _recv_exactly(self, sock: socket.socket, size: int) -> bytes:
+        data = b""
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                msg = "sway closed the connection"
+                raise ConnectionResetError(msg)
+            data += chunk
+        return data
+
+    def _exchange(self, message_type: int, payload: bytes):
+        sock = self._connect()
+        sock.sendall(HEADER.pack(MAGIC, len(payload), message_type) + payload)
+        magic, size, reply_type = HEADER.unpack(self._recv_exactly(sock, HEADER.size))
+        if magic != MAGIC or reply_type != message_type:
+            msg = f"Unexpected reply header from sway: {magic!r} type {reply_type}"
+            raise SwayError(msg)
+        return json.loads(self._recv_exactly(sock, size))
+
+    def message(self, message_type: int, payload: str = ""):
+        """Send a message and return its decoded JSON reply.
+
+        A stale connection (eg. after sway was reloaded) is reopened once.
+        """
+        data = payload.encode()
+        with self._lock:
+            try:
+                return self._exchange(message_type, data)
+            except (BrokenPipeError, ConnectionResetError):
+                self.close()
+            except (OSError, ValueError) as e:
+                self.close()
+                msg = f"sway IPC message {message_type} failed: {e}"
+                raise SwayError(msg) from e
+            try:
+                return self._exchange(message_type, data)
+            except (OSError, ValueError) as e:
+                self.close()
+                msg = f"sway IPC message {message_type} failed: {e}"
+                raise SwayError(msg) from e
+
+    def get_outputs(self) -> list[dict]:
+        return self.message(GET_OUTPUTS)
+
+    def run_command(self, commands: list[str]) -> list[dict]:
+        """Run several commands in one message, returning one result per command."""
+        return self.message(RUN_COMMAND, "; ".join(commands))
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+@lru_cache(maxsize=1)
+def get_client() -> SwayIPC | None:
+    """Return the process-wide IPC client, or None when not running sway."""
+    path = socket_path()
+    return None if path is None else SwayIPC(path)
+
+
+def output_to_screen(output: dict) -> Screen:
+    """Convert a ``GET_OUTPUTS`` entry to a :class:`Screen`."""
+    available = [Mode(m["width"], m["height"], m["refresh"] / 1000) for m in output.get("modes", [])]
+    current = output.get("current_mode")
+    mode = None
+    if output.get("active") and current:
+        mode = Mode(current["width"], current["height"], current["refresh"] / 1000)
+    name = " ".join(output.get(key) or "" for key in ("make", "model", "serial")).strip()
+    rect = output.get("rect") or {}
+    scale = output.get("scale") or 1.0  # null or -1 for the disabled outputs
+    return Screen(
+        uid=output["name"],
+        name=name or output["name"],
+        active=bool(output.get("active")),
+        position=(rect.get("x", 0), rect.get("y", 0)),
+        mode=mode,
+        scale=float(scale) if scale > 0 else 1.0,
+        available=available,
+        transform=TRANSFORMS.get(output.get("transform", "normal"), 0),
+    )
+
+
+def load_screens() -> list[Screen]:
+    """List the outputs of the running sway.
+
+    Raises:
+        SwayError: if sway isn't running or can't be queried.
+    """
+    client = get_client()
+    if client is None:
+        msg = "Not running sway"
+        raise SwayError(msg)
+    return [output_to_screen(output) for output in client.get_outputs()]
+
+
+def output_command(uid: str, state: OutputState) -> str:
+    """Return the ``output`` command giving output *uid* the given state."""
+    if not state.active:
+        return f"output {uid} disable"
+    assert state.mode
+    mode = state.mode
+    x, y = state.position
+    return (
+        f"output {uid} enable mode {mode.width}x{mode.height}@{mode.freq:.3f}Hz pos {x} {y}"
+        f" scale {state.scale:g} transform {TRANSFORM_NAMES.get(state.transform, 'normal')}"
+    )
+
+
+def run_swaymsg_command(cmd: str) -> bool | None:
+    """Execute a ``swaymsg`` shell command (as built by ``make_command``) over IPC.
+
+    Returns:
+        Whether all the commands succeeded, or None if *cmd* can't be sent
+        over IPC, in which case the caller should run it through the shell.
+    """
+    client = get_client()
+    if client is None or not cmd.startswith("swaymsg "):
+        return None
+    try:
+        payload = " ".join(shlex.split(cmd)[1:])
+    except ValueError:
+        return None
+    try:
+        results = client.message(RUN_COMMAND, payload)
+    except SwayError:
+        log.debug("IPC failed, falling back to swaymsg", exc_info=True)
+        return None
+    for result in results:
+        if not result.get("success"):
+            log.warning("sway command failed: %s", result.get("error"))
+    return all(result.get("success") for result in results)
@@ -0,0 +1,111 @@
+"""Transactional layout changes: apply, verify, and roll back on mismatch.
+
+:func:`apply_layout` sends the changes between the state captured before (see
+:func:`.plan.snapshot`) and the target one, then queries the outputs again
+until they match the target, for at most :data:`VERIFY_TIMEOUT` seconds.  If
+the compositor refused or altered the layout, the changes back to the state
+captured before are applied right away, so a bad layout is reverted within
+milliseconds instead of after the GUI confirmation delay.
+"""
+
+from __future__ import annotations
+
+import logging
+import subprocess
+import time
+from dataclasses import dataclass, field
+
+from .apply import run_commands
+from .plan import OutputState, diff_states, mismatches, same_layout, snapshot
+from .screens import query_screens
+from .utils import commands_for, config
+
+log = logging.getLogger(__name__)
+
+VERIFY_TIMEOUT = 1.0  # seconds for the compositor to reach the target state
+VERIFY_INTERVAL = 0.05
+
+
+@dataclass
+class ApplyResult:
+    """Outcome of :func:`apply_layout`."""
+
+    #: the commands sent to apply the layout, empty if it was already in place
+    commands: list[str]
+    #: whether the layout is in place
+    ok: bool
+    #: outputs which didn't reach their target state
+    mismatches: list[str] = field(default_factory=list)
+    #: the commands sent to restore the previous state, if it was restored
+    rollback: list[str] | None = None
+
+
+def current_state() -> dict[str, OutputState] | None:
+    """Query the live state of the outputs, None if it can't be."""
+    try:
+        return snapshot(query_screens())
+    except (OSError, ValueError, subprocess.SubprocessError):
+        log.debug("Can't query the outputs", exc_info=True)
+        return None
+
+
+def verify(target: dict[str, OutputState], *, strict: bool = True, timeout: float = VERIFY_TIMEOUT) -> list[str] | None:
+    """Wait until the outputs reach the *target* state.
+
+    Returns:
+        The outputs which still don't match after *timeout* seconds, or None
+        if the state couldn't be queried.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        actual = current_state()
+        if actual is None:
+            return None
+        wrong = mismatches(target, actual, strict=strict)
+        if not wrong or time.monotonic() >= deadline:
+            return wrong
+        time.sleep(VERIFY_INTERVAL)
+
+
+def revert_layout(before: dict[str, OutputState], *, wayland: bool = True) -> list[str]:
+    """Bring the outputs back to the *before* state. Returns the commands sent."""
+    cmds = commands_for(diff_states(before, current_state()), wayland=wayland)
+    if cmds and not run_commands(cmds):
+        log.warning("Failed restoring the previous layout")
+    return cmds
+
+
+def apply_layout(
+    target: dict[str, OutputState], before: dict[str, OutputState] | None, *, wayland: bool = True, timeout: float = VERIFY_TIMEOUT
+) -> ApplyResult:
+    """Apply the *target* state and check the compositor followed.
+
+    Nothing is sent when the outputs already have the *target* layout, even
+    at another origin (see :func:`.plan.same_layout`).
+
+    Args:
+        target: the wanted state of the outputs.
+        before: the state before the change, only the differences are sent;
+            None to send the full configuration (no rollback is possible then).
+        wayland: False for X11.
+        timeout: how long to wait for the outputs to reach the target state.
+    """
+    if before is not None and same_layout(target, before):
+        return ApplyResult([], ok=True)
+    changes = diff_states(target, before)
+    cmds = commands_for(changes, wayland=wayland)
+    if not cmds:
+        return ApplyResult(cmds, ok=True)
+    ok = run_commands(cmds)
+    # the wlr-randr / xrandr commands don't set the refresh rate, scale and transform
+    strict = wayland and bool(config.get("hyprland") or config.get("sway"))
+    wrong = verify({change.uid: change.state for change in changes}, strict=strict, timeout=timeout if ok else 0)
+    if wrong is None:
+        log.debug("Can't verify the layout")
+        wrong = [] if ok else [change.uid for change in changes]
+    if not wrong:
+        return ApplyResult(cmds, ok=True)
+    log.warning("Outputs not in the requested state: %s", ", ".join(wrong))
+    if before is None:
+        return ApplyResult(cmds, ok=False, mismatches=wrong)
+    return ApplyResult(cmds, ok=False, mismatches=wrong, rollback=revert_layout(before, wayland=wayland))
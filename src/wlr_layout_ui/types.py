@@ -1,21 +1,115 @@
+from bisect import bisect_left
+from collections.abc import Sequence
 from dataclasses import dataclass, field
-from typing import Tuple
+from operator import attrgetter
+from typing import ClassVar, Tuple
 
 # Re-export Rect and collidepoint from pyggets for backward compatibility
-from pyggets import Rect, collidepoint  # ruff: ignore[unused-import]
+from pyggets.geometry import Rect, collidepoint  # ruff: ignore[unused-import]
 
 
-@dataclass
 class Mode:
+    """A display mode: resolution and refresh rate.
+
+    Modes are immutable and interned: building the same mode twice returns the
+    same object, so identical monitors share their mode lists.  Equality and
+    hashing rely on it, they compare the identity: never create a mode
+    without calling ``Mode(...)`` (pickling and copying go through it).
+    """
+
+    __slots__ = ("freq", "height", "width")
+
+    _interned: ClassVar[dict[tuple[int, int, float], "Mode"]] = {}
+
     width: int
     height: int
     freq: float
 
+    def __new__(cls, width: int, height: int, freq: float):
+        mode = cls._interned.get((width, height, freq))  # 60 and 60.0 hash the same
+        if mode is not None:
+            return mode
+        mode = super().__new__(cls)
+        key = (int(width), int(height), float(freq))
+        object.__setattr__(mode, "width", key[0])
+        object.__setattr__(mode, "height", key[1])
+        object.__setattr__(mode, "freq", key[2])
+        return cls._interned.setdefault(key, mode)
+
+    def __setattr__(self, name, value):
+        msg = "Mode objects are immutable"
+        raise AttributeError(msg)
+
+    def __delattr__(self, name):
+        msg = "Mode objects are immutable"
+        raise AttributeError(msg)
+
+    def __reduce__(self):
+        return (Mode, (self.width, self.height, self.freq))
+
+    # equality and hashing are the identity ones, since equal modes are the same object (see __new__)
+
     def __repr__(self):
         return f"{self.width}x{self.height}@{self.freq:.2f}Hz"
 
 
-@dataclass
+_interned_mode_lists: dict[tuple[Mode, ...], tuple[Mode, ...]] = {}
+
+
+def intern_modes(modes) -> tuple[Mode, ...]:
+    """Return a shared tuple with the given modes."""
+    modes = tuple(modes)
+    return _interned_mode_lists.setdefault(modes, modes)
+
+
+FREQ_TOLERANCE = 1.0  # Hz, eg. 59.997 reported for a "60.00Hz" mode
+
+
+class ModeIndex:
+    """Lookup tables over a list of modes.
+
+    Maps every resolution to its refresh rates, giving O(1) exact lookups and
+    a bisect-based nearest frequency fallback.
+    """
+
+    def __init__(self, modes):
+        self._exact: dict[tuple[int, int, float], Mode] = {}
+        by_res: dict[tuple[int, int], list[Mode]] = {}
+        for mode in modes:
+            key = (mode.width, mode.height, mode.freq)
+            if key not in self._exact:
+                self._exact[key] = mode
+                by_res.setdefault(key[:2], []).append(mode)
+        #: resolutions, biggest first
+        self.resolutions: list[tuple[int, int]] = sorted(by_res, reverse=True)
+        # per resolution: the modes and their frequencies, ascending
+        self._modes = {res: sorted(group, key=attrgetter("freq")) for res, group in by_res.items()}
+        self._freqs = {res: [m.freq for m in group] for res, group in self._modes.items()}
+
+    def frequencies(self, res) -> list[float]:
+        """Return the refresh rates available for the resolution, highest first."""
+        return self._freqs.get(tuple(res), [])[::-1]
+
+    def find(self, res, freq, tolerance: float | None = None) -> Mode | None:
+        """Return the mode matching exactly, or the closest frequency for the same resolution.
+
+        With a *tolerance* (in Hz), frequencies further away than that don't match.
+        """
+        mode = self._exact.get((res[0], res[1], freq))
+        if mode is not None:
+            return mode
+        freqs = self._freqs.get((res[0], res[1]))
+        if not freqs:
+            return None
+        i = bisect_left(freqs, freq)
+        if i == len(freqs) or (i > 0 and freq - freqs[i - 1] <= freqs[i] - freq):
+            i -= 1
+        if tolerance is not None and abs(freqs[i] - freq) > tolerance:
+            return None
+        return self._modes[res[0], res[1]][i]
+
+
+@dataclass(slots=True)
 class Screen:
     uid: str
     name: str
@@ -23,8 +117,31 @@ class Screen:
     position: Tuple[int, int] = (0, 0)
     mode: Mode | None = None
     scale: float = 1
-    available: list[Mode] = field(default_factory=list)
+    available: Sequence[Mode] = ()  # any sequence, always stored as a shared tuple (see intern_modes())
     transform: int = 0
+    identity: str | None = None  # of the monitor, from its EDID (see edid.py)
+    _mode_index: tuple = field(default=(None, None), init=False, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        if name == "available":
+            value = intern_modes(value)
+        object.__setattr__(self, name, value)
 
     def __repr__(self):
         return "<Screen{} {} [{}]>".format("*" if self.active else "", self.name, self.mode)
+
+    def match_mode(self, res, freq, tolerance: float = FREQ_TOLERANCE) -> Mode | None:
+        """Return the available mode for the resolution with the nearest refresh rate.
+
+        This is the matching used everywhere a mode is described by numbers
+        (compositor state, profiles): same resolution, closest frequency
+        within *tolerance* Hz.
+        """
+        return self.mode_index.find(res, freq, tolerance)
+
+    @property
+    def mode_index(self) -> ModeIndex:
+        """Lookup tables for :attr:`available`, rebuilt only when it changes."""
+        if self._mode_index[0] is not self.available:
+            self._mode_index = (self.available, ModeIndex(self.available))
+        return self._mode_index[1]
@@ -1,11 +1,13 @@
-import json
 import re
-import subprocess
+import shlex
 from functools import lru_cache
 
-from .types import Rect, Screen
+from .hyprland import hyprctl_json
+from .plan import DISABLE, ENABLE, MOVE, Change, OutputState, plan_layout
+from .sway import output_command
+from .types import Mode, ModeIndex, Rect, Screen, intern_modes
 
-config = {"hyprland": False}
+config = {"hyprland": False, "sway": False}
 
 hex_re = re.compile(r"^[0-9x]+$")
 
@@ -14,7 +16,7 @@ hex_re = re.compile(r"^[0-9x]+$")
 def _using_lua_syntax() -> bool:
     """Check if Hyprland version supports Lua monitor syntax (>= 0.55.0)."""
     try:
-        data = json.loads(subprocess.getoutput("hyprctl -j version"))
+        data = hyprctl_json("version")
         match = re.search(r"v?(\d+)\.(\d+)", data.get("version", ""))
         if match:
             major, minor = int(match.group(1)), int(match.group(2))
@@ -46,83 +48,139 @@ def simplify_model_name(name):
     return " ".join(words)
 
 
-def make_command(screens: list[Screen], rects: list[Rect], wayland=True) -> list[str]:
-    return make_command_hyprland(screens, rects) if wayland and config.get("hyprland") else make_command_legacy(screens, rects, wayland)
+def make_command(screens: list[Screen], rects: list[Rect], wayland=True, live: dict[str, OutputState] | None = None) -> list[str]:
+    """Return the commands giving *screens* the layout of *rects*.
 
+    When the *live* state is given (see :func:`.plan.snapshot`), only the
+    outputs which need a change are reconfigured, and nothing is returned
+    if there is none.
+    """
+    return commands_for(make_plan(screens, rects, live), wayland)
 
-def _make_command_hyprland_lua(screens: list[Screen], rects: list[Rect]) -> list[str]:
-    screens_rect = rects.copy()
+
+def commands_for(changes: list[Change], wayland=True) -> list[str]:
+    """Return the commands applying *changes* with the current backend."""
+    if wayland and config.get("hyprland"):
+        return _hyprland_lua_commands(changes) if _using_lua_syntax() else _hyprland_old_commands(changes)
+    if wayland and config.get("sway"):
+        return _sway_commands(changes)
+    return _legacy_commands(changes, wayland=wayland)
+
+
+def layout_positions(rects: list[Rect]) -> list[tuple[int, int]]:
+    """Return the compositor positions of the GUI *rects* (origin at the top left of the layout)."""
+    screens_rect = [rect.copy() if rect else None for rect in rects]
     trim_rects_flip_y(screens_rect)
+    return [(int(rect.x), int(rect.y)) if rect else (0, 0) for rect in screens_rect]
+
+
+def make_plan(screens: list[Screen], rects: list[Rect], live: dict[str, OutputState] | None = None) -> list[Change]:
+    """Return the changes giving *screens* the layout of *rects* (see :func:`.plan.plan_layout`)."""
+    return plan_layout(screens, layout_positions(rects), live)
+
+
+def _hyprland_lua_commands(changes: list[Change]) -> list[str]:
     commands = []
 
     on_off_commands = []
 
-    for screen, rect in zip(screens, screens_rect):
-        if not screen.active:
-            on_off_commands.append(f'hl.monitor({{output="{screen.uid}", disabled=true}})')
+    for change in changes:
+        state = change.state
+        if change.kind in (ENABLE, DISABLE):
+            on_off_commands.append(f'hl.monitor({{output="{change.uid}", disabled={"false" if state.active else "true"}}})')
+        if not state.active:
             continue
-        else:
-            on_off_commands.append(f'hl.monitor({{output="{screen.uid}", disabled=false}})')
-        parts = [f'output="{screen.uid}"']
-        parts.append(f'mode="{screen.mode}"')
-        pos = f"{int(rect.x)}x{int(rect.y)}"
+        parts = [f'output="{change.uid}"']
+        parts.append(f'mode="{state.mode}"')
+        pos = f"{state.position[0]}x{state.position[1]}"
         parts.append(f'position="{pos}"')
-        parts.append(f"scale={screen.scale:g}")
-        parts.append(f"transform={screen.transform}")
+        parts.append(f"scale={state.scale:g}")
+        parts.append(f"transform={state.transform}")
         commands.append("hl.monitor({" + ", ".join(parts) + "})")
 
-    return ["hyprctl eval '" + " ; ".join(on_off_commands) + "'", "sleep 2", "hyprctl eval '" + " ; ".join(commands) + "'"]
+    cmds = []
+    if on_off_commands:
+        cmds.append("hyprctl eval '" + " ; ".join(on_off_commands) + "'")
+        if commands:
+            cmds.append("sleep 2")  # the outputs need to settle, see apply.run_commands
+    if commands:
+        cmds.append("hyprctl eval '" + " ; ".join(commands) + "'")
+    return cmds
 
 
-def _make_command_hyprland_old(screens: list[Screen], rects: list[Rect]) -> list[str]:
-    screens_rect = rects.copy()
-    trim_rects_flip_y(screens_rect)
+def _hyprland_old_commands(changes: list[Change]) -> list[str]:
     keywords = []
 
-    for screen, rect in zip(screens, screens_rect):
-        if not screen.active:
-            keywords.append(f"keyword monitor {screen.uid},disable")
+    for change in changes:
+        state = change.state
+        if not state.active:
+            keywords.append(f"keyword monitor {change.uid},disable")
             continue
-        keywords.append(
-            f"keyword monitor {screen.uid},{screen.mode},{int(rect.x)}x{int(rect.y)},{screen.scale:.6f},transform,{screen.transform}"
-        )
+        x, y = state.position
+        keywords.append(f"keyword monitor {change.uid},{state.mode},{x}x{y},{state.scale:.6f},transform,{state.transform}")
 
-    return ['hyprctl --batch "' + " ; ".join(keywords) + '"']
+    return ['hyprctl --batch "' + " ; ".join(keywords) + '"'] if keywords else []
 
 
-def make_command_hyprland(screens: list[Screen], rects: list[Rect]) -> list[str]:
-    if _using_lua_syntax():
-        return _make_command_hyprland_lua(screens, rects)
-    return _make_command_hyprland_old(screens, rects)
+def _sway_commands(changes: list[Change]) -> list[str]:
+    commands = [output_command(change.uid, change.state) for change in changes]
+    return ["swaymsg " + shlex.quote("; ".join(commands))] if commands else []
 
 
-def make_command_legacy(screens: list[Screen], rects: list[Rect], wayland=False) -> list[str]:
-    screens_rect = rects.copy()
-    trim_rects_flip_y(screens_rect)
+def _legacy_commands(changes: list[Change], *, wayland: bool) -> list[str]:
     command = ["wlr-randr" if wayland else "xrandr"]
+    sep = "," if wayland else "x"
+
+    for change in changes:
+        state = change.state
+        x, y = state.position
+        if not state.active:
+            command.append(f"--output {change.uid} --off")
+        elif change.kind == MOVE:
+            command.append(f"--output {change.uid} --pos {x}{sep}{y}")
+        else:
+            assert state.mode
+            mode = f"{int(state.mode.width)}x{int(state.mode.height)}"
+            command.append(f"--output {change.uid} --on --pos {x}{sep}{y} --mode {mode}")
+
+    return [" ".join(command)] if len(command) > 1 else []
 
-    for screen, rect in zip(screens, screens_rect):
-        if not screen.active:
-            command.append(f"--output {screen.uid} --off")
-            continue
-        assert screen.mode
-        sep = "," if wayland else "x"
-        mode = f"{int(screen.mode.width)}x{int(screen.mode.height)}"
-        command.append(f"--output {screen.uid} --on --pos {int(rect.x)}{sep}{int(rect.y)} --mode {mode}")
 
-    cmd = " ".join(command)
-    return [cmd]
+def _make_command_hyprland_lua(screens: list[Screen], rects: list[Rect], live: dict[str, OutputState] | None = None) -> list[str]:
+    return _hyprland_lua_commands(make_plan(screens, rects, live))
+
+
+def _make_command_hyprland_old(screens: list[Screen], rects: list[Rect], live: dict[str, OutputState] | None = None) -> list[str]:
+    return _hyprland_old_commands(make_plan(screens, rects, live))
+
+
+def make_command_hyprland(screens: list[Screen], rects: list[Rect], live: dict[str, OutputState] | None = None) -> list[str]:
+    if _using_lua_syntax():
+        return _make_command_hyprland_lua(screens, rects, live)
+    return _make_command_hyprland_old(screens, rects, live)
+
+
+def make_command_sway(screens: list[Screen], rects: list[Rect], live: dict[str, OutputState] | None = None) -> list[str]:
+    return _sway_commands(make_plan(screens, rects, live))
+
+
+def make_command_legacy(screens: list[Screen], rects: list[Rect], wayland=False, live: dict[str, OutputState] | None = None) -> list[str]:
+    return _legacy_commands(make_plan(screens, rects, live), wayland=wayland)
+
+
+@lru_cache(maxsize=32)
+def _mode_index(modes: tuple[Mode, ...]) -> ModeIndex:
+    return ModeIndex(modes)
 
 
 def sorted_resolutions(modes):
-    res = set((m.width, m.height) for m in modes)
-    lres = list(res)
-    lres.sort(reverse=True)
-    return lres
+    return _mode_index(intern_modes(modes)).resolutions
 
 
 def sorted_frequencies(modes, filter_w=None, filter_h=None):
-    filtered_modes = modes.copy()
+    if filter_w and filter_h:
+        return _mode_index(intern_modes(modes)).frequencies((filter_w, filter_h))
+    filtered_modes = iter(modes)
     if filter_w:
         filtered_modes = filter(lambda m: m.width == filter_w, filtered_modes)
     if filter_h:
@@ -134,13 +192,7 @@ def sorted_frequencies(modes, filter_w=None, filter_h=None):
 
 
 def find_matching_mode(modes, res, freq):
-    for mode in modes:
-        if mode.width == res[0] and mode.height == res[1] and mode.freq == freq:
-            return mode
-    # Fallback: same resolution, closest frequency
-    candidates = [m for m in modes if m.width == res[0] and m.height == res[1]]
-    if candidates:
-        return min(candidates, key=lambda m: abs(m.freq - freq))
+    return _mode_index(intern_modes(modes)).find(res, freq)
 
 
 def compute_bounding_box(rects):
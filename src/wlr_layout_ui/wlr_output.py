@@ -0,0 +1,530 @@
+"""Pure-Python client for the ``wlr-output-management-unstable-v1`` protocol.
+
+Speaks the Wayland wire protocol directly on the compositor socket to list
+the heads (outputs) and their modes, and to apply a layout atomically using
+``zwlr_output_configuration_v1``.  This replaces the ``wlr-randr`` subprocess
+and its text output on sway, river and other wlroots compositors.
+
+Only the handful of interfaces needed for that are implemented:
+``wl_display``, ``wl_registry``, ``wl_callback`` and the
+``zwlr_output_*_v1`` family.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .types import Mode, Screen
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+log = logging.getLogger(__name__)
+
+MANAGER_INTERFACE = "zwlr_output_manager_v1"
+MANAGER_VERSION = 4
+
+DISPLAY_ID = 1
+
+# Request opcodes
+DISPLAY_SYNC = 0
+DISPLAY_GET_REGISTRY = 1
+REGISTRY_BIND = 0
+MANAGER_CREATE_CONFIGURATION = 0
+MANAGER_STOP = 1
+CONFIGURATION_ENABLE_HEAD = 0
+CONFIGURATION_DISABLE_HEAD = 1
+CONFIGURATION_APPLY = 2
+CONFIGURATION_TEST = 3
+CONFIGURATION_DESTROY = 4
+CONFIGURATION_HEAD_SET_MODE = 0
+CONFIGURATION_HEAD_SET_CUSTOM_MODE = 1
+CONFIGURATION_HEAD_SET_POSITION = 2
+CONFIGURATION_HEAD_SET_TRANSFORM = 3
+CONFIGURATION_HEAD_SET_SCALE = 4
+
+# Event signatures, by interface and opcode (i: int, u: uint, f: fixed, s: string, o: object, n: new_id)
+DISPLAY_EVENTS = {0: "ous", 1: "u"}  # error, delete_id
+REGISTRY_EVENTS = {0: "usu", 1: "u"}  # global, global_remove
+MANAGER_EVENTS = {0: "n", 1: "u", 2: ""}  # head, done, finished
+HEAD_EVENTS = {
+    0: "s",  # name
+    1: "s",  # description
+    2: "ii",  # physical_size
+    3: "n",  # mode
+    4: "i",  # enabled
+    5: "o",  # current_mode
+    6: "ii",  # position
+    7: "i",  # transform
+    8: "f",  # scale
+    9: "",  # finished
+    10: "s",  # make
+    11: "s",  # model
+    12: "s",  # serial_number
+    13: "u",  # adaptive_sync
+}
+MODE_EVENTS = {0: "ii", 1: "i", 2: "", 3: ""}  # size, refresh, preferred, finished
+CONFIGURATION_EVENTS = {0: "", 1: "", 2: ""}  # succeeded, failed, cancelled
+
+
+class WaylandError(OSError):
+    """Raised when the compositor can't be reached or doesn't support the protocol."""
+
+
+# ---------------------------------------------------------------------------
+# Wire format
+# ---------------------------------------------------------------------------
+
+
+def pack_args(signature: str, args) -> bytes:
+    """Encode request arguments according to *signature*."""
+    out = []
+    for kind, value in zip(signature, args):
+        if kind == "i":
+            out.append(struct.pack("=i", value))
+        elif kind == "f":
+            out.append(struct.pack("=i", round(value * 256)))
+        elif kind in "uon":
+            out.append(struct.pack("=I", value))
+        elif kind == "s":
+            data = value.encode() + b"\0"
+            out.append(struct.pack("=I", len(data)) + data + b"\0" * (-len(data) % 4))
+        else:
+            msg = f"Unsupported argument type {kind!r}"
+            raise ValueError(msg)
+    return b"".join(out)
+
+
+def unpack_args(signature: str, payload: bytes) -> list:
+    """Decode event arguments according to *signature*."""
+    values: list = []
+    offset = 0
+    for kind in signature:
+        if kind == "i":
+            values.append(struct.unpack_from("=i", payload, offset)[0])
+            offset += 4
+        elif kind == "f":
+            values.append(struct.unpack_from("=i", payload, offset)[0] / 256)
+            offset += 4
+        elif kind in "uon":
+            values.append(struct.unpack_from("=I", payload, offset)[0])
+            offset += 4
+        elif kind == "s":
+            size = struct.unpack_from("=I", payload, offset)[0]
+            offset += 4
+            values.append(payload[offset : offset + size - 1].decode(errors="replace") if size else None)
+            offset += size + (-size % 4)
+        else:
+            msg = f"Unsupported argument type {kind!r}"
+            raise ValueError(msg)
+    return values
+
+
+def socket_path() -> Path | None:
+    """Return the path of the Wayland compositor socket, if any."""
+    display = os.environ.get("WAYLAND_DISPLAY")
+    if not display:
+        return None
+    if display.startswith("/"):
+        return Path(display)
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    return Path(runtime_dir) / display if runtime_dir else None
+
+
+class WaylandConnection:
+    """A bare Wayland client connection dispatching events to per-object handlers."""
+
+    def __init__(self, path: str | Path, timeout: float = 2.0):
+        self.path = str(path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(self.path)
+        except OSError as e:
+            self._sock.close()
+            msg = f"Can't connect to the Wayland compositor on {self.path}: {e}"
+            raise WaylandError(msg) from e
+        self._buffer = b""
+        self._last_id = DISPLAY_ID
+        self.handlers: dict[int, tuple[dict[int, str], Callable]] = {DISPLAY_ID: (DISPLAY_EVENTS, self._on_display_event)}
+
+    def __repr__(self):
+        return f"<WaylandConnection {self.path}>"
+
+    def new_id(self, events: dict[int, str], handler: Callable) -> int:
+        """Allocate a client object id, registering its event handler."""
+        self._last_id += 1
+        self.handlers[self._last_id] = (events, handler)
+        return self._last_id
+
+    def send(self, obj_id: int, opcode: int, signature: str = "", *args):
+        payload = pack_args(signature, args)
+        header = struct.pack("=II", obj_id, ((len(payload) + 8) << 16) | opcode)
+        try:
+            self._sock.sendall(header + payload)
+        except OSError as e:
+            msg = f"Wayland connection lost: {e}"
+            raise WaylandError(msg) from e
+
+    def dispatch(self):
+        """Block until some data arrives and dispatch all the complete events."""
+        try:
+            chunk = self._sock.recv(65536)
+        except OSError as e:
+            msg = f"Wayland connection lost: {e}"
+            raise WaylandError(msg) from e
+        if not chunk:
+            msg = "The compositor closed the connection"
+            raise WaylandError(msg)
+        self._buffer += chunk
+        while len(self._buffer) >= 8:
+            obj_id, size_opcode = struct.unpack_from("=II", self._buffer)
+            size = size_opcode >> 16
+            if len(self._buffer) < size:
+                break
+            payload, self._buffer = self._buffer[8:size], self._buffer[size:]
+            try:
+                events, handler = self.handlers[obj_id]
+            except KeyError:
+                log.debug("Event for unknown object %d", obj_id)
+                continue
+            opcode = size_opcode & 0xFFFF
+            if opcode in events:
+                handler(opcode, *unpack_args(events[opcode], payload))
+
+    def roundtrip(self):
+        """Wait until the compositor processed all the requests sent so far."""
+        done = []
+        callback = self.new_id({0: "u"}, lambda _opcode, _data: done.append(True))
+        self.send(DISPLAY_ID, DISPLAY_SYNC, "n", callback)
+        while not done:
+            self.dispatch()
+        self.handlers.pop(callback, None)
+
+    def wait_for(self, condition: Callable[[], bool]):
+        while not condition():
+            self.dispatch()
+
+    def close(self):
+        self._sock.close()
+
+    def _on_display_event(self, opcode, *args):
+        if opcode == 0:
+            obj_id, code, message = args
+            msg = f"Wayland protocol error on object {obj_id} (code {code}): {message}"
+            raise WaylandError(msg)
+        self.handlers.pop(args[0], None)
+
+
+# ---------------------------------------------------------------------------
+# Output management
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class HeadMode:
+    """A ``zwlr_output_mode_v1`` object."""
+
+    id: int
+    width: int = 0
+    height: int = 0
+    refresh: int = 0  # mHz
+    preferred: bool = False
+
+    def to_mode(self) -> Mode:
+        return Mode(self.width, self.height, self.refresh / 1000)
+
+
+@dataclass
+class Head:
+    """A ``zwlr_output_head_v1`` object (one physical output)."""
+
+    id: int
+    name: str = ""
+    description: str = ""
+    enabled: bool = False
+    position: tuple[int, int] = (0, 0)
+    transform: int = 0
+    scale: float = 1.0
+    modes: list[HeadMode] = field(default_factory=list)
+    current_mode: HeadMode | None = None
+
+    def to_screen(self) -> Screen:
+        available = [m.to_mode() for m in self.modes]
+        current = self.modes.index(self.current_mode) if self.current_mode in self.modes else None
+        return Screen(
+            uid=self.name,
+            name=self.description,
+            active=self.enabled,
+            position=self.position,
+            mode=available[current] if current is not None else None,
+            scale=self.scale,
+            available=available,
+            transform=self.transform,
+        )
+
+    def find_mode(self, width: int, height: int, freq: float | None = None) -> HeadMode | None:
+        """Return the best mode of the given size, closest to *freq* if set."""
+        candidates = [m for m in self.modes if m.width == width and m.height == height]
+        if not candidates:
+            return None
+        if freq is not None:
+            return min(candidates, key=lambda m: abs(m.refresh / 1000 - freq))
+        if self.current_mode in candidates:
+            return self.current_mode
+        return max(candidates, key=lambda m: (m.preferred, m.refresh))
+
+
+@dataclass
+class HeadConfig:
+    """Target state for one head. ``None`` fields keep the current value."""
+
+    enabled: bool = True
+    mode: tuple[int, int, float | None] | None = None  # width, height, freq (optional)
+    position: tuple[int, int] | None = None
+    transform: int | None = None
+    scale: float | None = None
+
+
+class OutputManager:
+    """Snapshot of the heads advertised by ``zwlr_output_manager_v1``."""
+
+    def __init__(self, conn: WaylandConnection):
+        self.conn = conn
+        self.heads: dict[int, Head] = {}
+        self.modes: dict[int, HeadMode] = {}
+        self.serial: int | None = None
+        self._globals: dict[str, tuple[int, int]] = {}
+
+        registry = conn.new_id(REGISTRY_EVENTS, self._on_registry_event)
+        conn.send(DISPLAY_ID, DISPLAY_GET_REGISTRY, "n", registry)
+        conn.roundtrip()
+        try:
+            name, version = self._globals[MANAGER_INTERFACE]
+        except KeyError as e:
+            msg = f"The compositor doesn't support {MANAGER_INTERFACE}"
+            raise WaylandError(msg) from e
+        self.id = conn.new_id(MANAGER_EVENTS, self._on_manager_event)
+        version = min(version, MANAGER_VERSION)
+        conn.send(registry, REGISTRY_BIND, "usun", name, MANAGER_INTERFACE, version, self.id)
+        conn.wait_for(lambda: self.serial is not None)
+
+    @classmethod
+    def connect(cls, path: str | Path | None = None) -> OutputManager:
+        """Connect to the current compositor and fetch its outputs.
+
+        Raises:
+            WaylandError: if there is no compositor or it doesn't support the protocol.
+        """
+        path = path or socket_path()
+        if path is None:
+            msg = "WAYLAND_DISPLAY is not set"
+            raise WaylandError(msg)
+        conn = WaylandConnection(path)
+        try:
+            return cls(conn)
+        except Exception:
+            conn.close()
+            raise
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
+
+    def screens(self) -> list[Screen]:
+        return [head.to_screen() for head in self.heads.values()]
+
+    def head_by_name(self, name: str) -> Head | None:
+        for head in self.heads.values():
+            if head.name == name:
+                return head
+        return None
+
+    def configure(self, targets: dict[str, HeadConfig], *, test_only: bool = False) -> bool:
+        """Apply (or just test) a configuration atomically.
+
+        Heads missing from *targets* keep their current state, as the protocol
+        requires every head to be part of the configuration.
+
+        Returns:
+            True if the compositor accepted the configuration.
+        """
+        assert self.serial is not None
+        result: list[int] = []
+        config = self.conn.new_id(CONFIGURATION_EVENTS, result.append)
+        self.conn.send(self.id, MANAGER_CREATE_CONFIGURATION, "nu", config, self.serial)
+        for head in self.heads.values():
+            target = targets.get(head.name, HeadConfig(enabled=head.enabled))
+            if not target.enabled:
+                self.conn.send(config, CONFIGURATION_DISABLE_HEAD, "o", head.id)
+                continue
+            config_head = self.conn.new_id({}, lambda *_: None)
+            self.conn.send(config, CONFIGURATION_ENABLE_HEAD, "no", config_head, head.id)
+            self._configure_head(config_head, head, target)
+        self.conn.send(config, CONFIGURATION_TEST if test_only else CONFIGURATION_APPLY)
+        self.conn.wait_for(lambda: bool(result))
+        self.conn.send(config, CONFIGURATION_DESTROY)
+        return result[0] == 0
+
+    def _configure_head(self, config_head: int, head: Head, target: HeadConfig):
+        send = self.conn.send
+        if target.mode:
+            width, height, freq = target.mode
+            mode = head.find_mode(width, height, freq)
+            if mode:
+                send(config_head, CONFIGURATION_HEAD_SET_MODE, "o", mode.id)
+            else:
+                send(config_head, CONFIGURATION_HEAD_SET_CUSTOM_MODE, "iii", width, height, round((freq or 0) * 1000))
+        elif head.current_mode:
+            send(config_head, CONFIGURATION_HEAD_SET_MODE, "o", head.current_mode.id)
+        send(config_head, CONFIGURATION_HEAD_SET_POSITION, "ii", *(target.position or head.position))
+        send(config_head, CONFIGURATION_HEAD_SET_TRANSFORM, "i", head.transform if target.transform is None else target.transform)
+        send(config_head, CONFIGURATION_HEAD_SET_SCALE, "f", head.scale if target.scale is None else target.scale)
+
+    # Event handlers {{{
+
+    def _on_registry_event(self, opcode, *args):
+        if opcode == 0:
+            name, interface, version = args
+            self._globals[interface] = (name, version)
+
+    def _on_manager_event(self, opcode, *args):
+        if opcode == 0:
+            head = Head(args[0])
+            self.heads[head.id] = head
+            self.conn.handlers[head.id] = (HEAD_EVENTS, lambda op, *a: self._on_head_event(head, op, *a))
+        elif opcode == 1:
+            self.serial = args[0]
+        elif opcode == 2:
+            msg = "The output manager has been finished by the compositor"
+            raise WaylandError(msg)
+
+    def _on_head_event(self, head: Head, opcode, *args):
+        if opcode == 0:
+            head.name = args[0]
+        elif opcode == 1:
+            head.description = args[0]
+        elif opcode == 3:
+            mode = HeadMode(args[0])
+            head.modes.append(mode)
+            self.modes[mode.id] = mode
+            self.conn.handlers[mode.id] = (MODE_EVENTS, lambda op, *a: self._on_mode_event(mode, op, *a))
+        elif opcode == 4:
+            head.enabled = bool(args[0])
+        elif opcode == 5:
+            head.current_mode = self.modes.get(args[0])
+        elif opcode == 6:
+            head.position = (args[0], args[1])
+        elif opcode == 7:
+            head.transform = args[0]
+        elif opcode == 8:
+            head.scale = args[0]
+        elif opcode == 9:
+            self.heads.pop(head.id, None)
+
+    def _on_mode_event(self, mode: HeadMode, opcode, *args):
+        if opcode == 0:
+            mode.width, mode.height = args
+        elif opcode == 1:
+            mode.refresh = args[0]
+        elif opcode == 2:
+            mode.preferred = True
+
+    # }}}
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+
+def load_screens() -> list[Screen]:
+    """Return the outputs of the current compositor.
+
+    Raises:
+        WaylandError: if the protocol isn't available.
+    """
+    with OutputManager.connect() as manager:
+        return manager.screens()
+
+
+def parse_wlr_randr_command(cmd: str) -> dict[str, HeadConfig] | None:
+    """Turn a ``wlr-randr`` command line (as built by ``make_command_legacy``) into head configs."""
+    args = cmd.split()
+    if not args or args[0] != "wlr-randr":
+        return None
+    targets: dict[str, HeadConfig] = {}
+    current: HeadConfig | None = None
+    args.pop(0)
+    while args:
+        try:
+            current = _parse_wlr_randr_option(args, targets, current)
+        except (IndexError, ValueError):
+            return None
+        if current is None:
+            return None
+    return targets
+
+
+def _parse_wlr_randr_option(args: list[str], targets: dict[str, HeadConfig], current: HeadConfig | None) -> HeadConfig | None:
+    """Consume the next option of *args* into *targets*.
+
+    Returns:
+        The config of the head being configured, None if the option isn't supported.
+
+    Raises:
+        IndexError, ValueError: if the option is malformed.
+    """
+    arg = args.pop(0)
+    if arg == "--output":
+        current = targets[args.pop(0)] = HeadConfig()
+    elif current is None:
+        return None
+    elif arg == "--on":
+        current.enabled = True
+    elif arg == "--off":
+        current.enabled = False
+    elif arg == "--pos":
+        x, y = args.pop(0).split(",")
+        current.position = (int(x), int(y))
+    elif arg == "--mode":
+        res, _, freq = args.pop(0).partition("@")
+        w, h = res.split("x")
+        current.mode = (int(w), int(h), float(freq.rstrip("Hz")) if freq else None)
+    elif arg == "--transform":
+        current.transform = int(args.pop(0))
+    elif arg == "--scale":
+        current.scale = float(args.pop(0))
+    else:
+        return None
+    return current
+
+
+def run_wlr_randr_command(cmd: str) -> bool | None:
+    """Apply a ``wlr-randr`` command through the protocol.
+
+    Returns:
+        Whether the configuration was applied, or None if *cmd* isn't a
+        ``wlr-randr`` command or the protocol isn't available, in which case
+        the caller should run it through the shell.
+    """
+    targets = parse_wlr_randr_command(cmd)
+    if targets is None:
+        return None
+    try:
+        with OutputManager.connect() as manager:
+            return manager.configure(targets)
+    except WaylandError:
+        log.debug("wlr-output-management unavailable", exc_info=True)
+        return None
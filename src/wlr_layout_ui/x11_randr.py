@@ -0,0 +1,541 @@
+"""Native X11 RandR backend, calling libXrandr through ctypes.
+
+Replaces the ``xrandr`` subprocess and its text output on X11: the outputs,
+CRTCs and modes are read from the screen resources of a display connection
+kept open for the whole process, and layouts are applied with
+``XRRSetCrtcConfig`` while holding a server grab, so clients never see a
+half-applied configuration.  The X errors raised meanwhile are trapped (the
+default Xlib handler exits the process) and make the configuration fail.
+
+The X libraries are loaded lazily; when they are missing every entry point
+raises :class:`XRandRError` (or returns None for :func:`run_xrandr_command`)
+and the caller falls back to the ``xrandr`` binary.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import threading
+from contextlib import contextmanager
+from ctypes import CFUNCTYPE, POINTER, Structure, c_char_p, c_int, c_ubyte, c_uint, c_ulong, c_ushort, c_void_p
+from functools import lru_cache
+from typing import Any, ClassVar
+
+from .types import Mode, Screen
+from .wlr_output import HeadConfig
+
+log = logging.getLogger(__name__)
+
+XID = c_ulong
+Time = c_ulong
+Rotation = c_ushort
+
+CURRENT_TIME = 0
+SUCCESS = 0
+RR_CONNECTED = 0
+RR_INTERLACE = 0x10
+RR_DOUBLE_SCAN = 0x20
+RR_REFLECT_X = 16
+ROTATIONS = {"normal": 0, "left": 1, "inverted": 2, "right": 3}  # --rotate values, by transform
+
+
+class XRRModeInfo(Structure):
+    _fields_: ClassVar[list[tuple[str, Any]]] = [
+        ("id", XID),
+        ("width", c_uint),
+        ("height", c_uint),
+        ("dotClock", c_ulong),
+        ("hSyncStart", c_uint),
+        ("hSyncEnd", c_uint),
+        ("hTotal", c_uint),
+        ("hSkew", c_uint),
+        ("vSyncStart", c_uint),
+        ("vSyncEnd", c_uint),
+        ("vTotal", c_uint),
+        ("name", c_char_p),
+        ("nameLength", c_uint),
+        ("modeFlags", c_ulong),
+    ]
+
+
+class XRRScreenResources(Structure):
+    _fields_: ClassVar[list[tuple[str, Any]]] = [
+        ("timestamp", Time),
+        ("configTimestamp", Time),
+        ("ncrtc", c_int),
+        ("crtcs", POINTER(XID)),
+        ("noutput", c_int),
+        ("outputs", POINTER(XID)),
+        ("nmode", c_int),
+        ("modes", POINTER(XRRModeInfo)),
+    ]
+
+
+class XRROutputInfo(Structure):
+    _fields_: ClassVar[list[tuple[str, Any]]] = [
+        ("timestamp", Time),
+        ("crtc", XID),
+        ("name", c_char_p),
+        ("nameLen", c_int),
+        ("mm_width", c_ulong),
+        ("mm_height", c_ulong),
+        ("connection", c_ushort),
+        ("subpixel_order", c_ushort),
+        ("ncrtc", c_int),
+        ("crtcs", POINTER(XID)),
+        ("nclone", c_int),
+        ("clones", POINTER(XID)),
+        ("nmode", c_int),
+        ("npreferred", c_int),
+        ("modes", POINTER(XID)),
+    ]
+
+
+class XRRCrtcInfo(Structure):
+    _fields_: ClassVar[list[tuple[str, Any]]] = [
+        ("timestamp", Time),
+        ("x", c_int),
+        ("y", c_int),
+        ("width", c_uint),
+        ("height", c_uint),
+        ("mode", XID),
+        ("rotation", Rotation),
+        ("noutput", c_int),
+        ("outputs", POINTER(XID)),
+        ("rotations", Rotation),
+        ("npossible", c_int),
+        ("possible", POINTER(XID)),
+    ]
+
+
+class XErrorEvent(Structure):
+    _fields_: ClassVar[list[tuple[str, Any]]] = [
+        ("type", c_int),
+        ("display", c_void_p),
+        ("resourceid", XID),
+        ("serial", c_ulong),
+        ("error_code", c_ubyte),
+        ("request_code", c_ubyte),
+        ("minor_code", c_ubyte),
+    ]
+
+
+XErrorHandler = CFUNCTYPE(c_int, c_void_p, POINTER(XErrorEvent))
+
+
+class XRandRError(OSError):
+    """Raised when the X server or libXrandr can't be used."""
+
+
+def _load_library(name: str):
+    path = ctypes.util.find_library(name)
+    if path is None:
+        msg = f"lib{name} not found"
+        raise XRandRError(msg)
+    return ctypes.CDLL(path)
+
+
+@lru_cache(maxsize=1)
+def libraries():
+    """Load and prototype libX11 and libXrandr."""
+    xlib = _load_library("X11")
+    xrandr = _load_library("Xrandr")
+    for func, restype, argtypes in (
+        (xlib.XOpenDisplay, c_void_p, [c_char_p]),
+        (xlib.XCloseDisplay, c_int, [c_void_p]),
+        (xlib.XDefaultRootWindow, XID, [c_void_p]),
+        (xlib.XDefaultScreen, c_int, [c_void_p]),
+        (xlib.XDisplayWidth, c_int, [c_void_p, c_int]),
+        (xlib.XDisplayHeight, c_int, [c_void_p, c_int]),
+        (xlib.XDisplayWidthMM, c_int, [c_void_p, c_int]),
+        (xlib.XDisplayHeightMM, c_int, [c_void_p, c_int]),
+        (xlib.XGrabServer, c_int, [c_void_p]),
+        (xlib.XUngrabServer, c_int, [c_void_p]),
+        (xlib.XSync, c_int, [c_void_p, c_int]),
+        (xlib.XSetErrorHandler, c_void_p, [c_void_p]),
+        (xrandr.XRRQueryExtension, c_int, [c_void_p, POINTER(c_int), POINTER(c_int)]),
+        (xrandr.XRRGetScreenResourcesCurrent, POINTER(XRRScreenResources), [c_void_p, XID]),
+        (xrandr.XRRFreeScreenResources, None, [POINTER(XRRScreenResources)]),
+        (xrandr.XRRGetOutputInfo, POINTER(XRROutputInfo), [c_void_p, POINTER(XRRScreenResources), XID]),
+        (xrandr.XRRFreeOutputInfo, None, [POINTER(XRROutputInfo)]),
+        (xrandr.XRRGetCrtcInfo, POINTER(XRRCrtcInfo), [c_void_p, POINTER(XRRScreenResources), XID]),
+        (xrandr.XRRFreeCrtcInfo, None, [POINTER(XRRCrtcInfo)]),
+        (
+            xrandr.XRRSetCrtcConfig,
+            c_int,
+            [c_void_p, POINTER(XRRScreenResources), XID, Time, c_int, c_int, XID, Rotation, POINTER(XID), c_int],
+        ),
+        (xrandr.XRRGetScreenSizeRange, c_int, [c_void_p, XID, POINTER(c_int), POINTER(c_int), POINTER(c_int), POINTER(c_int)]),
+        (xrandr.XRRSetScreenSize, None, [c_void_p, XID, c_int, c_int, c_int, c_int]),
+    ):
+        func.restype = restype
+        func.argtypes = argtypes
+    return xlib, xrandr
+
+
+def mode_refresh(info: XRRModeInfo) -> float:
+    """Refresh rate of a mode, rounded like ``xrandr`` prints it."""
+    v_total = info.vTotal
+    if info.modeFlags & RR_DOUBLE_SCAN:
+        v_total *= 2
+    if info.modeFlags & RR_INTERLACE:
+        v_total /= 2
+    if not info.hTotal or not v_total:
+        return 0.0
+    return round(info.dotClock / (info.hTotal * v_total), 2)
+
+
+def rotation_to_transform(rotation: int) -> int:
+    quarter = {1: 0, 2: 1, 4: 2, 8: 3}.get(rotation & 0xF, 0)
+    return quarter + (4 if rotation & RR_REFLECT_X else 0)
+
+
+def transform_to_rotation(transform: int) -> int:
+    return (1 << (transform % 4)) | (RR_REFLECT_X if transform >= 4 else 0)
+
+
+class _Output:
+    """State of a connected output, as read from the screen resources."""
+
+    def __init__(self, xid, name, crtc, crtcs, modes):
+        self.xid = xid
+        self.name = name
+        self.crtc = crtc  # 0 when disabled
+        self.crtcs = crtcs  # usable CRTCs
+        self.modes = modes  # RRMode ids, preferred ones first
+
+
+class RandRConnection:
+    """A display connection with the RandR extension."""
+
+    def __init__(self, display_name: str | None = None):
+        self.xlib, self.xrandr = libraries()
+        self.dpy = self.xlib.XOpenDisplay(display_name.encode() if display_name else None)
+        if not self.dpy:
+            msg = f"Can't open X display {display_name or ''}".strip()
+            raise XRandRError(msg)
+        event_base, error_base = c_int(), c_int()
+        if not self.xrandr.XRRQueryExtension(self.dpy, ctypes.byref(event_base), ctypes.byref(error_base)):
+            self.close()
+            msg = "The X server doesn't support RandR"
+            raise XRandRError(msg)
+        self.root = self.xlib.XDefaultRootWindow(self.dpy)
+        self.screen = self.xlib.XDefaultScreen(self.dpy)
+        self.lock = threading.Lock()
+
+    def close(self):
+        if self.dpy:
+            self.xlib.XCloseDisplay(self.dpy)
+            self.dpy = None
+
+    # Reading
+
+    def _snapshot(self, res):
+        """Read the modes, CRTCs and connected outputs from the screen resources."""
+        xr = self.xrandr
+        modes = {}
+        for i in range(res.contents.nmode):
+            info = res.contents.modes[i]
+            modes[info.id] = (info.width, info.height, mode_refresh(info), bool(info.modeFlags & RR_INTERLACE))
+        crtcs = {}
+        for i in range(res.contents.ncrtc):
+            xid = res.contents.crtcs[i]
+            info = xr.XRRGetCrtcInfo(self.dpy, res, xid)
+            if not info:
+                continue
+            c = info.contents
+            crtcs[xid] = {"x": c.x, "y": c.y, "mode": c.mode, "rotation": c.rotation, "outputs": [c.outputs[j] for j in range(c.noutput)]}
+            xr.XRRFreeCrtcInfo(info)
+        outputs = []
+        for i in range(res.contents.noutput):
+            xid = res.contents.outputs[i]
+            info = xr.XRRGetOutputInfo(self.dpy, res, xid)
+            if not info:
+                continue
+            o = info.contents
+            if o.connection == RR_CONNECTED:
+                outputs.append(
+                    _Output(
+                        xid,
+                        o.name.decode(errors="replace"),
+                        o.crtc,
+                        [o.crtcs[j] for j in range(o.ncrtc)],
+                        [o.modes[j] for j in range(o.nmode)],
+                    )
+                )
+            xr.XRRFreeOutputInfo(info)
+        return modes, crtcs, outputs
+
+    def screens(self) -> list[Screen]:
+        """Return the connected outputs."""
+        with self.lock:
+            res = self.xrandr.XRRGetScreenResourcesCurrent(self.dpy, self.root)
+            if not res:
+                msg = "Can't get the RandR screen resources"
+                raise XRandRError(msg)
+            try:
+                modes, crtcs, outputs = self._snapshot(res)
+            finally:
+                self.xrandr.XRRFreeScreenResources(res)
+        result = []
+        for output in outputs:
+            available = [Mode(*modes[m][:3]) for m in output.modes if m in modes and not modes[m][3]]
+            screen = Screen(uid=output.name, name=output.name, available=available)
+            crtc = crtcs.get(output.crtc)
+            if crtc and crtc["mode"] in modes:
+                screen.active = True
+                screen.position = (crtc["x"], crtc["y"])
+                screen.mode = Mode(*modes[crtc["mode"]][:3])
+                screen.transform = rotation_to_transform(crtc["rotation"])
+            result.append(screen)
+        return result
+
+    # Writing
+
+    @contextmanager
+    def _trap_errors(self):
+        """Record the X errors of this connection instead of letting Xlib's default handler exit.
+
+        Yields:
+            The list receiving the ``(error code, request code, minor code)``
+            of the errors, once delivered (see :meth:`_failed`).
+        """
+        errors: list[tuple[int, int, int]] = []
+        previous = None
+
+        def handler(dpy, event):
+            if dpy != self.dpy and previous:  # another connection of the process
+                return XErrorHandler(previous)(dpy, event)
+            e = event.contents
+            errors.append((e.error_code, e.request_code, e.minor_code))
+            return 0
+
+        callback = XErrorHandler(handler)  # referenced until restored
+        previous = self.xlib.XSetErrorHandler(ctypes.cast(callback, c_void_p))
+        try:
+            yield errors
+        finally:
+            self.xlib.XSync(self.dpy, 0)
+            self.xlib.XSetErrorHandler(previous)
+
+    def _failed(self, errors: list[tuple[int, int, int]], action: str) -> bool:
+        """Wait for the replies of the requests sent so far, tell whether one of them failed."""
+        self.xlib.XSync(self.dpy, 0)
+        if errors:
+            log.warning("X error while %s (error code, request code, minor code): %s", action, errors)
+        return bool(errors)
+
+    def _pick_mode(self, output: _Output, modes, crtcs, target: HeadConfig):
+        current = crtcs.get(output.crtc, {}).get("mode")
+        if target.mode is None:
+            return current or (output.modes[0] if output.modes else None)
+        width, height, freq = target.mode
+        candidates = [m for m in output.modes if m in modes and modes[m][:2] == (width, height) and not modes[m][3]]
+        if not candidates:
+            return None
+        if freq is not None:
+            return min(candidates, key=lambda m: abs(modes[m][2] - freq))
+        return current if current in candidates else candidates[0]  # preferred modes come first
+
+    def configure(self, targets: dict[str, HeadConfig]) -> bool:
+        """Apply *targets* (by output name) in a single server grab.
+
+        Outputs which are not listed keep their configuration.
+        """
+        xr, xlib, dpy = self.xrandr, self.xlib, self.dpy
+        with self.lock, self._trap_errors() as errors:
+            xlib.XGrabServer(dpy)
+            res = xr.XRRGetScreenResourcesCurrent(dpy, self.root)
+            try:
+                if not res:
+                    return False
+                modes, crtcs, outputs = self._snapshot(res)
+                by_name = {o.name: o for o in outputs}
+                if any(name not in by_name for name in targets):
+                    log.warning("Unknown output(s): %s", ", ".join(n for n in targets if n not in by_name))
+                    return False
+
+                # final state of every CRTC: (x, y, mode, rotation, [outputs])
+                plan = {}
+                for output in outputs:
+                    target = targets.get(output.name)
+                    crtc = crtcs.get(output.crtc)
+                    if target is None:
+                        if crtc and crtc["mode"]:
+                            plan[output.crtc] = (crtc["x"], crtc["y"], crtc["mode"], crtc["rotation"], crtc["outputs"])
+                        continue
+                    if not target.enabled:
+                        continue
+                    mode = self._pick_mode(output, modes, crtcs, target)
+                    if mode is None:
+                        log.warning("No mode matching %s for %s", target.mode, output.name)
+                        return False
+                    free = (c for c in output.crtcs if c in crtcs and c not in plan and not crtcs[c]["outputs"])
+                    crtc_id = output.crtc or next(free, None)
+                    if crtc_id is None:
+                        log.warning("No free CRTC for %s", output.name)
+                        return False
+                    position = target.position or ((crtc["x"], crtc["y"]) if crtc else (0, 0))
+                    rotation = crtc["rotation"] if crtc and target.transform is None else transform_to_rotation(target.transform or 0)
+                    plan[crtc_id] = (position[0], position[1], mode, rotation, [output.xid])
+
+                size = self._screen_size(plan, modes) if plan else None
+                if size is not None and not self._size_allowed(*size):
+                    return False
+
+                # disable the CRTCs that change before resizing the screen
+                for crtc_id, crtc in crtcs.items():
+                    if crtc["mode"] and plan.get(crtc_id) != (crtc["x"], crtc["y"], crtc["mode"], crtc["rotation"], crtc["outputs"]):
+                        status = xr.XRRSetCrtcConfig(dpy, res, crtc_id, CURRENT_TIME, 0, 0, 0, 1, None, 0)
+                        if status != SUCCESS or self._failed(errors, "disabling a CRTC"):
+                            return False
+                        crtc["mode"] = 0
+
+                if size is not None:
+                    self._resize(*size)
+                    if self._failed(errors, "resizing the screen"):
+                        return False
+                ok = True
+                for crtc_id, (x, y, mode, rotation, crtc_outputs) in plan.items():
+                    if crtcs[crtc_id]["mode"]:
+                        continue  # unchanged
+                    array = (XID * len(crtc_outputs))(*crtc_outputs)
+                    status = xr.XRRSetCrtcConfig(dpy, res, crtc_id, CURRENT_TIME, x, y, mode, rotation, array, len(crtc_outputs))
+                    ok = ok and status == SUCCESS
+                return not self._failed(errors, "configuring a CRTC") and ok
+            finally:
+                if res:
+                    xr.XRRFreeScreenResources(res)
+                xlib.XUngrabServer(dpy)
+                xlib.XSync(dpy, 0)
+
+    @staticmethod
+    def _screen_size(plan, modes) -> tuple[int, int]:
+        """Return the bounding box of the CRTCs of *plan*."""
+        width = height = 0
+        for x, y, mode, rotation, _ in plan.values():
+            w, h = modes[mode][:2]
+            if rotation & 0b1010:  # 90 or 270 degrees
+                w, h = h, w
+            width, height = max(width, x + w), max(height, y + h)
+        return width, height
+
+    def _size_allowed(self, width: int, height: int) -> bool:
+        """Tell whether the screen can be resized to *width* x *height* (a BadValue error otherwise)."""
+        min_w, min_h, max_w, max_h = c_int(), c_int(), c_int(), c_int()
+        if not self.xrandr.XRRGetScreenSizeRange(
+            self.dpy, self.root, ctypes.byref(min_w), ctypes.byref(min_h), ctypes.byref(max_w), ctypes.byref(max_h)
+        ):
+            return True  # unknown, the errors are trapped anyway
+        if min_w.value <= width <= max_w.value and min_h.value <= height <= max_h.value:
+            return True
+        log.warning(
+            "The layout needs a %dx%d screen, the X server supports %dx%d to %dx%d",
+            width,
+            height,
+            min_w.value,
+            min_h.value,
+            max_w.value,
+            max_h.value,
+        )
+        return False
+
+    def _resize(self, width: int, height: int):
+        """Set the screen size to *width* x *height*, keeping the DPI."""
+        xlib, screen = self.xlib, self.screen
+        cur_w, cur_h = xlib.XDisplayWidth(self.dpy, screen), xlib.XDisplayHeight(self.dpy, screen)
+        mm_w = max(1, round(xlib.XDisplayWidthMM(self.dpy, screen) * width / cur_w))
+        mm_h = max(1, round(xlib.XDisplayHeightMM(self.dpy, screen) * height / cur_h))
+        self.xrandr.XRRSetScreenSize(self.dpy, self.root, width, height, mm_w, mm_h)
+
+
+@lru_cache(maxsize=1)
+def get_connection() -> RandRConnection:
+    """Return the process-wide display connection.
+
+    Raises:
+        XRandRError: when libXrandr or the X server are not available.
+    """
+    return RandRConnection()
+
+
+def load_screens() -> list[Screen]:
+    """List the connected outputs of the X server.
+
+    Raises:
+        XRandRError: when libXrandr or the X server are not available.
+    """
+    return get_connection().screens()
+
+
+def parse_xrandr_command(cmd: str) -> dict[str, HeadConfig] | None:
+    """Turn an ``xrandr`` command line (as built by ``make_command_legacy``) into output configs."""
+    args = cmd.split()
+    if not args or args[0] != "xrandr":
+        return None
+    targets: dict[str, HeadConfig] = {}
+    current: HeadConfig | None = None
+    args.pop(0)
+    while args:
+        try:
+            current = _parse_xrandr_option(args, targets, current)
+        except (IndexError, KeyError, ValueError):
+            return None
+        if current is None:
+            return None
+    return targets
+
+
+def _parse_xrandr_option(args: list[str], targets: dict[str, HeadConfig], current: HeadConfig | None) -> HeadConfig | None:
+    """Consume the next option of *args* into *targets*.
+
+    Returns:
+        The config of the output being configured, None if the option isn't supported.
+
+    Raises:
+        IndexError, KeyError, ValueError: if the option is malformed.
+    """
+    arg = args.pop(0)
+    if arg == "--output":
+        current = targets[args.pop(0)] = HeadConfig()
+    elif current is None:
+        return None
+    elif arg in ("--on", "--auto"):
+        current.enabled = True
+    elif arg == "--off":
+        current.enabled = False
+    elif arg == "--pos":
+        x, y = args.pop(0).split("x")
+        current.position = (int(x), int(y))
+    elif arg == "--mode":
+        w, h = args.pop(0).split("x")
+        current.mode = (int(w), int(h), current.mode[2] if current.mode else None)
+    elif arg == "--rate":
+        rate = float(args.pop(0))
+        current.mode = (current.mode[0], current.mode[1], rate) if current.mode else None
+    elif arg == "--rotate":
+        current.transform = ROTATIONS[args.pop(0)]
+    else:
+        return None
+    return current
+
+
+def run_xrandr_command(cmd: str) -> bool | None:
+    """Apply an ``xrandr`` command through libXrandr.
+
+    Returns:
+        Whether the configuration was applied, or None if *cmd* isn't an
+        ``xrandr`` command or libXrandr isn't usable, in which case the
+        caller should run it through the shell.
+    """
+    targets = parse_xrandr_command(cmd)
+    if targets is None:
+        return None
+    try:
+        connection = get_connection()
+    except XRandRError:
+        log.debug("libXrandr unavailable", exc_info=True)
+        return None
+    return connection.configure(targets)
@@ -0,0 +1,99 @@
+"""Benchmark: display discovery on the recorded captures, per backend.
+
+Usage: python tests/bench_discovery.py [backend|capture ...]
+
+For every capture of every backend (see ``tests/replay.py``), reports:
+
+- parse: decoding the recorded output into screens (``json.loads`` +
+  ``load_from_hyprctl`` for Hyprland, the streaming parser otherwise), best of 20
+- allocs / peak: memory blocks still allocated after the parse (screens,
+  modes...) and the peak traced memory during it, starting with no interned mode
+- load: end-to-end ``screens.load()`` on the replayed capture, subprocess and
+  socket round trips included, best of 5, without and with the display cache
+"""
+
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, "src")
+sys.path.insert(0, "tests")
+
+import pyglet
+
+pyglet.options["headless"] = True
+
+from replay import BACKENDS, capture_path, captures, replay  # ruff: ignore[module-import-not-at-top-of-file]
+
+from wlr_layout_ui import randr_text, screens  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.types import Mode  # ruff: ignore[module-import-not-at-top-of-file]
+
+
+def parser_for(backend, name):
+    text = capture_path(backend, name).read_text()
+    if backend == "hyprland":
+
+        def parse():
+            screens.displayInfo.clear()
+            screens.load_from_hyprctl(json.loads(text))
+            return list(screens.displayInfo)
+
+    else:
+
+        def parse():
+            return randr_text.parse(text, backend).screens
+
+    return parse
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def allocations(func):
+    """Return the blocks retained by the result of *func* and the traced peak (bytes)."""
+    Mode._interned.clear()
+    screens.displayInfo.clear()
+    gc.collect()
+    before = sys.getallocatedblocks()
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    retained = sys.getallocatedblocks() - before
+    del result
+    return retained, peak
+
+
+def main():
+    selected = set(sys.argv[1:])
+    print(f"{'backend':<10} {'capture':<13} {'heads':>5} {'modes':>6} {'parse':>9} {'allocs':>7} {'peak':>9} {'load':>9} {'cached':>9}")
+    for backend in BACKENDS:
+        for name in captures(backend):
+            if selected and not selected & {backend, name}:
+                continue
+            parse = parser_for(backend, name)
+            found = parse()
+            modes = sum(len(s.available) for s in found)
+            parse_time = best_of(parse, 20)
+            retained, peak = allocations(parse)
+            with replay(backend, name):
+                load = best_of(screens.load, 5)
+                screens.load(cached=True)  # fill the cache
+                cached = best_of(lambda: screens.load(cached=True), 5)
+            print(
+                f"{backend:<10} {name:<13} {len(found):>5} {modes:>6} {parse_time * 1e3:>6.2f} ms {retained:>7}"
+                f" {peak / 1024:>5.0f} KiB {load * 1e3:>6.2f} ms {cached * 1e3:>6.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark: Hyprland IPC socket vs ``hyprctl`` subprocess.
+
+Usage: python tests/bench_hyprland_ipc.py [iterations]
+
+Against a live Hyprland session both paths query the real compositor,
+otherwise a fake socket is served from the fixtures and the subprocess path
+is approximated by spawning ``cat`` on the same fixture (a lower bound of the
+fork/exec cost paid by ``hyprctl``).
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, "src")
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pyglet
+
+pyglet.options["headless"] = True
+
+from fakes import FIXTURES, FakeHyprland  # ruff: ignore[module-import-not-at-top-of-file]
+
+from wlr_layout_ui import hyprland  # ruff: ignore[module-import-not-at-top-of-file]
+
+
+def timeit(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    server = None
+    if hyprland.get_client() and shutil.which("hyprctl"):
+        label = "live Hyprland"
+        subprocess_cmd = "hyprctl -j monitors all"
+    else:
+        label = "fake socket"
+        server = FakeHyprland.from_fixtures(tempfile.mkdtemp(prefix="wlrlui"))
+        os.environ.update(server.environ())
+        hyprland.get_client.cache_clear()
+        subprocess_cmd = f"cat {FIXTURES / 'hyprland' / 'monitors.json'}"
+
+    try:
+        ipc = timeit(lambda: hyprland.hyprctl_json("monitors all"), iterations)
+        spawn = timeit(lambda: subprocess.getoutput(subprocess_cmd), iterations)
+    finally:
+        if server:
+            server.close()
+
+    print(f"monitors query ({label}, {iterations} iterations)")
+    print(f"  IPC socket : {ipc * 1e6:9.1f} us")
+    print(f"  subprocess : {spawn * 1e6:9.1f} us  ({spawn / ipc:.1f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
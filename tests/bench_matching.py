@@ -0,0 +1,78 @@
+"""Benchmark: profile matching on hotplug, with a large profile library.
+
+Usage: python tests/bench_matching.py [profiles]
+
+Uses the library of ``tests/bench_profiles.py`` (1000 profiles by default,
+most of them using the laptop panel) and reports, best of 20, the time to
+find the profile of:
+
+- exact: an output set having a profile (index lookup)
+- partial: the same outputs plus a projector (best fit over the profiles
+  sharing outputs with them)
+- unknown: outputs no profile uses
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, "src")
+sys.path.insert(0, "tests")
+
+import pyglet
+import tomli_w
+
+pyglet.options["headless"] = True
+
+from bench_profiles import library  # ruff: ignore[module-import-not-at-top-of-file]
+
+from wlr_layout_ui.matching import best_fit, find_profile  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.profiles import ProfileIndex, ProfileStore  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.types import Mode, Screen  # ruff: ignore[module-import-not-at-top-of-file]
+
+
+def best_of(func, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def screens(*uids):
+    modes = [Mode(1920, 1080, 60.0)]
+    return [Screen(uid=uid, name=uid, active=True, mode=modes[0], available=modes) for uid in uids]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    profiles = library(count)
+    for n, profile in enumerate(profiles.values()):  # a laptop panel in most of them
+        if n % 4:
+            profile[0]["uid"] = "eDP-1"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "wlrlui.toml"
+        path.write_text(tomli_w.dumps(profiles))
+        index = ProfileIndex(ProfileStore(path), Path(tmp) / "index.json")
+        index.refresh()
+        print(f"{count} profiles")
+        cases = {
+            "exact": screens("eDP-1", "DP-2"),
+            "partial": screens("eDP-1", "DP-2", "HDMI-A-9"),
+            "unknown": screens("DP-9", "HDMI-A-9"),
+        }
+        for case, connected in cases.items():
+            found = find_profile(index, connected)
+            duration = best_of(lambda connected=connected: find_profile(index, connected))
+            result = "none" if found is None else f"{found[0]}, {'exact' if found[2] else 'partial'}"
+            candidates = len(index.sharing(connected))
+            print(f"  {case:<8}: {duration * 1e3:7.3f} ms  ({result}; {candidates} profiles sharing outputs)")
+        connected = cases["partial"]
+        fit = best_fit(index, connected)
+        print(f"  best fit score: {fit.score}")
+
+
+if __name__ == "__main__":
+    main()
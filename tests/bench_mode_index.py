@@ -0,0 +1,95 @@
+"""Micro-benchmark: mode index vs linear scans over the available modes.
+
+Usage: python tests/bench_mode_index.py [modes per screen]
+
+Simulates what the GUI does on every screen selection (resolution list +
+frequencies of the current resolution) and on every profile load (mode
+lookup) with synthetic monitors exposing hundreds of modes.
+"""
+
+import random
+import sys
+import time
+
+sys.path.insert(0, "src")
+
+import pyglet
+
+pyglet.options["headless"] = True
+
+from wlr_layout_ui.types import Mode, Screen  # ruff: ignore[module-import-not-at-top-of-file]
+
+RATES = [23.976, 24.0, 25.0, 29.97, 30.0, 48.0, 50.0, 59.94, 60.0, 75.0, 100.0, 119.88, 120.0, 144.0, 165.0, 240.0]
+
+
+def synthetic_screen(count):
+    modes = []
+    width, height = 7680, 4320
+    while len(modes) < count:
+        modes.extend(Mode(width, height, rate) for rate in RATES)
+        width, height = width - 160, height - 90
+    return Screen(uid="DP-1", name="synthetic", available=modes[:count], mode=modes[0])
+
+
+# Previous implementations, kept here as the baseline
+
+
+def linear_resolutions(modes):
+    return sorted({(m.width, m.height) for m in modes}, reverse=True)
+
+
+def linear_frequencies(modes, w, h):
+    return sorted({m.freq for m in modes if m.width == w and m.height == h}, reverse=True)
+
+
+def linear_find(modes, res, freq):
+    for mode in modes:
+        if mode.width == res[0] and mode.height == res[1] and mode.freq == freq:
+            return mode
+    candidates = [m for m in modes if m.width == res[0] and m.height == res[1]]
+    return min(candidates, key=lambda m: abs(m.freq - freq)) if candidates else None
+
+
+def timeit(func, iterations=2000):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    screen = synthetic_screen(count)
+    modes = screen.available
+    rng = random.Random(42)
+    queries = [((m.width, m.height), m.freq + rng.choice((0, 0.3))) for m in rng.sample(modes, 50)]
+
+    def select_linear():
+        return linear_resolutions(modes), linear_frequencies(modes, modes[0].width, modes[0].height)
+
+    def select_index():
+        index = screen.mode_index
+        return index.resolutions, index.frequencies((modes[0].width, modes[0].height))
+
+    def find_linear():
+        for res, freq in queries:
+            linear_find(modes, res, freq)
+
+    def find_index():
+        index = screen.mode_index
+        for res, freq in queries:
+            index.find(res, freq)
+
+    build = timeit(lambda: Screen(uid="x", name="x", available=modes).mode_index, 200)
+    print(f"{count} modes per screen")
+    print(f"  index build         : {build * 1e6:8.1f} us (once per load)")
+    for label, linear, indexed in (
+        ("screen selection", select_linear, select_index),
+        ("50 mode lookups", find_linear, find_index),
+    ):
+        a, b = timeit(linear, 200), timeit(indexed, 200)
+        print(f"  {label:<20}: linear {a * 1e6:8.1f} us, index {b * 1e6:8.1f} us ({a / b:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
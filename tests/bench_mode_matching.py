@@ -0,0 +1,96 @@
+"""Benchmark: numeric current-mode matching vs the former difflib matching.
+
+Usage: python tests/bench_mode_matching.py [iterations]
+
+Runs both matchers over the ``hyprctl -j monitors all`` fixtures, as
+reported (refresh rates like 59.997 never match a "60.00Hz" string exactly)
+and with monitors exposing many modes, and counts the cases where difflib
+picks a different resolution than the one actually in use.
+"""
+
+import difflib
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, "src")
+
+import pyglet
+
+pyglet.options["headless"] = True
+
+from wlr_layout_ui.screens import _current_mode, _parseMode  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.types import Mode, Screen  # ruff: ignore[module-import-not-at-top-of-file]
+
+FIXTURES = Path(__file__).parent / "fixtures" / "hyprland"
+RATES = ["240.00", "165.00", "144.00", "120.00", "100.00", "75.00", "60.00", "59.94", "50.00", "30.00"]
+
+
+def difflib_current_mode(monitor, modes):
+    """The previous implementation."""
+    cur_mode = f"{monitor['width']}x{monitor['height']}@{monitor['refreshRate']:.2f}Hz"
+    modes_str = [repr(m) for m in modes]
+    try:
+        idx = modes_str.index(cur_mode)
+    except (IndexError, ValueError):
+        idx = modes_str.index(difflib.get_close_matches(cur_mode, modes_str)[0])
+    return modes[idx]
+
+
+def many_modes(monitor, count=20):
+    """Same monitor, with *count* resolutions at every refresh rate."""
+    sizes = [(monitor["width"] - 64 * i, monitor["height"] - 36 * i) for i in range(count)]
+    return dict(monitor, availableModes=[f"{w}x{h}@{rate}Hz" for w, h in sizes for rate in RATES])
+
+
+def timeit(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    monitors = []
+    for path in sorted(FIXTURES.glob("monitors*.json")):
+        monitors.extend(json.loads(path.read_text()))
+    scenarios = {
+        "fixtures": monitors,
+        "fixtures, 200 modes each": [many_modes(m) for m in monitors],
+    }
+    for label, entries in scenarios.items():
+        cases = []
+        for monitor in entries:
+            screen = Screen(uid=monitor["name"], name=monitor["description"])
+            screen.available = [Mode(*_parseMode(m)) for m in monitor["availableModes"]]
+            cases.append((monitor, screen))
+
+        def numeric(cases=cases):
+            for monitor, screen in cases:
+                _current_mode(monitor, screen)
+
+        def numeric_cold(cases=cases):
+            for monitor, screen in cases:
+                screen._mode_index = (None, None)  # the index is built once per load, then shared
+                _current_mode(monitor, screen)
+
+        def fuzzy(cases=cases):
+            for monitor, screen in cases:
+                difflib_current_mode(monitor, screen.available)
+
+        wrong = sum(
+            (m.width, m.height) != (monitor["width"], monitor["height"])
+            for monitor, screen in cases
+            for m in [difflib_current_mode(monitor, screen.available)]
+        )
+        a, b, c = timeit(fuzzy, iterations), timeit(numeric, iterations), timeit(numeric_cold, iterations)
+        print(f"{label} ({len(cases)} monitors)")
+        print(f"  difflib               : {a * 1e6:9.1f} us  ({wrong} wrong resolution)")
+        print(f"  numeric               : {b * 1e6:9.1f} us  ({a / b:.1f}x faster)")
+        print(f"  numeric + index build : {c * 1e6:9.1f} us  ({a / c:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
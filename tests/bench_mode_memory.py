@@ -0,0 +1,84 @@
+"""Benchmark: memory used by the display tables.
+
+Usage: python tests/bench_mode_memory.py [outputs] [modes]
+
+Compares the interned ``Mode`` / slotted ``Screen`` representation with the
+previous plain dataclasses, for identical monitors (eg. a video wall), a
+handful of monitor models and the worst case where no two outputs share a
+mode (interning then only adds the lookup table).
+"""
+
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+
+sys.path.insert(0, "src")
+
+import pyglet
+
+pyglet.options["headless"] = True
+
+from wlr_layout_ui.types import Mode, Screen  # ruff: ignore[module-import-not-at-top-of-file]
+
+
+@dataclass
+class LegacyMode:
+    width: int
+    height: int
+    freq: float
+
+
+@dataclass
+class LegacyScreen:
+    uid: str
+    name: str
+    active: bool = False
+    position: tuple = (0, 0)
+    mode: LegacyMode | None = None
+    scale: float = 1
+    available: list = field(default_factory=list)
+    transform: int = 0
+
+
+def mode_table(modes, variant):
+    return [(3840 - 16 * (m // 4), 2160 - 9 * (m // 4), 60.0 + m % 4 + variant / 1000) for m in range(modes)]
+
+
+def build(mode_cls, screen_cls, outputs, modes, models):
+    screens = []
+    for i in range(outputs):
+        available = [mode_cls(*args) for args in mode_table(modes, i % models)]
+        screens.append(screen_cls(uid=f"DP-{i}", name=f"Monitor {i}", mode=available[0], available=available))
+    return screens
+
+
+def measure(mode_cls, screen_cls, outputs, modes, models):
+    Mode._interned.clear()
+    start = time.perf_counter()
+    build(mode_cls, screen_cls, outputs, modes, models)
+    elapsed = time.perf_counter() - start
+
+    Mode._interned.clear()
+    tracemalloc.start()
+    screens = build(mode_cls, screen_cls, outputs, modes, models)
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del screens
+    return size, elapsed
+
+
+def main():
+    outputs = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    modes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    print(f"display tables ({outputs} outputs x {modes} modes)")
+    for label, models in (("identical monitors", 1), ("4 monitor models", 4), ("all distinct", outputs)):
+        legacy, legacy_time = measure(LegacyMode, LegacyScreen, outputs, modes, models)
+        compact, compact_time = measure(Mode, Screen, outputs, modes, models)
+        print(f"  {label}")
+        print(f"    dataclasses : {legacy / 1024:8.1f} KiB  {legacy_time * 1e3:6.2f} ms")
+        print(f"    interned    : {compact / 1024:8.1f} KiB  {compact_time * 1e3:6.2f} ms  (x{compact / legacy:.2f} memory)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark: minimal apply plans.
+
+Usage: python tests/bench_plan.py [heads]
+
+Builds the commands of a layout of 16 heads (by default) through every
+backend, without the live state (full configuration, the former behaviour)
+and with it, for an unchanged layout, one moved head and one mode change.
+Reports the time to plan and build the commands and how many outputs they
+reconfigure.
+"""
+
+import re
+import sys
+import time
+
+sys.path.insert(0, "src")
+
+import pyglet
+
+pyglet.options["headless"] = True
+
+from wlr_layout_ui import utils  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.plan import snapshot  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.types import Mode, Rect, Screen  # ruff: ignore[module-import-not-at-top-of-file]
+
+BUILDERS = {
+    "hyprland": utils._make_command_hyprland_old,
+    "hyprland-lua": utils._make_command_hyprland_lua,
+    "sway": utils.make_command_sway,
+    "wlr-randr": lambda screens, rects, live: utils.make_command_legacy(screens, rects, wayland=True, live=live),
+    "xrandr": lambda screens, rects, live: utils.make_command_legacy(screens, rects, wayland=False, live=live),
+}
+
+
+def layout(heads):
+    modes = [Mode(1920, 1080, 60.0), Mode(1280, 720, 60.0)]
+    screens = [
+        Screen(uid=f"DP-{i}", name=f"wall {i}", active=True, mode=modes[0], position=(i * 1920, 0), available=modes) for i in range(heads)
+    ]
+    rects = [Rect(i * 1920, -1080, 1920, 1080) for i in range(heads)]
+    return screens, rects
+
+
+def reconfigured(cmds):
+    return len({name for cmd in cmds for name in re.findall(r"DP-\d+", cmd)})
+
+
+def best_of(func, repeat=200):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    heads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    print(f"{heads} heads")
+    for name, build in BUILDERS.items():
+        screens, rects = layout(heads)
+        live = snapshot(screens)
+        moved = [*rects[:-1], Rect(rects[-1].x + 100, -1080, 1920, 1080)]
+        cases = {"full": (None, rects), "unchanged": (live, rects), "one moved": (live, moved)}
+        print(f"  {name}")
+        for case, (state, case_rects) in cases.items():
+            cmds = build(screens, case_rects, state)
+            outputs = reconfigured(cmds)
+            duration = best_of(lambda build=build, screens=screens, state=state, case_rects=case_rects: build(screens, case_rects, state))
+            print(f"    {case:<10}: {duration * 1e6:7.1f} us, {len(cmds)} command(s), {outputs} output(s) reconfigured")
+        screens[0].mode = screens[0].available[1]
+        cmds = build(screens, rects, live)
+        print(f"    {'one mode':<10}: {len(cmds)} command(s), {reconfigured(cmds)} output(s) reconfigured")
+
+
+if __name__ == "__main__":
+    main()
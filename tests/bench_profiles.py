@@ -0,0 +1,120 @@
+"""Benchmark: the profile store with a large profile library.
+
+Usage: python tests/bench_profiles.py [profiles]
+
+Writes a library of 1000 profiles (by default) of one to three outputs to a
+temporary file and reports, best of 20:
+
+- load: a cold parse of the file and a revalidated read of the store, against
+  the former ``tomli.load`` on every read
+- save: saving one profile through the store, against the former parse +
+  full rewrite
+- match: finding the profile of the plugged screens among all of them, by
+  scanning the profiles and through the index (built once, then reused)
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, "src")
+
+import pyglet
+import tomli
+import tomli_w
+
+pyglet.options["headless"] = True
+
+from wlr_layout_ui.profiles import ProfileIndex, ProfileStore, find_matching_profile  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.types import Mode, Screen  # ruff: ignore[module-import-not-at-top-of-file]
+
+CONNECTORS = ["eDP-1", "DP-1", "DP-2", "DP-3", "HDMI-A-1", "HDMI-A-2"]
+
+
+def library(count):
+    profiles = {}
+    for i in range(count):
+        uids = [CONNECTORS[(i + n) % len(CONNECTORS)] for n in range(1 + i % 3)]
+        profiles[f"profile {i:04d}"] = [
+            {
+                "name": f"Monitor {i} {uid}",
+                "uid": uid,
+                "active": True,
+                "width": 1920,
+                "height": 1080,
+                "freq": 60.0,
+                "x": 1920 * n,
+                "y": 0,
+                "scale": 1.0,
+                "transform": 0,
+                "identity": f"ACME:Monitor {i}:{n:08d}",
+            }
+            for n, uid in enumerate(uids)
+        ]
+    return profiles
+
+
+def best_of(func, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def legacy_load(path):
+    with path.open("rb") as f:
+        return tomli.load(f)
+
+
+def legacy_save(path, name, data):
+    profiles = legacy_load(path)
+    profiles[name] = data
+    with path.open("wb") as f:
+        tomli_w.dump(profiles, f)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    profiles = library(count)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "wlrlui.toml"
+        path.write_text(tomli_w.dumps(profiles))
+        print(f"{count} profiles, {path.stat().st_size / 1024:.0f} KiB")
+
+        def cold():
+            ProfileStore(path).load()
+
+        store = ProfileStore(path)
+        store.load()
+        print(f"  {'load (parse)':<16}: {best_of(cold) * 1e3:8.2f} ms")
+        print(
+            f"  {'load (cached)':<16}: {best_of(store.load) * 1e3:8.3f} ms  (tomli.load: {best_of(lambda: legacy_load(path)) * 1e3:.2f} ms)"
+        )
+
+        entry = profiles["profile 0000"]
+        store_save = best_of(lambda: store.save("new", entry))
+        old_save = best_of(lambda: legacy_save(path, "new", entry))
+        print(f"  {'save':<16}: {store_save * 1e3:8.2f} ms  (parse + rewrite: {old_save * 1e3:.2f} ms)")
+
+        modes = [Mode(1920, 1080, 60.0)]
+        screens = [Screen(uid=uid, name=uid, active=True, mode=modes[0], available=modes) for uid in ("DP-1", "DP-2")]
+        loaded = store.load()
+        key = find_matching_profile(loaded, screens)
+        print(f"  {'match (scan)':<16}: {best_of(lambda: find_matching_profile(loaded, screens)) * 1e3:8.3f} ms  ({key})")
+        unknown = [Screen(uid=uid, name=uid, active=True, mode=modes[0], available=modes) for uid in ("DP-9", "HDMI-A-9")]
+        print(f"  {'no match (scan)':<16}: {best_of(lambda: find_matching_profile(loaded, unknown)) * 1e3:8.3f} ms")
+
+        index = ProfileIndex(store, Path(tmp) / "index.json")
+        start = time.perf_counter()
+        index.refresh()
+        print(f"  {'index build':<16}: {(time.perf_counter() - start) * 1e3:8.2f} ms")
+        key = index.match(screens)
+        print(f"  {'match (index)':<16}: {best_of(lambda: index.match(screens)) * 1e3:8.3f} ms  ({key})")
+        print(f"  {'no match (index)':<16}: {best_of(lambda: index.match(unknown)) * 1e3:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
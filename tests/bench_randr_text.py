@@ -0,0 +1,151 @@
+"""Benchmark: streaming wlr-randr / xrandr parsers.
+
+Usage: python tests/bench_randr_text.py [heads] [modes]
+
+Parses synthetic outputs (64 heads x 300 modes by default) with the
+streaming parsers and with the former line loop of ``screens.py``, then
+compares reading the whole output of a child process before parsing with
+parsing straight from its pipe while it is still writing (the child
+pauses 1 ms after each head, like a tool querying the outputs one by one).
+"""
+
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, "src")
+
+import pyglet
+
+pyglet.options["headless"] = True
+
+from wlr_layout_ui import randr_text  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.types import Mode, Screen  # ruff: ignore[module-import-not-at-top-of-file]
+
+RATES = [240.0, 165.0, 144.0, 120.0, 100.0, 75.0, 60.0, 59.94, 50.0, 30.0]
+
+PRODUCER = """
+import sys, time
+for chunk in open(sys.argv[1]).read().split("\\n\\n"):
+    sys.stdout.write(chunk + "\\n")
+    sys.stdout.flush()
+    time.sleep(0.001)
+"""
+
+
+def wlr_randr_output(heads, modes):
+    out = []
+    for h in range(heads):
+        out.append(f'HEADLESS-{h} "Headless output {h} (HEADLESS-{h})"\n  Enabled: yes\n  Modes:\n')
+        for m in range(modes):
+            flags = " (preferred, current)" if m == 0 else ""
+            out.append(f"    {7680 - 16 * (m // 10)}x{4320 - 9 * (m // 10)} px, {RATES[m % 10]:.6f} Hz{flags}\n")
+        out.append(f"  Position: {h * 7680},0\n  Transform: normal\n  Scale: 1.000000\n\n")
+    return "".join(out)
+
+
+def xrandr_output(heads, modes):
+    out = ["Screen 0: minimum 8 x 8, current 7680 x 4320, maximum 32767 x 32767\n"]
+    for h in range(heads):
+        out.append(f"DP-{h} connected 7680x4320+{h * 7680}+0 (normal left inverted right x axis y axis) 600mm x 340mm\n")
+        for m in range(0, modes, 10):
+            rates = "  ".join(f"{r:6.2f}{'*' if m == i == 0 else ' '}{'+' if m == i == 0 else ' '}" for i, r in enumerate(RATES))
+            out.append(f"   {7680 - 16 * (m // 10)}x{4320 - 9 * (m // 10)}  {rates}\n")
+        out.append("\n")
+    return "".join(out)
+
+
+def legacy_parse(out, legacy):
+    """The former parser of screens.py, kept as the baseline."""
+    screens = []
+    modes = []
+    current_screen = None
+    mode_mode = False
+    for line in out.splitlines():
+        if not line:
+            continue
+        if legacy and ("disconnected" in line or line.startswith("Screen")):
+            continue
+        if line[0] != " ":
+            uid, name = line.split(None, 1)
+            current_screen = Screen(uid=uid, name=name.strip('"'))
+            screens.append(current_screen)
+            modes.append([])
+            mode_mode = False
+        else:
+            if line[2] != " ":
+                mode_mode = False
+            sline = line.strip()
+            if legacy:
+                res, freq = sline.split(None, 1)
+                if not res.endswith("i"):
+                    w, h = (int(x) for x in res.split("x"))
+                    current = "*" in freq
+                    freq = freq.split(None, 1)[0].rstrip("*+")
+                    modes[-1].append(Mode(w, h, float(freq)))
+                    if current:
+                        current_screen.mode = modes[-1][-1]
+            elif mode_mode:
+                res, freq = sline.split(",", 1)
+                res = res.split(None, 1)[0]
+                w, h = (int(x) for x in res.split("x"))
+                freq, comment = freq.strip().split(None, 1)
+                modes[-1].append(Mode(w, h, float(freq)))
+                if "current" in comment:
+                    current_screen.mode = modes[-1][-1]
+            elif sline.startswith("Modes:"):
+                mode_mode = True
+            elif sline.startswith("Enabled"):
+                current_screen.active = "yes" in sline
+            elif sline.startswith("Position"):
+                pos_parts = [int(x) for x in sline.split(":")[1].strip().split(",")]
+                current_screen.position = (pos_parts[0], pos_parts[1])
+    for screen, available in zip(screens, modes):
+        screen.available = available
+    return screens
+
+
+def best_of(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        Mode._interned.clear()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    heads = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    modes = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    for tool, output in (("wlr-randr", wlr_randr_output(heads, modes)), ("xrandr", xrandr_output(heads, modes))):
+        lines = output.count("\n")
+        parsed = randr_text.parse(output, tool)
+        assert not parsed.errors, parsed.errors[:3]
+        found = sum(len(s.available) for s in parsed.screens)
+        new = best_of(lambda output=output, tool=tool: randr_text.parse(output, tool))
+        old = best_of(lambda output=output, tool=tool: legacy_parse(output, tool == "xrandr"))
+        legacy_found = sum(len(s.available) for s in legacy_parse(output, tool == "xrandr"))
+
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".txt") as f:
+            f.write(output)
+            f.flush()
+            args = [sys.executable, "-c", PRODUCER, f.name]
+
+            def read_then_parse(args=args, tool=tool):
+                out = subprocess.run(args, capture_output=True, text=True, check=True).stdout
+                randr_text.parse(out, tool)
+
+            piped = best_of(lambda args=args, tool=tool: randr_text.run(tool, args=args), 3)
+            buffered = best_of(read_then_parse, 3)
+
+        print(f"{tool}: {heads} heads, {found} modes, {lines} lines, {len(output) / 1024:.0f} KiB")
+        print(f"  parse, former loop : {old * 1e3:7.2f} ms  ({legacy_found} modes found)")
+        print(f"  parse, streaming   : {new * 1e3:7.2f} ms  ({lines / new / 1e6:.2f} M lines/s, {len(output) / new / 2**20:.1f} MiB/s)")
+        print(f"  child, read+parse  : {buffered * 1e3:7.2f} ms")
+        print(f"  child, from pipe   : {piped * 1e3:7.2f} ms  ({(buffered - piped) * 1e3:.2f} ms saved)")
+
+
+if __name__ == "__main__":
+    main()
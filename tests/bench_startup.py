@@ -0,0 +1,157 @@
+"""Benchmark: GUI startup, from exec to the first drawn frame.
+
+Usage: python tests/bench_startup.py [--json] [--runs N] [backend/capture ...]
+
+Starts the GUI in a fresh headless interpreter (``pyglet.options["headless"]``)
+on recorded display captures (see ``tests/replay.py``), ``hyprland/monitors``,
+``wlr-randr/laptop-dock`` and ``xrandr/16-heads`` by default, and reports the
+median over 5 runs (by default) of each phase:
+
+- interpreter: from exec to the first line of the script
+- import pyglet / import app / import gui: the modules, cold
+- window: ``app.make_window()``, split into load (probing the displays),
+  UI.__init__ (building the window and its widgets), sync_profiles (reading
+  the profiles) and load_screens (the screen widgets)
+- first frame: the first ``on_draw`` + flip
+- second frame: the next one, for comparison
+- total: from exec to the end of the first frame
+
+The window and the frames also report the time spent loading the icons and
+the fonts, and rendering the glyphs.
+
+With ``--json``, prints the medians and every sample as JSON instead, to
+track regressions across releases.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+DEFAULT_CAPTURES = ["hyprland/monitors", "wlr-randr/laptop-dock", "xrandr/16-heads"]
+
+
+def child(capture):
+    """Start the GUI on *capture* and print the phase durations as JSON."""
+    start = time.time()
+    phases: dict[str, float] = {}
+    current = []
+
+    def timed(name, func):
+        def wrapper(*args, **kwargs: object):
+            begin = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                key = f"{current[-1]}/{name}"  # accounted to the enclosing step
+                phases[key] = phases.get(key, 0.0) + time.perf_counter() - begin
+
+        return wrapper
+
+    def step(name):
+        class Step:
+            def __enter__(self):
+                current.append(name)
+                self.begin = time.perf_counter()
+
+            def __exit__(self, *exc):
+                phases[name] = time.perf_counter() - self.begin
+                current.pop()
+
+        return Step()
+
+    sys.path.insert(0, "src")
+    with step("import pyglet"):
+        import pyglet  # ruff: ignore[import-outside-top-level]
+
+        pyglet.options["headless"] = True
+    with step("import app"):
+        from wlr_layout_ui import app  # ruff: ignore[import-outside-top-level]
+    with step("import gui"):
+        from wlr_layout_ui import gui  # ruff: ignore[import-outside-top-level]
+
+    import pyglet.font.base  # ruff: ignore[import-outside-top-level]
+    from replay import replay  # ruff: ignore[import-outside-top-level]
+
+    app.load = timed("load", app.load)
+    gui.UI.__init__ = timed("UI.__init__", gui.UI.__init__)
+    gui.UI.sync_profiles = timed("sync_profiles", gui.UI.sync_profiles)
+    gui.UI.load_screens = timed("load_screens", gui.UI.load_screens)
+    pyglet.image.load = timed("icons", pyglet.image.load)
+    pyglet.font.load = timed("fonts", pyglet.font.load)
+    pyglet.font.base.Font.create_glyph = timed("glyphs", pyglet.font.base.Font.create_glyph)
+
+    backend, name = capture.split("/")
+    with replay(backend, name), step("window"):
+        window = app.make_window()
+    window._enable_event_queue = False  # dispatch on_draw right away, like pyglet.app.run()
+    for frame in ("first frame", "second frame"):
+        with step(frame):
+            window.draw(0)
+        if frame == "first frame":
+            end = time.time()
+    window.close()
+    print(json.dumps({"start": start, "end": end, "phases": phases}))
+
+
+def run(capture, home):
+    env = {key: value for key, value in os.environ.items() if key not in ("DISPLAY", "WAYLAND_DISPLAY")}
+    env["HOME"] = home  # no profiles
+    launched = time.time()
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", capture],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parent.parent,
+    )
+    result = json.loads(proc.stdout.splitlines()[-1])
+    phases = {"interpreter": result["start"] - launched, **result["phases"], "total": result["end"] - launched}
+    return {phase: duration * 1e3 for phase, duration in phases.items()}
+
+
+def main():
+    args = sys.argv[1:]
+    if args[:1] == ["--child"]:
+        child(args[1])
+        return
+    as_json = "--json" in args
+    args = [arg for arg in args if arg != "--json"]
+    runs = 5
+    if "--runs" in args:
+        position = args.index("--runs")
+        runs = int(args[position + 1])
+        del args[position : position + 2]
+    report = {"python": platform.python_version(), "runs": runs, "captures": {}}
+    with tempfile.TemporaryDirectory() as home:
+        for capture in args or DEFAULT_CAPTURES:
+            samples: dict[str, list[float]] = {}
+            for _ in range(runs):
+                for phase, duration in run(capture, home).items():
+                    samples.setdefault(phase, []).append(round(duration, 3))
+            medians = {phase: round(statistics.median(values), 3) for phase, values in samples.items()}
+            report["captures"][capture] = {"median_ms": medians, "samples_ms": samples}
+    if as_json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"median of {runs} runs, ms")
+    for capture, data in report["captures"].items():
+        print(f"  {capture}")
+        medians = data["median_ms"]
+        for phase, duration in medians.items():
+            if "/" in phase:
+                continue
+            print(f"    {phase:<16}: {duration:8.1f}")
+            for sub, sub_duration in medians.items():
+                if sub.startswith(f"{phase}/"):
+                    print(f"      {sub.partition('/')[2]:<14}: {sub_duration:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
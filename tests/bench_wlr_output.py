@@ -0,0 +1,82 @@
+"""Benchmark: wlr-output-management protocol client vs ``wlr-randr``.
+
+Usage: python tests/bench_wlr_output.py [iterations]
+
+Meant to run against a real wlroots compositor, eg. a headless sway::
+
+    WLR_BACKENDS=headless WLR_LIBINPUT_NO_DEVICES=1 sway &
+    WAYLAND_DISPLAY=wayland-1 python tests/bench_wlr_output.py
+
+Without ``WAYLAND_DISPLAY`` a fake compositor is used; ``wlr-randr`` is only
+timed when installed.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, "src")
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pyglet
+
+pyglet.options["headless"] = True
+
+from fakes import FakeWaylandCompositor  # ruff: ignore[module-import-not-at-top-of-file]
+
+from wlr_layout_ui import wlr_output  # ruff: ignore[module-import-not-at-top-of-file]
+
+
+def timeit(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def fake_heads(count=4, modes=60):
+    return [
+        {
+            "name": f"HEADLESS-{i + 1}",
+            "description": f"Headless output {i + 1}",
+            "modes": [(3840 - 32 * m, 2160 - 18 * m, 60000 + m, m == 0) for m in range(modes)],
+            "current": 0,
+            "enabled": True,
+            "position": (3840 * i, 0),
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    compositor = None
+    if os.environ.get("WAYLAND_DISPLAY"):
+        label = f"compositor on {os.environ['WAYLAND_DISPLAY']}"
+    else:
+        label = "fake compositor"
+        compositor = FakeWaylandCompositor(tempfile.mkdtemp(prefix="wlrlui"), fake_heads())
+        os.environ.update(compositor.environ())
+
+    try:
+        heads = len(wlr_output.load_screens())
+        protocol = timeit(wlr_output.load_screens, iterations)
+        wlr_randr = timeit(lambda: subprocess.getoutput("wlr-randr"), iterations) if shutil.which("wlr-randr") else None
+    finally:
+        if compositor:
+            compositor.close()
+
+    print(f"output listing ({label}, {heads} heads, {iterations} iterations)")
+    print(f"  protocol  : {protocol * 1e6:9.1f} us (enumeration + Screen objects)")
+    if wlr_randr is not None:
+        print(f"  wlr-randr : {wlr_randr * 1e6:9.1f} us (subprocess only, text not parsed)  ({wlr_randr / protocol:.1f}x slower)")
+    else:
+        print("  wlr-randr : not installed")
+
+
+if __name__ == "__main__":
+    main()
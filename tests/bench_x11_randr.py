@@ -0,0 +1,66 @@
+"""Benchmark: libXrandr backend vs ``xrandr`` + text parsing.
+
+Usage: python tests/bench_x11_randr.py [iterations]
+
+Starts a private ``Xvfb`` with RandR enabled (unless ``BENCH_DISPLAY`` names
+an existing server) and times listing the outputs both ways.  ``xrandr`` is
+only timed when installed.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, "src")
+
+import pyglet
+
+pyglet.options["headless"] = True
+
+from wlr_layout_ui import randr_text, x11_randr  # ruff: ignore[module-import-not-at-top-of-file]
+
+
+def timeit(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    server = None
+    display = os.environ.get("BENCH_DISPLAY")
+    if display is None:
+        if not shutil.which("Xvfb"):
+            print("Xvfb not installed, set BENCH_DISPLAY to use a running X server")
+            return
+        display = ":74"
+        server = subprocess.Popen(["Xvfb", display, "-screen", "0", "1920x1080x24", "+extension", "RANDR"], stderr=subprocess.DEVNULL)
+        time.sleep(0.5)
+    os.environ["DISPLAY"] = display
+    try:
+        try:
+            outputs = len(x11_randr.load_screens())
+        except x11_randr.XRandRError as e:
+            print(f"libXrandr backend unavailable: {e}")
+            return
+        native = timeit(x11_randr.load_screens, iterations)
+        text = timeit(lambda: randr_text.run("xrandr"), iterations) if shutil.which("xrandr") else None
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    print(f"output listing on {display} ({outputs} outputs, {iterations} iterations)")
+    print(f"  libXrandr      : {native * 1e6:9.1f} us")
+    if text is not None:
+        print(f"  xrandr + parse : {text * 1e6:9.1f} us  ({text / native:.1f}x slower)")
+    else:
+        print("  xrandr         : not installed")
+
+
+if __name__ == "__main__":
+    main()
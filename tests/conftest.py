@@ -0,0 +1,65 @@
+"""Shared fixtures: the fake compositors of ``fakes.py``, with the environment pointing to them."""
+
+import sys
+
+sys.path.insert(0, "src")
+
+import pyglet
+import pytest
+
+pyglet.options["headless"] = True
+
+from fakes import FakeHyprland  # ruff: ignore[module-import-not-at-top-of-file]
+
+from wlr_layout_ui import hyprland, sway, utils  # ruff: ignore[module-import-not-at-top-of-file]
+
+
+def _drop_clients():
+    hyprland.get_client.cache_clear()
+    sway.get_client.cache_clear()
+    utils._using_lua_syntax.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    """Keep the files written by the tests out of the user's cache directory."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Return a function pointing the environment to a fake server, which is closed after the test.
+
+    The cached compositor clients are dropped, so the next query connects to
+    the server.
+    """
+    servers = []
+
+    def start(server):
+        for key, value in server.environ().items():
+            monkeypatch.setenv(key, value)
+        _drop_clients()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+    _drop_clients()
+
+
+@pytest.fixture
+def no_hyprland(tmp_path, monkeypatch):
+    """Make sure no Hyprland socket can be found."""
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    monkeypatch.setenv("HYPRLAND_INSTANCE_SIGNATURE", "missing")
+    hyprland.get_client.cache_clear()
+    yield
+    hyprland.get_client.cache_clear()
+
+
+@pytest.fixture
+def fake_hyprland(tmp_path, serve):
+    """A fake Hyprland instance replying with the recorded fixtures."""
+    return serve(FakeHyprland.from_fixtures(tmp_path))
@@ -0,0 +1,459 @@
+"""Fake compositor endpoints used by the tests and benchmarks.
+
+They listen on real Unix sockets (in a temporary directory) so the code under
+test runs unmodified, socket calls included.
+"""
+
+import contextlib
+import re
+import socket
+import struct
+import threading
+from pathlib import Path
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class FakeHyprland:
+    """Serve canned replies on a fake Hyprland ``.socket.sock``.
+
+    ``replies`` maps a request (eg. ``"j/monitors all"``) to the reply text.
+    Unknown requests get ``"ok"``.  Received requests are kept in ``requests``.
+    """
+
+    signature = "fake"
+
+    def __init__(self, runtime_dir, replies=None):
+        self.runtime_dir = Path(runtime_dir)
+        self.replies = dict(replies or {})
+        self.requests: list[str] = []
+        self.directory = self.runtime_dir / "hypr" / self.signature
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / ".socket.sock"
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(str(self.path))
+        self._server.listen(8)
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_fixtures(cls, runtime_dir, name="hyprland") -> "FakeHyprland":
+        """Build a server replying with the ``version`` and ``monitors`` fixtures."""
+        folder = FIXTURES / name
+        return cls(
+            runtime_dir,
+            {
+                "j/version": (folder / "version.json").read_text(),
+                "j/monitors all": (folder / "monitors.json").read_text(),
+            },
+        )
+
+    def environ(self):
+        """Return the environment variables pointing to this instance."""
+        return {"XDG_RUNTIME_DIR": str(self.runtime_dir), "HYPRLAND_INSTANCE_SIGNATURE": self.signature}
+
+    def reply_for(self, request):
+        if request.startswith("[[BATCH]]"):
+            return "\n\n".join(self.reply_for(part.strip()) for part in request[9:].split(";"))
+        return self.replies.get(request, "ok")
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            with conn:
+                request = conn.recv(65536).decode()
+                self.requests.append(request)
+                conn.sendall(self.reply_for(request).encode())
+
+    def close(self):
+        with contextlib.suppress(OSError):
+            self._server.shutdown(socket.SHUT_RDWR)
+        self._server.close()
+        if self.path.exists():
+            self.path.unlink()
+
+
+class FakeHyprlandEvents:
+    """Broadcast events on a fake Hyprland ``.socket2.sock``."""
+
+    def __init__(self, directory):
+        self.path = Path(directory) / ".socket2.sock"
+        self.clients: list[socket.socket] = []
+        self._connected = threading.Event()
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(str(self.path))
+        self._server.listen(8)
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            self.clients.append(conn)
+            self._connected.set()
+
+    def wait_client(self, timeout=2.0):
+        return self._connected.wait(timeout)
+
+    def emit(self, event, data=""):
+        for client in self.clients:
+            with contextlib.suppress(OSError):  # the client went away
+                client.sendall(f"{event}>>{data}\n".encode())
+
+    def close(self):
+        for client in self.clients:
+            client.close()
+        with contextlib.suppress(OSError):
+            self._server.shutdown(socket.SHUT_RDWR)
+        self._server.close()
+        if self.path.exists():
+            self.path.unlink()
+
+
+class FakeHyprlandCompositor(FakeHyprland):
+    """A FakeHyprland whose outputs can be toggled with ``eval hl.monitor(...)``.
+
+    Toggles take effect *delay* seconds after the request, like a compositor
+    doing a modeset, and are then announced on *events* (a
+    :class:`FakeHyprlandEvents`) if given.  ``monitors`` is the
+    ``j/monitors all`` reply, kept up to date.  ``keyword monitor`` requests
+    configure the outputs right away, except the ones listed in ``refuse``
+    which are left as they are (the request still succeeds).
+    """
+
+    TOGGLE_RE = re.compile(r'hl\.monitor\(\{output="([^"]+)", disabled=(true|false)\}\)')
+    KEYWORD_RE = re.compile(r"keyword monitor ([^,]+),(\d+)x(\d+)@([\d.]+)Hz,(-?\d+)x(-?\d+),([\d.]+),transform,(\d)")
+
+    def __init__(self, runtime_dir, monitors=None, delay=0.0, events=None):
+        import json  # ruff: ignore[import-outside-top-level]
+
+        self._json = json
+        folder = FIXTURES / "hyprland"
+        self.monitors = monitors if monitors is not None else json.loads((folder / "monitors.json").read_text())
+        self.delay = delay
+        self.events = events
+        self.refuse: set[str] = set()
+        super().__init__(runtime_dir, {"j/version": (folder / "version.json").read_text()})
+
+    def reply_for(self, request):
+        if request == "j/monitors all":
+            return self._json.dumps(self.monitors)
+        if request.startswith("eval "):
+            toggles = {name: value == "true" for name, value in self.TOGGLE_RE.findall(request)}
+            if self.delay:
+                threading.Timer(self.delay, self.toggle, (toggles,)).start()
+            else:
+                self.toggle(toggles)
+            return "ok"
+        if request.startswith("keyword monitor "):
+            self.configure(request)
+            return "ok"
+        return super().reply_for(request)
+
+    def configure(self, request):
+        """Apply a ``keyword monitor`` request."""
+        name = request[16:].split(",", 1)[0]
+        monitor = next((m for m in self.monitors if m["name"] == name), None)
+        if monitor is None or name in self.refuse:
+            return
+        if request.endswith(",disable"):
+            monitor["disabled"] = True
+            return
+        _, width, height, rate, x, y, scale, transform = self.KEYWORD_RE.match(request).groups()
+        monitor.update(
+            width=int(width), height=int(height), refreshRate=float(rate), x=int(x), y=int(y), scale=float(scale), transform=int(transform)
+        )
+        monitor["disabled"] = False
+
+    def toggle(self, toggles):
+        """Enable or disable outputs, ``toggles`` maps output names to their ``disabled`` flag."""
+        for monitor in self.monitors:
+            disabled = toggles.get(monitor["name"])
+            if disabled is None or disabled == monitor.get("disabled", False):
+                continue
+            monitor["disabled"] = disabled
+            if self.events is not None:
+                self.events.emit("monitorremoved" if disabled else "monitoradded", monitor["name"])
+
+
+class FakeWaylandCompositor:
+    """Minimal compositor implementing ``zwlr_output_manager_v1`` on a Unix socket.
+
+    ``heads`` is a list of dicts with ``name``, ``description``, ``modes``
+    (``(width, height, refresh_mhz, preferred)`` tuples), ``current`` (index in
+    modes or None), ``enabled``, ``position``, ``transform`` and ``scale``.
+    Applied configurations update ``heads`` and are kept in ``applied``.
+    """
+
+    def __init__(self, runtime_dir, heads, display="wayland-fake"):
+        from wlr_layout_ui.wlr_output import pack_args, unpack_args  # ruff: ignore[import-outside-top-level]
+
+        self._pack = pack_args
+        self._unpack = unpack_args
+        self.heads = heads
+        self.applied: list[dict] = []
+        self.runtime_dir = Path(runtime_dir)
+        self.display = display
+        self.path = self.runtime_dir / display
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(str(self.path))
+        self._server.listen(8)
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def environ(self):
+        return {"XDG_RUNTIME_DIR": str(self.runtime_dir), "WAYLAND_DISPLAY": self.display}
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            with conn, contextlib.suppress(OSError):
+                _Session(self, conn).run()
+
+    def close(self):
+        with contextlib.suppress(OSError):
+            self._server.shutdown(socket.SHUT_RDWR)
+        self._server.close()
+        if self.path.exists():
+            self.path.unlink()
+
+
+class _Session:
+    """One client connection to a FakeWaylandCompositor."""
+
+    def __init__(self, compositor, conn):
+        self.compositor = compositor
+        self.conn = conn
+        self.objects: dict[int, str] = {1: "display"}
+        self.next_server_id = 0xFF000000
+        self.head_ids: dict[int, int] = {}  # object id -> index in heads
+        self.mode_ids: dict[int, tuple[int, int]] = {}  # object id -> (head index, mode index)
+        self.config_heads: dict[int, dict] = {}
+        self.config: dict[int, dict] = {}
+
+    def event(self, obj_id, opcode, signature="", *args):
+        payload = self.compositor._pack(signature, args)
+        self.conn.sendall(struct.pack("=II", obj_id, ((len(payload) + 8) << 16) | opcode) + payload)
+
+    def server_id(self, kind):
+        self.next_server_id += 1
+        self.objects[self.next_server_id] = kind
+        return self.next_server_id
+
+    def run(self):
+        buffer = b""
+        while True:
+            chunk = self.conn.recv(65536)
+            if not chunk:
+                return
+            buffer += chunk
+            while len(buffer) >= 8:
+                obj_id, size_opcode = struct.unpack_from("=II", buffer)
+                size = size_opcode >> 16
+                if len(buffer) < size:
+                    break
+                payload, buffer = buffer[8:size], buffer[size:]
+                self.request(obj_id, size_opcode & 0xFFFF, payload)
+
+    def request(self, obj_id, opcode, payload):
+        kind = self.objects.get(obj_id)
+        unpack = self.compositor._unpack
+        if kind == "display":
+            (new_id,) = unpack("n", payload)
+            if opcode == 0:  # sync
+                self.event(new_id, 0, "u", 0)
+                self.event(1, 1, "u", new_id)
+            else:  # get_registry
+                self.objects[new_id] = "registry"
+                self.event(new_id, 0, "usu", 1, "wl_compositor", 4)
+                self.event(new_id, 0, "usu", 2, "zwlr_output_manager_v1", 4)
+        elif kind == "registry":
+            _name, _iface, _version, new_id = unpack("usun", payload)
+            self.objects[new_id] = "manager"
+            self.send_heads(new_id)
+        elif kind == "manager" and opcode == 0:
+            new_id, _serial = unpack("nu", payload)
+            self.objects[new_id] = "config"
+            self.config[new_id] = {}
+        elif kind == "config":
+            self.config_request(obj_id, opcode, payload)
+        elif kind == "config_head":
+            state = self.config_heads[obj_id]
+            signature, key = {0: ("o", "mode"), 1: ("iii", "custom_mode"), 2: ("ii", "position"), 3: ("i", "transform"), 4: ("f", "scale")}[
+                opcode
+            ]
+            values = unpack(signature, payload)
+            state[key] = values[0] if len(values) == 1 else tuple(values)
+
+    def config_request(self, obj_id, opcode, payload):
+        unpack = self.compositor._unpack
+        heads = self.compositor.heads
+        config = self.config[obj_id]
+        if opcode == 0:  # enable_head
+            new_id, head_id = unpack("no", payload)
+            self.objects[new_id] = "config_head"
+            state = self.config_heads[new_id] = {"enabled": True}
+            config[heads[self.head_ids[head_id]]["name"]] = state
+        elif opcode == 1:  # disable_head
+            (head_id,) = unpack("o", payload)
+            config[heads[self.head_ids[head_id]]["name"]] = {"enabled": False}
+        elif opcode in {2, 3}:  # apply, test
+            if len(config) != len(heads):
+                self.event(obj_id, 1)  # failed
+                return
+            if opcode == 2:
+                self.apply(config)
+            self.event(obj_id, 0)  # succeeded
+
+    def apply(self, config):
+        self.compositor.applied.append(config)
+        for head in self.compositor.heads:
+            state = config[head["name"]]
+            head["enabled"] = state["enabled"]
+            if "mode" in state:
+                head["current"] = self.mode_ids[state["mode"]][1]
+            for key in ("position", "transform", "scale"):
+                if key in state:
+                    head[key] = state[key]
+
+    def send_heads(self, manager):
+        for index, head in enumerate(self.compositor.heads):
+            head_id = self.server_id("head")
+            self.head_ids[head_id] = index
+            self.event(manager, 0, "n", head_id)
+            self.event(head_id, 0, "s", head["name"])
+            self.event(head_id, 1, "s", head["description"])
+            mode_ids = []
+            for mode_index, (width, height, refresh, preferred) in enumerate(head["modes"]):
+                mode_id = self.server_id("mode")
+                self.mode_ids[mode_id] = (index, mode_index)
+                mode_ids.append(mode_id)
+                self.event(head_id, 3, "n", mode_id)
+                self.event(mode_id, 0, "ii", width, height)
+                self.event(mode_id, 1, "i", refresh)
+                if preferred:
+                    self.event(mode_id, 2)
+            self.event(head_id, 4, "i", int(head["enabled"]))
+            if head["enabled"] and head.get("current") is not None:
+                self.event(head_id, 5, "o", mode_ids[head["current"]])
+            self.event(head_id, 6, "ii", *head.get("position", (0, 0)))
+            self.event(head_id, 7, "i", head.get("transform", 0))
+            self.event(head_id, 8, "f", head.get("scale", 1.0))
+        self.event(manager, 1, "u", 1)
+
+
+class FakeSway:
+    """Serve the i3-ipc protocol on a fake ``$SWAYSOCK``.
+
+    ``outputs`` is the ``GET_OUTPUTS`` reply; ``output`` commands received
+    with ``RUN_COMMAND`` update it.  Received ``(type, payload)`` messages are
+    kept in ``messages`` and the number of connections in ``connections``.
+    """
+
+    def __init__(self, runtime_dir, outputs=None):
+        import json  # ruff: ignore[import-outside-top-level]
+
+        self._json = json
+        if outputs is None:
+            outputs = json.loads((FIXTURES / "sway" / "outputs.json").read_text())
+        self.outputs = outputs
+        self.messages: list[tuple[int, str]] = []
+        self.connections = 0
+        self.path = Path(runtime_dir) / "sway-ipc.fake.sock"
+        self._clients: list[socket.socket] = []
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(str(self.path))
+        self._server.listen(8)
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def environ(self):
+        return {"SWAYSOCK": str(self.path)}
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            self._clients.append(conn)
+            threading.Thread(target=self._session, args=(conn,), daemon=True).start()
+
+    def _session(self, conn):
+        header = struct.Struct("=6sII")
+        with conn:
+            while True:
+                try:
+                    data = conn.recv(header.size, socket.MSG_WAITALL)
+                    if len(data) < header.size:
+                        return
+                    magic, size, kind = header.unpack(data)
+                    payload = conn.recv(size, socket.MSG_WAITALL).decode() if size else ""
+                except OSError:
+                    return
+                assert magic == b"i3-ipc"
+                self.messages.append((kind, payload))
+                if kind == 3:
+                    reply = self.outputs
+                elif kind == 0:
+                    reply = [self.run(command.strip()) for command in payload.split(";") if command.strip()]
+                else:
+                    reply = {"success": False}
+                body = self._json.dumps(reply).encode()
+                conn.sendall(header.pack(b"i3-ipc", len(body), kind) + body)
+
+    def run(self, command):
+        words = command.split()
+        if len(words) < 2 or words[0] != "output":
+            return {"success": False, "error": f"Unknown command {command!r}"}
+        output = next((o for o in self.outputs if o["name"] == words[1]), None)
+        if output is None:
+            return {"success": False, "error": f"Unknown output {words[1]}"}
+        i = 2
+        while i < len(words):
+            word = words[i]
+            if word in ("enable", "disable"):
+                output["active"] = word == "enable"
+            elif word == "mode":
+                i += 1
+                res, _, rate = words[i].partition("@")
+                width, height = (int(x) for x in res.split("x"))
+                output["current_mode"] = {"width": width, "height": height, "refresh": round(float(rate.rstrip("Hz")) * 1000)}
+            elif word == "pos":
+                output["rect"] = dict(output["rect"], x=int(words[i + 1]), y=int(words[i + 2]))
+                i += 2
+            elif word == "scale":
+                i += 1
+                output["scale"] = float(words[i])
+            elif word == "transform":
+                i += 1
+                output["transform"] = words[i]
+            else:
+                return {"success": False, "error": f"Unknown output subcommand {word}"}
+            i += 1
+        return {"success": True}
+
+    def drop_clients(self):
+        """Close the open connections, like a sway restart would."""
+        for client in self._clients:
+            with contextlib.suppress(OSError):
+                client.shutdown(socket.SHUT_RDWR)
+        self._clients.clear()
+
+    def close(self):
+        self.drop_clients()
+        with contextlib.suppress(OSError):
+            self._server.shutdown(socket.SHUT_RDWR)
+        self._server.close()
+        if self.path.exists():
+            self.path.unlink()
@@ -0,0 +1,103 @@
+"""Replay recorded display captures to ``screens.load()``.
+
+A capture is what a backend printed on a real machine, stored per tool under
+``tests/fixtures``:
+
+- ``hyprland/<name>.json``: ``hyprctl -j monitors all`` (served with
+  ``hyprland/version.json`` by a :class:`~fakes.FakeHyprland`)
+- ``wlr-randr/<name>.txt`` and ``xrandr/<name>.txt``: the tool output, printed
+  by a stand-in executable put first in ``$PATH``
+
+:func:`replay` sets up the environment so that only the selected backend is
+found, runs the code unmodified (sockets and subprocesses included), and
+restores everything on exit.  It works both under pytest and in the
+benchmarks.
+"""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from fakes import FIXTURES, FakeHyprland
+
+from wlr_layout_ui import edid, hyprland, screens, sway, x11_randr
+from wlr_layout_ui.utils import config
+
+BACKENDS = ("hyprland", "wlr-randr", "xrandr")
+
+EXTENSIONS = {"hyprland": ".json", "wlr-randr": ".txt", "xrandr": ".txt"}
+
+# variables of the running session which would make load() probe another backend
+SESSION_VARIABLES = ("HYPRLAND_INSTANCE_SIGNATURE", "SWAYSOCK", "WAYLAND_DISPLAY", "DISPLAY")
+
+
+def capture_path(backend, name):
+    return FIXTURES / backend / f"{name}{EXTENSIONS[backend]}"
+
+
+def captures(backend):
+    """Return the names of the recorded captures of *backend*."""
+    return sorted(path.stem for path in (FIXTURES / backend).glob(f"*{EXTENSIONS[backend]}") if path.stem != "version")
+
+
+def _clear_clients():
+    hyprland.get_client.cache_clear()
+    sway.get_client.cache_clear()
+    x11_randr.get_connection.cache_clear()
+
+
+@contextmanager
+def replay(backend, name, workdir=None):
+    """Make ``screens.load()`` discover the displays of a recorded capture.
+
+    Args:
+        backend: one of :data:`BACKENDS`.
+        name: capture name, see :func:`captures`.
+        workdir: directory for the sockets, stand-in tools and display cache
+            (a temporary one by default).
+    """
+    source = capture_path(backend, name)
+    if not source.exists():
+        msg = f"No {backend} capture named {name!r}"
+        raise FileNotFoundError(msg)
+    cleanup = workdir is None
+    workdir = Path(tempfile.mkdtemp(prefix="wlrlui-replay-") if workdir is None else workdir)
+    saved_environ = dict(os.environ)
+    saved = (screens.LEGACY, edid.DRM_ROOT, dict(config))
+    server = None
+    try:
+        for key in SESSION_VARIABLES:
+            os.environ.pop(key, None)
+        os.environ["XDG_RUNTIME_DIR"] = str(workdir)
+        edid.DRM_ROOT = workdir / "drm"  # no identities: they'd come from this machine
+        config.update(hyprland=False, sway=False)
+        screens.LEGACY = backend == "xrandr"
+        if backend == "hyprland":
+            server = FakeHyprland(
+                workdir, {"j/version": (FIXTURES / "hyprland" / "version.json").read_text(), "j/monitors all": source.read_text()}
+            )
+            os.environ.update(server.environ())
+        else:
+            bindir = workdir / "bin"
+            bindir.mkdir(exist_ok=True)
+            tool = bindir / backend
+            tool.write_text(f"#!/bin/sh\nexec cat '{source}'\n")
+            tool.chmod(0o755)
+            os.environ["PATH"] = f"{bindir}{os.pathsep}{saved_environ.get('PATH', '')}"
+            if backend == "wlr-randr":
+                os.environ["WAYLAND_DISPLAY"] = "wayland-replay"  # no such socket: wlr-output-management fails
+        _clear_clients()
+        yield server
+    finally:
+        if server is not None:
+            server.close()
+        os.environ.clear()
+        os.environ.update(saved_environ)
+        screens.LEGACY, edid.DRM_ROOT = saved[:2]
+        config.clear()
+        config.update(saved[2])
+        _clear_clients()
+        if cleanup:
+            shutil.rmtree(workdir, ignore_errors=True)
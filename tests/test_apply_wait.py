@@ -0,0 +1,81 @@
+"""Tests for the readiness wait replacing the fixed sleeps between apply steps."""
+
+import sys
+import time
+
+sys.path.insert(0, "src")
+
+import pyglet
+import pytest
+
+pyglet.options["headless"] = True
+
+from fakes import FakeHyprlandCompositor, FakeHyprlandEvents  # ruff: ignore[module-import-not-at-top-of-file]
+
+from wlr_layout_ui import apply, hyprland  # ruff: ignore[module-import-not-at-top-of-file]
+
+TOGGLE = 'hyprctl eval \'hl.monitor({output="eDP-1", disabled=false}) ; hl.monitor({output="DP-3", disabled=true})\''
+CONFIGURE = 'hyprctl eval \'hl.monitor({output="eDP-1", mode="2880x1800@120.00Hz", position="0x0", scale=1.5, transform=0})\''
+
+
+@pytest.fixture
+def compositor(tmp_path, serve):
+    """Start a fake Hyprland with an event socket, toggling outputs after 0.2s."""
+    server = serve(FakeHyprlandCompositor(tmp_path, delay=0.2))
+    server.events = events = FakeHyprlandEvents(server.directory)
+    yield server
+    events.close()
+
+
+def _names(server, disabled):
+    return {m["name"] for m in server.monitors if m.get("disabled", False) == disabled}
+
+
+def test_waits_for_the_outputs(compositor):
+    start = time.perf_counter()
+    assert apply.run_commands([TOGGLE, "sleep 2", CONFIGURE])
+    elapsed = time.perf_counter() - start
+    assert 0.2 <= elapsed < 1.5
+    assert "DP-3" in _names(compositor, disabled=True)
+    assert compositor.requests[-1].startswith('eval hl.monitor({output="eDP-1", mode=')
+
+
+def test_polls_without_events(compositor):
+    compositor.events.close()
+    compositor.events = None
+    start = time.perf_counter()
+    assert apply.run_commands([TOGGLE, "sleep 2", CONFIGURE])
+    assert time.perf_counter() - start < 1.5
+    assert "DP-3" in _names(compositor, disabled=True)
+
+
+def test_deadline(compositor):
+    compositor.delay = 5  # never ready in time: behaves like the sleep
+    start = time.perf_counter()
+    assert apply.run_commands([TOGGLE, "sleep 0.3", CONFIGURE])
+    assert 0.3 <= time.perf_counter() - start < 1.5
+    assert len(compositor.requests) >= 3
+
+
+def test_watch_outputs(compositor):
+    assert hyprland.watch_outputs(CONFIGURE) is None
+    assert hyprland.watch_outputs('hyprctl --batch "keyword monitor DP-3,disable"') is None
+    watcher = hyprland.watch_outputs(TOGGLE)
+    try:
+        assert watcher.expected == {"eDP-1": True, "DP-3": False}
+        assert watcher.events is not None
+        assert not watcher.ready()
+        compositor.toggle({"DP-3": True})
+        assert watcher.ready()
+    finally:
+        watcher.close()
+
+
+@pytest.mark.usefixtures("no_hyprland")
+def test_shell_fallback_sleeps(monkeypatch):
+    ran, slept = [], []
+    monkeypatch.setattr(apply, "run_command", lambda cmd: ran.append(cmd) or True)
+    monkeypatch.setattr(apply.time, "sleep", slept.append)
+    assert apply.run_commands([TOGGLE, "sleep 2", CONFIGURE])
+    assert ran == [TOGGLE, CONFIGURE]
+    assert slept == [2.0]
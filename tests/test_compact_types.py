@@ -0,0 +1,50 @@
+"""Tests for the interned, immutable Mode / Screen representation."""
+
+import copy
+import pickle
+import sys
+
+sys.path.insert(0, "src")
+
+import pytest
+
+from wlr_layout_ui.types import Mode, Screen, intern_modes
+
+
+def test_modes_are_interned():
+    mode = Mode(1920, 1080, 60)
+    assert Mode(1920.0, 1080, 60.0) is mode
+    assert isinstance(mode.width, int)
+    assert isinstance(mode.freq, float)
+    assert Mode(1920, 1080, 59.94) is not mode
+    assert repr(mode) == "1920x1080@60.00Hz"
+
+
+def test_modes_are_immutable():
+    mode = Mode(1920, 1080, 60.0)
+    with pytest.raises(AttributeError):
+        mode.width = 800
+    with pytest.raises(AttributeError):
+        del mode.freq
+    with pytest.raises(AttributeError):
+        mode.extra = 1
+    assert copy.deepcopy(mode) is mode
+    assert pickle.loads(pickle.dumps(mode)) is mode
+
+
+def test_shared_available_lists():
+    first = Screen(uid="DP-1", name="a", available=[Mode(1920, 1080, 60.0), Mode(1280, 720, 60.0)])
+    second = Screen(uid="DP-2", name="b", available=(Mode(1920, 1080, 60.0), Mode(1280, 720, 60.0)))
+    assert isinstance(first.available, tuple)
+    assert first.available is second.available
+    assert intern_modes([]) is Screen(uid="X", name="x").available
+    second.available = [Mode(800, 600, 60.0)]
+    assert second.available == (Mode(800, 600, 60.0),)
+
+
+def test_screen_is_slotted():
+    screen = Screen(uid="DP-1", name="test")
+    assert not hasattr(screen, "__dict__")
+    with pytest.raises(AttributeError):
+        screen.unknown = True
+    assert screen == Screen(uid="DP-1", name="test")
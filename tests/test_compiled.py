@@ -0,0 +1,132 @@
+"""Tests for the compiled apply plans of the profiles."""
+
+import sys
+
+sys.path.insert(0, "src")
+
+import pyglet
+import pytest
+
+pyglet.options["headless"] = True
+
+from fakes import FakeHyprlandCompositor  # ruff: ignore[module-import-not-at-top-of-file]
+
+from wlr_layout_ui import app, compiled, profiles, utils  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.plan import OutputState  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.types import Mode  # ruff: ignore[module-import-not-at-top-of-file]
+
+PROFILE = [
+    {"uid": "eDP-1", "active": True, "width": 2880, "height": 1800, "freq": 120.0, "x": 0, "y": 0, "scale": 1.5, "transform": 0},
+    {"uid": "DP-3", "active": True, "width": 3840, "height": 2160, "freq": 60.0, "x": 2000, "y": 0, "scale": 2.0, "transform": 0},
+]
+
+
+@pytest.fixture
+def compositor(tmp_path, monkeypatch, serve):
+    monkeypatch.setitem(utils.config, "hyprland", value=False)
+    monkeypatch.setattr(app, "LEGACY", False)
+    monkeypatch.setattr(profiles, "cfg_file", tmp_path / "wlrlui.toml")
+    return serve(FakeHyprlandCompositor(tmp_path))
+
+
+def no_probe_load(*_args, **_kwargs: object):
+    msg = "the displays were probed"
+    raise AssertionError(msg)
+
+
+def no_resolution(*_args):
+    msg = "the profile was resolved again"
+    raise AssertionError(msg)
+
+
+def _dp3(server):
+    return next(m for m in server.monitors if m["name"] == "DP-3")
+
+
+def test_state_roundtrip():
+    state = OutputState(active=True, mode=Mode(1920, 1080, 60.0), position=(10, 20), scale=1.25, transform=1)
+    restored = compiled.state_from_list(compiled.state_to_list(state))
+    assert restored == state
+    assert restored.mode is state.mode
+    assert compiled.state_from_list(compiled.state_to_list(OutputState(active=False, mode=None, position=(0, 0)))).mode is None
+
+
+def test_plan_reused(compositor, monkeypatch, capsys):
+    app.apply_profile(PROFILE, name="work")
+    assert _dp3(compositor)["x"] == 2000
+    assert compiled.plans_file().exists()
+
+    _dp3(compositor)["x"] = 1920  # moved back by someone else
+    monkeypatch.setitem(utils.config, "hyprland", value=False)
+    with monkeypatch.context() as patch:
+        patch.setattr(app, "load", no_probe_load)
+        app.apply_profile(PROFILE, name="work")
+    assert utils.config["hyprland"]
+    assert _dp3(compositor)["x"] == 2000
+    with monkeypatch.context() as patch:
+        patch.setattr(app, "load", no_probe_load)
+        app.apply_profile(PROFILE, name="work")
+    assert capsys.readouterr().out.endswith("Layout already applied\n")
+
+
+def test_match_reuses_plan(compositor, monkeypatch, capsys):
+    profiles.save_profile("work", PROFILE)
+    monkeypatch.setattr(sys, "argv", ["wlrlui", "-m"])
+    with pytest.raises(SystemExit) as exit_info:
+        app.main()
+    assert exit_info.value.code == 0
+    assert _dp3(compositor)["x"] == 2000
+
+    _dp3(compositor)["x"] = 1920
+    capsys.readouterr()
+    with monkeypatch.context() as patch:
+        patch.setattr(app, "_profile_target", no_resolution)
+        with pytest.raises(SystemExit) as exit_info:
+            app.main()
+    assert exit_info.value.code == 0
+    assert capsys.readouterr().out.startswith("Matched profile work")
+    assert _dp3(compositor)["x"] == 2000
+
+
+def test_plan_rebuilt(compositor, monkeypatch):
+    app.apply_profile(PROFILE, name="work")
+    key = compiled.fingerprint(app.cache.current_fingerprint()[0])
+    assert compiled.read("work", PROFILE, key) is not None
+    # edited profile
+    edited = [PROFILE[0], dict(PROFILE[1], x=2100)]
+    assert compiled.read("work", edited, key) is None
+    app.apply_profile(edited, name="work")
+    assert _dp3(compositor)["x"] == 2100
+    assert compiled.read("work", edited, key) is not None
+    # other monitor
+    _dp3(compositor)["description"] = "Another monitor"
+    assert compiled.read("work", edited, compiled.fingerprint(app.cache.current_fingerprint()[0])) is None
+    # other compositor instance
+    before = compiled.fingerprint("outputs")
+    monkeypatch.setenv("HYPRLAND_INSTANCE_SIGNATURE", "restarted")
+    assert compiled.fingerprint("outputs") != before
+    assert compiled.fingerprint(None) is None
+
+
+def test_refused_plan_not_stored(compositor):
+    compositor.refuse.add("DP-3")
+    app.apply_profile(PROFILE, name="work")
+    assert compiled.read("work", PROFILE, compiled.fingerprint(app.cache.current_fingerprint()[0])) is None
+
+
+def test_check_profile(compositor, monkeypatch, capsys):
+    profiles.save_profile("work", PROFILE)
+    monkeypatch.setattr(sys, "argv", ["wlrlui", "--check", "work"])
+    with pytest.raises(SystemExit) as exit_info:
+        app.main()
+    assert exit_info.value.code == 1
+    app.apply_profile(PROFILE, name="work")
+    capsys.readouterr()
+    app.main()
+    assert capsys.readouterr().out == "Profile work is applied\n"
+    monkeypatch.setattr(sys, "argv", ["wlrlui", "--digest"])
+    app.main()
+    digest = capsys.readouterr().out
+    _dp3(compositor)["x"] = 1920
+    app.main()
+    assert capsys.readouterr().out != digest
@@ -0,0 +1,121 @@
+"""Tests for the single-instance lock and the control socket of the GUI."""
+
+import sys
+import threading
+
+sys.path.insert(0, "src")
+
+import pytest
+
+from wlr_layout_ui import app, control
+from wlr_layout_ui.transaction import ApplyResult
+
+
+@pytest.fixture(autouse=True)
+def runtime(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def instance():
+    instance = control.Instance.acquire()
+    assert instance is not None
+    yield instance
+    instance.close()
+
+
+def test_single_instance(instance):
+    assert control.Instance.acquire() is None
+    instance.close()
+    again = control.Instance.acquire()
+    assert again is not None
+    again.close()
+
+
+def test_requests(instance):
+    assert control.send("raise") is None  # not serving yet
+    control.socket_path().write_text("")  # left behind by a crashed instance
+    requests = []
+    instance.serve(lambda request: requests.append(request) or {"ok": True, "message": "done"})
+    assert control.send("apply", profile="cinema") == {"ok": True, "message": "done"}
+    assert requests == [{"command": "apply", "profile": "cinema"}]
+    assert control.send("quit") == {"ok": False, "message": "Unknown command: quit"}
+    assert requests == [{"command": "apply", "profile": "cinema"}]
+    instance.close()
+    assert not control.socket_path().exists()
+    assert control.send("raise") is None
+
+
+def test_dispatch_and_errors(instance):
+    dispatched = []
+
+    def dispatch(func):
+        dispatched.append(func)
+        threading.Thread(target=func).start()
+
+    def handler(_request):
+        msg = "no window"
+        raise RuntimeError(msg)
+
+    instance.serve(handler, dispatch)
+    assert control.send("reload") == {"ok": False, "message": "no window"}
+    assert len(dispatched) == 1
+
+
+def test_profile_applied_by_the_running_gui(instance, monkeypatch, capsys):
+    instance.serve(lambda request: {"ok": request["profile"] == "cinema", "message": f"applied {request['profile']}\n"})
+    monkeypatch.setattr(app, "load_profiles", dict)
+    monkeypatch.setattr(app, "apply_profile", pytest.fail)
+    for name, status in (("cinema", 0), ("other", 1)):
+        monkeypatch.setattr(sys, "argv", ["wlrlui", name])
+        with pytest.raises(SystemExit) as exit_info:
+            app.main()
+        assert exit_info.value.code == status
+        assert capsys.readouterr().out == f"applied {name}\n"
+
+
+class FakeWindow:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *_args, **_kwargs: self.calls.append(name)
+
+
+def test_handle_request(monkeypatch):
+    monkeypatch.setattr(app, "load_profiles", lambda: {"cinema": []})
+    monkeypatch.setattr(app, "reload_pre_commands", lambda: None)
+
+    def apply_profile(_profile, name=None):
+        print(f"applying {name}")
+        return ApplyResult(["cmd"], ok=True)
+
+    monkeypatch.setattr(app, "apply_profile", apply_profile)
+    window = FakeWindow()
+    assert app._handle_request(window, {"command": "raise"}) == {"ok": True, "message": ""}
+    assert window.calls == ["set_visible", "activate"]
+    assert app._handle_request(window, {"command": "apply", "profile": "cinema"}) == {"ok": True, "message": "applying cinema\n"}
+    assert "set_current_modes_as_ref" in window.calls
+    assert app._handle_request(window, {"command": "apply", "profile": "missing"})["ok"] is False
+
+
+def test_requests_run_in_the_event_loop():
+    ran = []
+    thread = threading.Thread(target=app._in_event_loop, args=(lambda: ran.append(threading.current_thread()),))
+    thread.start()
+    thread.join()
+    assert ran == []  # queued, not scheduled from the socket thread
+    app._run_pending()
+    assert ran == [threading.current_thread()]
+
+
+def test_gui_without_runtime_dir(monkeypatch):
+    def refuse():
+        raise PermissionError
+
+    started = []
+    monkeypatch.setattr(control.Instance, "acquire", refuse)
+    monkeypatch.setattr(app, "_run_event_loop", started.append)
+    app.run_gui()
+    assert started == [None]
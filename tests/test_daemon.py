@@ -0,0 +1,134 @@
+"""Tests for the hotplug daemon, driven by fake Hyprland sockets."""
+
+import json
+import sys
+import threading
+
+sys.path.insert(0, "src")
+
+import pyglet
+import pytest
+import tomli_w
+
+pyglet.options["headless"] = True
+
+from fakes import FIXTURES, FakeHyprlandEvents  # ruff: ignore[module-import-not-at-top-of-file]
+
+from wlr_layout_ui import daemon, hyprland, profiles, screens  # ruff: ignore[module-import-not-at-top-of-file]
+
+MONITORS = json.loads((FIXTURES / "hyprland" / "monitors.json").read_text())
+
+
+def _profile(*uids):
+    return [{"uid": uid, "name": uid, "active": True, "width": 1920, "height": 1080, "freq": 60.0, "x": 0, "y": 0} for uid in uids]
+
+
+@pytest.fixture
+def fake_hyprland(fake_hyprland, tmp_path, monkeypatch):
+    """Add an event socket and a profile file to the fake Hyprland instance."""
+    events = FakeHyprlandEvents(fake_hyprland.directory)
+    cfg = tmp_path / "wlrlui.toml"
+    cfg.write_text(tomli_w.dumps({"docked": _profile("eDP-1", "DP-3"), "laptop": _profile("eDP-1")}))
+    monkeypatch.setattr(profiles, "cfg_file", cfg)
+    yield fake_hyprland, events
+    events.close()
+
+
+class Recorder:
+    """Stand-in for apply_profile."""
+
+    def __init__(self):
+        self.applied = []
+        self.called = threading.Event()
+
+    def __call__(self, profile, *, reload=True, name=None, outputs=None):
+        assert not reload
+        assert name is None or outputs is not None  # the compiled plan can be used
+        self.applied.append(sorted(p["uid"] for p in profile))
+        self.called.set()
+
+    def wait(self):
+        assert self.called.wait(2.0)
+        self.called.clear()
+        return self.applied[-1]
+
+
+@pytest.mark.usefixtures("fake_hyprland")
+def test_update_applies_once():
+    recorder = Recorder()
+    dmn = daemon.Daemon(recorder)
+    assert dmn.update() == "docked"
+    assert dmn.update() is None
+    assert recorder.applied == [["DP-3", "eDP-1"]]
+
+
+@pytest.mark.usefixtures("fake_hyprland")
+def test_update_force():
+    recorder = Recorder()
+    dmn = daemon.Daemon(recorder)
+    dmn.update()
+    assert dmn.update(force=True) == "docked"
+    assert len(recorder.applied) == 2
+
+
+def test_other_monitor_same_connector(fake_hyprland, monkeypatch):
+    server, _ = fake_hyprland
+    recorder = Recorder()
+    dmn = daemon.Daemon(recorder)
+    monkeypatch.setattr(screens.edid, "read_identities", lambda: {"DP-3": "DELL"})
+    dmn.update()
+    # same connector, another monitor
+    monitors = [dict(m, description="Other monitor") if m["name"] == "DP-3" else m for m in MONITORS]
+    server.replies["j/monitors all"] = json.dumps(monitors)
+    monkeypatch.setattr(screens.edid, "read_identities", lambda: {"DP-3": "OTHER"})
+    assert dmn.update() == "docked"
+    assert len(recorder.applied) == 2
+
+
+@pytest.mark.usefixtures("fake_hyprland")
+def test_failed_update():
+    def apply(*_args, **kwargs: object):
+        raise KeyError(kwargs.get("name"))
+
+    dmn = daemon.Daemon(apply)
+    dmn.safe_update()  # logged
+    assert dmn.applied is None  # retried on the next event
+    dmn.apply = Recorder()
+    assert dmn.update() == "docked"
+
+
+@pytest.mark.usefixtures("fake_hyprland")
+def test_profiles_are_cached(monkeypatch):
+    dmn = daemon.Daemon(Recorder())
+    dmn.update()
+    monkeypatch.setattr(profiles.tomli, "load", pytest.fail)
+    dmn.update(force=True)
+
+
+def test_hotplug_events(fake_hyprland):
+    server, events = fake_hyprland
+    recorder = Recorder()
+    dmn = daemon.Daemon(recorder, settle_delay=0.05)
+    conn = hyprland.open_events()
+    thread = threading.Thread(target=dmn.run, args=(conn,), daemon=True)
+    thread.start()
+    assert recorder.wait() == ["DP-3", "eDP-1"]
+    assert events.wait_client()
+
+    # undock
+    server.replies["j/monitors all"] = json.dumps(MONITORS[:1])
+    events.emit("monitorremoved", "DP-3")
+    events.emit("monitorremovedv2", "1,DP-3,Dell Inc. DELL U2720Q 9DKSTK3")
+    assert recorder.wait() == ["eDP-1"]
+
+    # unrelated events are ignored
+    events.emit("workspace", "2")
+    # config reload re-applies even without output changes
+    events.emit("configreloaded")
+    assert recorder.wait() == ["eDP-1"]
+    assert len(recorder.applied) == 3
+
+    events.close()
+    thread.join(2.0)
+    assert not thread.is_alive()
+    conn.close()
@@ -0,0 +1,113 @@
+"""Tests for the display snapshot cache used by ``load(cached=True)``."""
+
+import json
+import sys
+
+sys.path.insert(0, "src")
+
+import pyglet
+import pytest
+
+pyglet.options["headless"] = True
+
+from fakes import FIXTURES  # ruff: ignore[module-import-not-at-top-of-file]
+
+from wlr_layout_ui import cache, screens  # ruff: ignore[module-import-not-at-top-of-file]
+
+MONITORS = json.loads((FIXTURES / "hyprland" / "monitors.json").read_text())
+
+
+def _connector(root, name, status="connected", edid=b"\x00\xff\xff\xff\xff\xff\xff\x00"):
+    folder = root / name
+    folder.mkdir()
+    (folder / "status").write_text(status + "\n")
+    (folder / "edid").write_bytes(edid)
+
+
+def test_monitors_fingerprint():
+    reordered = list(reversed(MONITORS))
+    assert cache.fingerprint_from_monitors(MONITORS) == cache.fingerprint_from_monitors(reordered)
+    changed = [dict(MONITORS[0], description="Other panel"), MONITORS[1]]
+    assert cache.fingerprint_from_monitors(MONITORS) != cache.fingerprint_from_monitors(changed)
+
+
+def test_drm_fingerprint(tmp_path):
+    assert cache.drm_fingerprint(tmp_path) is None
+    _connector(tmp_path, "card0-eDP-1")
+    _connector(tmp_path, "card0-DP-1", status="disconnected")
+    first = cache.drm_fingerprint(tmp_path)
+    assert first is not None
+    _connector(tmp_path, "card1-HDMI-A-1", edid=b"other")
+    assert cache.drm_fingerprint(tmp_path) != first
+
+
+@pytest.mark.usefixtures("fake_hyprland")
+def test_serialization_roundtrip():
+    screens.load()
+    restored = [cache.screen_from_dict(cache.screen_to_dict(s)) for s in screens.displayInfo]
+    assert restored == screens.displayInfo
+    assert any(restored[0].mode is m for m in restored[0].available)
+
+
+def test_cached_load(fake_hyprland, monkeypatch):
+    screens.load(cached=True)
+    assert fake_hyprland.requests[0] == "j/monitors all"  # fingerprint, then the concurrent probes
+    assert sorted(fake_hyprland.requests[1:]) == ["j/monitors all", "j/version"]
+    first = list(screens.displayInfo)
+
+    fake_hyprland.requests.clear()
+    monkeypatch.setattr(screens, "_parseMode", pytest.fail)
+    screens.load(cached=True)
+    assert fake_hyprland.requests == ["j/monitors all"]
+    assert screens.displayInfo == first
+    assert "fingerprint" in screens.probe_timings
+
+
+def test_cached_load_refreshes_live_state(fake_hyprland):
+    screens.load()
+    moved = [MONITORS[0], dict(MONITORS[1], x=0, y=1800, scale=1.0)]
+    fake_hyprland.replies["j/monitors all"] = json.dumps(moved)
+    screens.load(cached=True)
+    dell = screens.displayInfo[1]
+    assert dell.position == (0, 1800)
+    assert dell.scale == pytest.approx(1.0)
+
+
+@pytest.mark.usefixtures("fake_hyprland")
+def test_cached_load_queries_other_backends(monkeypatch):
+    screens.load()
+    fingerprint = cache.fingerprint_from_monitors(MONITORS)
+    monkeypatch.setattr(cache, "current_fingerprint", lambda: (fingerprint, None))  # eg. sway
+    live = [cache.screen_from_dict(cache.screen_to_dict(s)) for s in screens.displayInfo]
+    live[1].position = (0, 1800)
+    live[1].mode = live[1].available[-1]
+    monkeypatch.setattr(screens, "query_screens", lambda: live)
+    monkeypatch.setattr(screens, "_parseMode", pytest.fail)
+    screens.load(cached=True)
+    dell = screens.displayInfo[1]
+    assert dell.position == (0, 1800)
+    assert dell.mode == live[1].mode
+
+    monkeypatch.setattr(screens, "query_screens", lambda: live[:1])  # unplugged meanwhile
+    monkeypatch.setattr(screens, "_load", lambda: screens.displayInfo.extend(live[:1]))
+    screens.load(cached=True)
+    assert [s.uid for s in screens.displayInfo] == ["eDP-1"]
+
+
+def test_fingerprint_change_misses(fake_hyprland):
+    screens.load()
+    fake_hyprland.replies["j/monitors all"] = json.dumps(MONITORS[:1])
+    fake_hyprland.requests.clear()
+    screens.load(cached=True)
+    assert "j/version" in fake_hyprland.requests
+    assert [s.uid for s in screens.displayInfo] == ["eDP-1"]
+
+
+def test_invalidate(fake_hyprland):
+    screens.load()
+    assert cache.cache_file().exists()
+    cache.invalidate()
+    assert not cache.cache_file().exists()
+    fake_hyprland.requests.clear()
+    screens.load(cached=True)
+    assert "j/version" in fake_hyprland.requests
@@ -0,0 +1,124 @@
+"""Tests for the EDID based monitor identities and the profile matching using them."""
+
+import struct
+import sys
+from pathlib import Path
+
+sys.path.insert(0, "src")
+
+import pyglet
+
+pyglet.options["headless"] = True
+
+from wlr_layout_ui import edid  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.profiles import find_matching_profile, match_profile  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.types import Screen  # ruff: ignore[module-import-not-at-top-of-file]
+
+# sysfs layout: a laptop panel (vendor strings in 0xFE descriptors, no serial)
+# and a monitor with name and serial descriptors and a CEA-861 extension block
+DRM_FIXTURES = Path(__file__).parent / "fixtures" / "drm"
+
+
+def make_edid(vendor="DEL", product=0xA0F1, serial=1234, serial_text="", model=""):
+    """Build a minimal base EDID block with a valid checksum."""
+    packed = 0
+    for letter in vendor:
+        packed = (packed << 5) | (ord(letter) - ord("A") + 1)
+    block = bytearray(edid.HEADER + struct.pack(">H", packed) + struct.pack("<HI", product, serial))
+    block += bytes(54 - len(block))
+    for tag, text in ((0xFF, serial_text), (0xFC, model)):
+        if text:
+            block += b"\x00\x00\x00" + bytes([tag, 0]) + (text.encode() + b"\n").ljust(13, b" ")
+    block += bytes(127 - len(block))
+    block.append(-sum(block) % 256)
+    return bytes(block)
+
+
+def _connector(root, name, data, status="connected"):
+    folder = root / name
+    folder.mkdir()
+    (folder / "status").write_text(status + "\n")
+    (folder / "edid").write_bytes(data)
+
+
+def test_parse_edid():
+    info = edid.parse_edid(make_edid(serial_text="ABC123", model="DELL U2720Q"))
+    assert info == edid.EdidInfo("DEL", 0xA0F1, 1234, "ABC123", "DELL U2720Q")
+    assert info.identity.startswith("DEL-")
+    assert info.identity == edid.parse_edid(make_edid(serial_text="ABC123")).identity  # the model isn't part of it
+    assert info.identity != edid.parse_edid(make_edid(serial_text="ABC124")).identity
+
+
+def test_parse_edid_invalid():
+    data = make_edid()
+    assert edid.parse_edid(b"") is None
+    assert edid.parse_edid(data[:100]) is None
+    assert edid.parse_edid(b"\x01" + data[1:]) is None
+    assert edid.parse_edid(data[:-1] + bytes([(data[-1] + 1) % 256])) is None
+
+
+def test_read_identities(tmp_path):
+    assert edid.read_identities(tmp_path) == {}
+    _connector(tmp_path, "card0-eDP-1", make_edid("BOE", 0x0BCA, 0))
+    _connector(tmp_path, "card1-DP-3", make_edid(serial_text="ABC123"))
+    _connector(tmp_path, "card1-DP-4", make_edid(serial=99), status="disconnected")
+    _connector(tmp_path, "card1-HDMI-A-1", b"")
+    identities = edid.read_identities(tmp_path)
+    assert set(identities) == {"eDP-1", "DP-3"}
+    assert identities["DP-3"] == edid.parse_edid(make_edid(serial_text="ABC123")).identity
+
+
+def test_parse_edid_fixtures():
+    panel = edid.parse_edid((DRM_FIXTURES / "card0-eDP-1" / "edid").read_bytes())
+    assert panel == edid.EdidInfo("BOE", 0x0BCA, 0, "", "")
+    monitor = edid.parse_edid((DRM_FIXTURES / "card0-DP-3" / "edid").read_bytes())
+    assert monitor == edid.EdidInfo("DEL", 0xA0F1, 0x4C303730, "7B9ZXV2", "DELL U2720Q")
+
+
+def test_read_identities_fixtures():
+    # saved in the profiles: must not change
+    assert edid.read_identities(DRM_FIXTURES) == {"eDP-1": "BOE-abb7b98f37", "DP-3": "DEL-b2d18a1ab1"}
+
+
+def _entry(uid, identity=None, x=0):
+    entry = {"uid": uid, "name": uid, "active": True, "width": 1920, "height": 1080, "freq": 60.0, "x": x, "y": 0}
+    if identity:
+        entry["identity"] = identity
+    return entry
+
+
+def test_match_profile_renamed_connector():
+    profile = [_entry("eDP-1", "BOE-1"), _entry("DP-3", "DEL-1", x=1920)]
+    screens = [Screen(uid="eDP-1", name="", identity="BOE-1"), Screen(uid="DP-5", name="", identity="DEL-1")]
+    mapping = match_profile(profile, screens)
+    assert mapping == {"eDP-1": profile[0], "DP-5": profile[1]}
+    # another monitor on the saved connector doesn't match
+    screens[1].identity = "DEL-2"
+    assert match_profile(profile, screens) is None
+
+
+def test_match_profile_without_identities():
+    profile = [_entry("eDP-1"), _entry("DP-3", "DEL-1")]
+    screens = [Screen(uid="DP-3", name=""), Screen(uid="eDP-1", name="", identity="BOE-1")]
+    assert match_profile(profile, screens) == {"eDP-1": profile[0], "DP-3": profile[1]}
+    assert match_profile(profile, screens[:1]) is None
+    assert match_profile(profile, [screens[0], Screen(uid="DP-4", name="")]) is None
+
+
+def test_match_profile_identical_monitors():
+    profile = [_entry("DP-1", "DEL-1"), _entry("DP-2", "DEL-1", x=1920)]
+    screens = [Screen(uid="DP-2", name="", identity="DEL-1"), Screen(uid="DP-1", name="", identity="DEL-1")]
+    assert match_profile(profile, screens) == {"DP-1": profile[0], "DP-2": profile[1]}
+    screens[1].uid = "DP-3"  # dock renumbered one of them: the other one stays in place
+    assert match_profile(profile, screens) == {"DP-2": profile[1], "DP-3": profile[0]}
+
+
+def test_find_matching_profile():
+    profiles = {
+        "home": [_entry("eDP-1", "BOE-1"), _entry("DP-1", "DEL-1")],
+        "office": [_entry("eDP-1", "BOE-1"), _entry("DP-1", "LEN-7")],
+    }
+    screens = [Screen(uid="eDP-1", name="", identity="BOE-1"), Screen(uid="DP-2", name="", identity="LEN-7")]
+    assert find_matching_profile(profiles, screens) == "office"
+    screens[1].identity = "SAM-3"
+    assert find_matching_profile(profiles, screens) is None
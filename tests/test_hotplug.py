@@ -0,0 +1,115 @@
+"""Tests for the coalescing of concurrent ``wlrlui -m`` runs."""
+
+import sys
+import threading
+import time
+
+sys.path.insert(0, "src")
+
+import pytest
+
+from wlr_layout_ui import app, hotplug
+from wlr_layout_ui.transaction import ApplyResult
+
+
+@pytest.fixture(autouse=True)
+def runtime(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    return tmp_path
+
+
+class Cycle:
+    def __init__(self, status=0):
+        self.status = status
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        print(f"applied {self.calls}")
+        return self.status
+
+
+def test_single_run():
+    cycle = Cycle(1)
+    start = time.monotonic()
+    assert hotplug.coalesce(cycle, settle_delay=0.05) == (1, "applied 1\n")
+    assert time.monotonic() - start >= 0.05
+    # a later call probes again
+    assert hotplug.coalesce(cycle, settle_delay=0) == (1, "applied 2\n")
+
+
+def test_burst():
+    cycle = Cycle()
+    results = []
+
+    def event():
+        results.append(hotplug.coalesce(cycle, settle_delay=0.2))
+
+    threads = [threading.Thread(target=event) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+    assert cycle.calls == 1
+    assert results == [(0, "applied 1\n")] * 5
+
+
+def test_event_during_the_cycle():
+    later = []
+    calls = []
+
+    def cycle():
+        calls.append(None)
+        if len(calls) == 1:  # an output is plugged while applying
+            later.append(threading.Thread(target=lambda: later.append(hotplug.coalesce(cycle, settle_delay=0))))
+            later[0].start()
+            time.sleep(0.05)
+            print("first")
+            return 0
+        print("second")
+        return 0
+
+    assert hotplug.coalesce(cycle, settle_delay=0) == (0, "first\n")
+    later[0].join()
+    assert later[1:] == [(0, "second\n")]
+
+
+def test_failed_run():
+    def cycle():
+        raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        hotplug.coalesce(cycle, settle_delay=0)
+    assert hotplug.coalesce(Cycle(), settle_delay=0) == (0, "applied 1\n")
+
+
+def test_failed_cycle_not_shared():
+    statuses = [1, 0]
+    calls = []
+
+    def cycle():
+        calls.append(None)
+        time.sleep(0.1)
+        print(f"applied {len(calls)}")
+        return statuses[len(calls) - 1]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(hotplug.coalesce(cycle, settle_delay=0))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)  # all waiting for the first cycle
+    for thread in threads:
+        thread.join()
+    # the waiting calls ran the cycle again instead of exiting with the failure
+    assert len(calls) == 2
+    assert sorted(results) == [(0, "applied 2\n"), (0, "applied 2\n"), (1, "applied 1\n")]
+
+
+@pytest.mark.parametrize(("ok", "status"), [(True, 0), (False, 1)])
+def test_apply_matching_profile_status(monkeypatch, ok, status):
+    monkeypatch.setattr(app, "load", lambda **_kwargs: None)
+    monkeypatch.setattr(app, "get_index", lambda: None)
+    monkeypatch.setattr(app, "find_profile", lambda _index, _screens: ("docked", [], True))
+    monkeypatch.setattr(app, "apply_profile", lambda _profile, **_kwargs: ApplyResult(["cmd"], ok=ok, mismatches=[] if ok else ["DP-1"]))
+    assert app.apply_matching_profile() == status
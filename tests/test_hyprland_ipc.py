@@ -0,0 +1,89 @@
+"""Tests for the native Hyprland IPC client.
+
+Runs against a fake ``.socket.sock`` server and checks the ``hyprctl``
+fallback when no socket is available.
+"""
+
+import sys
+
+sys.path.insert(0, "src")
+
+import pyglet
+import pytest
+
+pyglet.options["headless"] = True
+
+from wlr_layout_ui import hyprland, randr_text, screens, utils  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.apply import run_commands  # ruff: ignore[module-import-not-at-top-of-file]
+
+
+def test_client_is_shared(fake_hyprland):
+    assert hyprland.get_client() is hyprland.get_client()
+    assert hyprland.get_client().path == str(fake_hyprland.path)
+
+
+def test_json_query(fake_hyprland):
+    data = hyprland.hyprctl_json("version")
+    assert data["tag"] == "v0.49.0"
+    assert fake_hyprland.requests == ["j/version"]
+
+
+def test_batch(fake_hyprland):
+    replies = hyprland.get_client().batch(["keyword monitor DP-1,disable", "keyword monitor DP-2,disable"])
+    assert replies == ["ok", "ok"]
+    assert fake_hyprland.requests == ["[[BATCH]]keyword monitor DP-1,disable ; keyword monitor DP-2,disable"]
+
+
+def test_run_batch_command(fake_hyprland):
+    assert run_commands(['hyprctl --batch "keyword monitor DP-1,disable ; keyword monitor DP-3,disable"'])
+    assert fake_hyprland.requests == ["[[BATCH]]keyword monitor DP-1,disable ; keyword monitor DP-3,disable"]
+
+
+def test_run_eval_command(fake_hyprland):
+    assert run_commands(["hyprctl eval 'hl.monitor({output=\"DP-1\", disabled=true})'"])
+    assert fake_hyprland.requests == ['eval hl.monitor({output="DP-1", disabled=true})']
+
+
+def test_error_reply(fake_hyprland):
+    fake_hyprland.replies["keyword monitor bad"] = "error: invalid monitor"
+    assert not run_commands(['hyprctl --batch "keyword monitor bad"'])
+
+
+@pytest.mark.usefixtures("fake_hyprland")
+def test_other_commands_are_not_handled():
+    assert hyprland.run_hyprctl_command("wlr-randr --output DP-1 --off") is None
+    assert hyprland.run_hyprctl_command("sleep 2") is None
+
+
+@pytest.mark.usefixtures("no_hyprland")
+def test_fallback_to_hyprctl(monkeypatch):
+    calls = []
+
+    def fake_getoutput(cmd):
+        calls.append(cmd)
+        return '{"version": "0.49.0", "tag": "v0.49.0"}'
+
+    monkeypatch.setattr(hyprland.subprocess, "getoutput", fake_getoutput)
+    assert hyprland.get_client() is None
+    assert hyprland.hyprctl_json("version")["version"] == "0.49.0"
+    assert calls == ["hyprctl -j version"]
+    assert hyprland.run_hyprctl_command('hyprctl --batch "keyword monitor DP-1,disable"') is None
+
+
+def test_load_uses_socket(fake_hyprland, monkeypatch):
+    monkeypatch.setattr(hyprland.subprocess, "getoutput", pytest.fail)
+    monkeypatch.setattr(randr_text.subprocess, "Popen", pytest.fail)
+    screens.load()
+    assert [s.uid for s in screens.displayInfo] == ["eDP-1", "DP-3"]
+    dell = screens.displayInfo[1]
+    assert repr(dell.mode) == "3840x2160@60.00Hz"
+    assert dell.scale == pytest.approx(2.0)
+    assert dell.position == (1920, 0)
+    assert sorted(fake_hyprland.requests) == ["j/monitors all", "j/version"]  # concurrent probes
+
+
+def test_lua_syntax_detection(fake_hyprland):
+    assert not utils._using_lua_syntax()
+    utils._using_lua_syntax.cache_clear()
+    fake_hyprland.replies["j/version"] = '{"version": "0.55.1", "tag": "v0.55.1"}'
+    assert utils._using_lua_syntax()
@@ -0,0 +1,109 @@
+"""Tests for the best-fit matching of profiles with partial output sets."""
+
+import sys
+
+sys.path.insert(0, "src")
+
+import pyglet
+import pytest
+import tomli_w
+
+pyglet.options["headless"] = True
+
+from wlr_layout_ui import matching, profiles  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.types import Mode, Screen  # ruff: ignore[module-import-not-at-top-of-file]
+
+FHD = Mode(1920, 1080, 60.0)
+UHD = Mode(3840, 2160, 60.0)
+
+
+def _entry(uid, x=0, identity=None, width=1920, height=1080, scale=1.0):
+    entry = {"uid": uid, "active": True, "width": width, "height": height, "freq": 60.0, "x": x, "y": 0, "scale": scale, "transform": 0}
+    if identity is not None:
+        entry["identity"] = identity
+    return entry
+
+
+def _screen(uid, identity=None, mode=FHD):
+    return Screen(uid=uid, name=uid, active=True, mode=mode, available=[UHD, FHD], identity=identity)
+
+
+@pytest.fixture
+def index(tmp_path):
+    cfg = tmp_path / "wlrlui.toml"
+    cfg.write_text(
+        tomli_w.dumps({
+            "laptop": [_entry("eDP-1", identity="LAP")],
+            "docked": [_entry("eDP-1", identity="LAP"), _entry("DP-1", 1920, identity="DELL", width=3840, height=2160, scale=2.0)],
+            "desk": [_entry("eDP-1", identity="LAP"), _entry("DP-2", 1920)],
+            "tv": [_entry("HDMI-A-1", identity="TV")],
+        })
+    )
+    return profiles.ProfileIndex(profiles.ProfileStore(cfg), tmp_path / "index.json")
+
+
+def test_exact_match_first(index):
+    assert matching.find_profile(index, [_screen("eDP-1", "LAP")]) == ("laptop", index.refresh()["laptop"], True)
+
+
+def test_extra_output(index):
+    screens = [_screen("eDP-1", "LAP"), _screen("DP-1", "DELL", UHD), _screen("HDMI-A-2", "EPSON")]
+    name, profile, exact = matching.find_profile(index, screens)
+    assert (name, exact) == ("docked", False)
+    assert [(e["uid"], e["x"], e["y"]) for e in profile] == [("eDP-1", 0, 0), ("DP-1", 1920, 0), ("HDMI-A-2", 3840, 0)]
+    assert (profile[2]["width"], profile[2]["height"]) == (1920, 1080)
+    assert profiles.match_profile(profile, screens) is not None
+
+
+def test_missing_output(index):
+    # docked and desk both pair two screens out of three: the identities decide
+    screens = [_screen("eDP-1", "LAP"), _screen("DP-1", "DELL", UHD), _screen("DP-2")]
+    fit = matching.best_fit(index, screens)
+    assert fit.name == "docked"
+    assert fit.score == (2, 0, 2, 2)
+    # nothing in common
+    assert matching.best_fit(index, [_screen("DP-5", "OTHER")]) is None
+
+
+def test_score():
+    screens = [_screen("eDP-1", "LAP"), _screen("DP-1")]
+    fit = matching.score_profile("p", [_entry("eDP-1", identity="LAP"), _entry("DP-1", width=1234), _entry("DP-9")], screens)
+    assert fit.score == (2, -1, 1, 1)
+    assert set(fit.entries) == {"eDP-1", "DP-1"}
+
+
+def test_ties(index):
+    screens = [_screen("eDP-1", "LAP"), _screen("HDMI-A-1", "TV")]
+    # laptop and tv pair one screen each, with the same score: alphabetical order
+    assert matching.best_fit(index, screens).name == "laptop"
+    index.mark_used("tv")
+    assert matching.best_fit(index, screens).name == "tv"
+    # the result doesn't depend on the order of the screens
+    assert matching.best_fit(index, screens[::-1]).name == "tv"
+
+
+def test_derived_layout_after_placed_outputs():
+    fit = matching.Fit("p", {"eDP-1": _entry("eDP-1", 2000), "DP-1": _entry("DP-1", 0, scale=2.0)}, (2, 0, 0, 2))
+    screens = [_screen("DP-1"), _screen("eDP-1"), _screen("DP-2", mode=UHD), _screen("DP-3", mode=None)]
+    screens[3].active = False
+    screens[3].available = []
+    profile = matching.derive_profile(fit, screens)
+    assert [(e["uid"], e.get("x")) for e in profile] == [("DP-1", 0), ("eDP-1", 2000), ("DP-2", 3920), ("DP-3", None)]
+    assert profile[3]["active"] is False
+
+
+def test_undocked_with_lid_closed_profile(tmp_path):
+    cfg = tmp_path / "wlrlui.toml"
+    lid_closed = [dict(_entry("eDP-1", identity="LAP"), active=False), _entry("DP-1", identity="DELL")]
+    cfg.write_text(tomli_w.dumps({"closed": lid_closed}))
+    index = profiles.ProfileIndex(profiles.ProfileStore(cfg), tmp_path / "index.json")
+    laptop = [_screen("eDP-1", "LAP")]
+    # the only screen would be turned off
+    assert matching.find_profile(index, laptop) is None
+    # another profile keeping it on is picked instead, despite a lower score
+    cfg.write_text(tomli_w.dumps({"closed": lid_closed, "desk": [_entry("eDP-1"), _entry("DP-2", 1920)]}))
+    name, profile, exact = matching.find_profile(index, laptop)
+    assert (name, exact) == ("desk", False)
+    assert [(e["uid"], e["active"]) for e in profile] == [("eDP-1", True)]
+    # with a new output, it is enabled next to the paired ones
+    assert matching.best_fit(index, [*laptop, _screen("HDMI-A-1")]).name == "closed"
@@ -0,0 +1,94 @@
+"""Tests for the per-screen mode index."""
+
+import sys
+
+sys.path.insert(0, "src")
+
+from wlr_layout_ui.screens import _current_mode
+from wlr_layout_ui.types import Mode, ModeIndex, Screen
+from wlr_layout_ui.utils import _mode_index, find_matching_mode, sorted_frequencies, sorted_resolutions
+
+MODES = [
+    Mode(1920, 1080, 60.0),
+    Mode(3840, 2160, 30.0),
+    Mode(1920, 1080, 144.0),
+    Mode(3840, 2160, 60.0),
+    Mode(1920, 1080, 59.94),
+    Mode(1280, 720, 60.0),
+    Mode(1920, 1080, 60.0),  # duplicate
+]
+
+
+def test_resolutions_sorted():
+    assert ModeIndex(MODES).resolutions == [(3840, 2160), (1920, 1080), (1280, 720)]
+
+
+def test_frequencies_sorted():
+    index = ModeIndex(MODES)
+    assert index.frequencies((1920, 1080)) == [144.0, 60.0, 59.94]
+    assert index.frequencies([3840, 2160]) == [60.0, 30.0]
+    assert index.frequencies((800, 600)) == []
+
+
+def test_exact_lookup():
+    index = ModeIndex(MODES)
+    assert index.find((1920, 1080), 60.0) is MODES[0]
+    assert index.find((1920, 1080), 59.94) is MODES[4]
+
+
+def test_nearest_frequency():
+    index = ModeIndex(MODES)
+    assert index.find((1920, 1080), 120.0) is MODES[2]
+    assert index.find((1920, 1080), 59.95) is MODES[4]
+    assert index.find((1920, 1080), 200.0) is MODES[2]
+    assert index.find((1920, 1080), 10.0) is MODES[4]
+    assert index.find((3840, 2160), 45.0) is MODES[1]  # tie: lowest wins
+    assert index.find((800, 600), 60.0) is None
+
+
+def test_tolerance():
+    index = ModeIndex(MODES)
+    assert index.find((1920, 1080), 59.997, tolerance=1.0) is MODES[0]
+    assert index.find((1920, 1080), 120.0, tolerance=1.0) is None
+    assert index.find((1920, 1080), 144.4, tolerance=1.0) is MODES[2]
+
+
+def test_screen_match_mode():
+    screen = Screen(uid="DP-1", name="test", available=MODES)
+    assert screen.match_mode((3840, 2160), 59.997) is MODES[3]
+    assert screen.match_mode((3840, 2160), 75.0) is None
+    assert screen.match_mode((2560, 1440), 60.0) is None
+
+
+def test_current_mode_keeps_resolution():
+    # difflib used to pick "1920x1080@59.94Hz", the closest looking string
+    screen = Screen(uid="DP-1", name="test", available=[Mode(1920, 1080, 59.94), Mode(2560, 1440, 59.95)])
+    monitor = {"width": 2560, "height": 1440, "refreshRate": 59.951}
+    assert _current_mode(monitor, screen) is screen.available[1]
+    custom = _current_mode({"width": 1920, "height": 1080, "refreshRate": 75.002}, screen)
+    assert custom == Mode(1920, 1080, 75.0)
+
+
+def test_utils_wrappers():
+    _mode_index.cache_clear()
+    assert sorted_resolutions(MODES) == [(3840, 2160), (1920, 1080), (1280, 720)]
+    assert sorted_frequencies(MODES, 1920, 1080) == [144.0, 60.0, 59.94]
+    assert sorted_frequencies(MODES) == [144.0, 60.0, 59.94, 30.0]
+    assert find_matching_mode(MODES, (3840, 2160), 59.0) is MODES[3]
+    assert _mode_index.cache_info().currsize == 1  # the index is shared by the calls
+
+
+def test_screen_index_is_cached():
+    screen = Screen(uid="DP-1", name="test", available=list(MODES))
+    index = screen.mode_index
+    assert screen.mode_index is index
+
+
+def test_screen_index_invalidation():
+    screen = Screen(uid="DP-1", name="test", available=list(MODES))
+    index = screen.mode_index
+    screen.available = [*screen.available, Mode(2560, 1440, 165.0)]
+    assert screen.mode_index is not index
+    assert screen.mode_index.resolutions[1] == (2560, 1440)
+    screen.available = [Mode(800, 600, 60.0)]
+    assert screen.mode_index.resolutions == [(800, 600)]
@@ -0,0 +1,136 @@
+"""Tests for the minimal apply plans and the commands built from them."""
+
+import sys
+
+sys.path.insert(0, "src")
+
+import pyglet
+
+pyglet.options["headless"] = True
+
+from wlr_layout_ui import plan, utils  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.plan import DISABLE, ENABLE, MODE, MOVE, Change, OutputState, plan_layout, snapshot  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.types import Mode, Rect, Screen  # ruff: ignore[module-import-not-at-top-of-file]
+
+FHD = Mode(1920, 1080, 60.0)
+UHD = Mode(3840, 2160, 60.0)
+
+
+def _screens():
+    return [
+        Screen(uid="eDP-1", name="laptop", active=True, mode=FHD, position=(0, 0), available=[FHD]),
+        Screen(uid="DP-1", name="4K", active=True, mode=UHD, position=(1920, 0), scale=2, available=[UHD, FHD]),
+        Screen(uid="HDMI-A-1", name="TV", active=False, mode=None, available=[FHD]),
+    ]
+
+
+def _rects(*xs):
+    """GUI rects of a single row layout, left edges at *xs* (flipped y, like the GUI)."""
+    return [Rect(x, -1080, 1920, 1080) for x in xs]
+
+
+def test_no_change():
+    screens = _screens()
+    live = snapshot(screens)
+    assert plan_layout(screens, [s.position for s in screens], live) == []
+    assert utils.make_command_legacy(screens, _rects(0, 1920, 0), wayland=True, live=live) == []
+    assert utils._make_command_hyprland_old(screens, _rects(0, 1920, 0), live) == []
+    assert utils._make_command_hyprland_lua(screens, _rects(0, 1920, 0), live) == []
+    assert utils.make_command_sway(screens, _rects(0, 1920, 0), live) == []
+
+
+def test_change_kinds():
+    screens = _screens()
+    live = snapshot(screens)
+    edp, dp, hdmi = screens
+    edp.position = (0, 100)
+    dp.mode = FHD
+    hdmi.active, hdmi.mode, hdmi.position = True, FHD, (3840, 0)
+    changes = plan_layout(screens, [s.position for s in screens], live)
+    assert [(c.kind, c.uid) for c in changes] == [(MOVE, "eDP-1"), (MODE, "DP-1"), (ENABLE, "HDMI-A-1")]
+    assert changes[1].state == OutputState(active=True, mode=FHD, position=(1920, 0), scale=2)
+
+    hdmi.active = False
+    edp.active = False
+    changes = plan_layout(screens, [s.position for s in screens], live)
+    assert [(c.kind, c.uid) for c in changes] == [(DISABLE, "eDP-1"), (MODE, "DP-1")]
+
+
+def test_scale_tolerance():
+    screens = _screens()
+    live = snapshot(screens)
+    screens[1].scale = 2.0000001
+    assert plan_layout(screens, [s.position for s in screens], live) == []
+    screens[1].scale = 1.5
+    assert [c.kind for c in plan_layout(screens, [s.position for s in screens], live)] == [MODE]
+
+
+def test_without_live_state():
+    screens = _screens()
+    changes = plan_layout(screens, [(0, 0), (1920, 0), (0, 0)])
+    assert [c.kind for c in changes] == [ENABLE, ENABLE, DISABLE]
+    assert changes[0] == Change(ENABLE, "eDP-1", OutputState(active=True, mode=FHD, position=(0, 0)))
+
+
+def test_legacy_deltas():
+    screens = _screens()
+    live = snapshot(screens)
+    screens[2].active = True
+    screens[2].mode = FHD
+    (cmd,) = utils.make_command_legacy(screens, _rects(0, 2000, 3920), wayland=True, live=live)
+    assert cmd == "wlr-randr --output DP-1 --pos 2000,0 --output HDMI-A-1 --on --pos 3920,0 --mode 1920x1080"
+    (cmd,) = utils.make_command_legacy(screens, _rects(0, 2000, 3920), wayland=False, live=live)
+    assert cmd.startswith("xrandr --output DP-1 --pos 2000x0 ")
+
+
+def test_lua_toggles_only_changed_outputs():
+    screens = _screens()
+    live = snapshot(screens)
+    # a move only: no toggle, hence no wait
+    (cmd,) = utils._make_command_hyprland_lua(screens, _rects(0, 2000, 0), live)
+    assert cmd.startswith('hyprctl eval \'hl.monitor({output="DP-1", mode=')
+    assert "disabled" not in cmd
+    assert "eDP-1" not in cmd
+    screens[0].active = False
+    toggle, sleep, configure = utils._make_command_hyprland_lua(screens, _rects(0, 2000, 0), live)
+    assert toggle == "hyprctl eval 'hl.monitor({output=\"eDP-1\", disabled=true})'"
+    assert sleep == "sleep 2"
+    assert "DP-1" in configure
+    assert "eDP-1" not in configure
+    # disabling only: nothing to configure afterwards
+    assert utils._make_command_hyprland_lua(screens, _rects(0, 1920, 0), live) == [toggle]
+
+
+def test_rects_left_untouched():
+    rects = _rects(100, 2020, 0)
+    utils.make_command_legacy(_screens(), rects, wayland=True)
+    assert [(r.x, r.y) for r in rects] == [(100, -1080), (2020, -1080), (0, -1080)]
+    assert utils.layout_positions(rects) == [(100, 0), (2020, 0), (0, 0)]
+
+
+def test_canonical_layout():
+    screens = _screens()
+    live = snapshot(screens)
+    # same layout at another origin, with the scale as reported by the compositor
+    shifted = snapshot(screens, [(100, 50), (2020, 50), (0, 0)])
+    shifted["DP-1"] = OutputState(active=True, mode=UHD, position=(2020, 50), scale=2.0000002)
+    assert plan.canonical_layout(shifted) == plan.canonical_layout(live)
+    assert plan.layout_digest(shifted) == plan.layout_digest(live)
+    assert hash(plan.canonical_layout(live))
+    for state in (
+        OutputState(active=True, mode=UHD, position=(1920, 10), scale=2),
+        OutputState(active=True, mode=UHD, position=(1920, 0), scale=2, transform=1),
+        OutputState(active=False, mode=None, position=(0, 0)),
+    ):
+        other = {**live, "DP-1": state}
+        assert plan.canonical_layout(other) != plan.canonical_layout(live)
+        assert plan.layout_digest(other) != plan.layout_digest(live)
+
+
+def test_same_layout():
+    live = snapshot(_screens())
+    assert plan.same_layout({uid: OutputState(s.active, s.mode, (s.position[0] + 5, 7), s.scale) for uid, s in live.items()}, live)
+    # a single output moved relative to the others
+    assert not plan.same_layout({"DP-1": OutputState(active=True, mode=UHD, position=(2000, 0), scale=2)}, live)
+    assert plan.same_layout({"DP-1": live["DP-1"]}, live)
+    assert not plan.same_layout({"DP-9": live["DP-1"]}, live)
@@ -0,0 +1,98 @@
+"""Tests for the concurrent display probing stage of screens.load()."""
+
+import sys
+import time
+
+sys.path.insert(0, "src")
+
+import pyglet
+import pytest
+
+pyglet.options["headless"] = True
+
+from wlr_layout_ui import hyprland, screens  # ruff: ignore[module-import-not-at-top-of-file]
+
+
+def _sleeper(delay, value):
+    def probe():
+        time.sleep(delay)
+        return value
+
+    return probe
+
+
+def _failing():
+    raise ValueError
+
+
+def test_probes_run_concurrently():
+    start = time.perf_counter()
+    results = screens.run_probes({"a": _sleeper(0.2, 1), "b": _sleeper(0.2, 2)})
+    assert results == {"a": 1, "b": 2}
+    assert time.perf_counter() - start < 0.35
+
+
+def test_probe_deadline():
+    start = time.perf_counter()
+    results = screens.run_probes({"slow": _sleeper(1.0, 1), "fast": _sleeper(0, 2)}, timeout=0.1)
+    assert results == {"slow": None, "fast": 2}
+    assert time.perf_counter() - start < 0.5
+
+
+def test_probe_failure():
+    assert screens.run_probes({"broken": _failing}) == {"broken": None}
+
+
+def test_probe_timings():
+    screens.probe_timings.clear()
+    screens.run_probes({"a": _sleeper(0.05, 1)})
+    assert screens.probe_timings["a"] >= 0.05
+
+
+@pytest.mark.usefixtures("fake_hyprland")
+def test_load_timings():
+    screens.load()
+    assert len(screens.displayInfo) == 2
+    assert set(screens.probe_timings) == {"hyprctl version", "hyprctl monitors", "edid", "total"}
+    assert screens.probe_timings["total"] >= screens.probe_timings["hyprctl monitors"]
+
+
+@pytest.mark.usefixtures("no_hyprland")
+def test_hyprctl_fallback_timeout(monkeypatch):
+    calls = []
+
+    def fake_run(args, **kwargs: float):
+        calls.append((args, kwargs["timeout"]))
+        raise hyprland.subprocess.TimeoutExpired(args, kwargs["timeout"])
+
+    monkeypatch.setattr(hyprland.subprocess, "run", fake_run)
+    with pytest.raises(hyprland.subprocess.TimeoutExpired):
+        hyprland.hyprctl_json("monitors all", timeout=0.5)
+    assert calls == [(["hyprctl", "-j", "monitors", "all"], 0.5)]
+
+
+@pytest.mark.usefixtures("no_hyprland")
+@pytest.mark.parametrize(("version_delay", "retried"), [(0.5, False), (0, True)])
+def test_hyprland_unavailable(monkeypatch, version_delay, retried):
+    monkeypatch.delenv("SWAYSOCK", raising=False)
+    monkeypatch.setattr(screens, "LEGACY", False)
+    monkeypatch.setattr(screens, "PROBE_TIMEOUT", 0.2)
+    monkeypatch.setattr(screens, "_probe_hyprland_version", _sleeper(version_delay, value=True))
+    monkeypatch.setattr(screens, "_probe_hyprland_monitors", _failing)
+    monkeypatch.setattr(screens, "load_screens", lambda: [screens.Screen(uid="DP-1", name="DP-1")])
+    monkeypatch.delitem(screens.config, "hyprland", raising=False)
+    timeouts = []
+
+    def hyprctl_json(command, timeout=None):
+        timeouts.append(timeout)
+        raise ValueError(command)
+
+    monkeypatch.setattr(screens, "hyprctl_json", hyprctl_json)
+    start = time.perf_counter()
+    screens.load()
+    assert time.perf_counter() - start < 0.4
+    # the monitors are queried again within the deadline, if there is time left
+    assert len(timeouts) == retried
+    assert all(0 < timeout <= 0.2 for timeout in timeouts)
+    assert "hyprland" not in screens.config
+    assert [screen.uid for screen in screens.displayInfo] == ["DP-1"]
@@ -0,0 +1,151 @@
+"""Tests for the profile store and index."""
+
+import os
+import sys
+
+sys.path.insert(0, "src")
+
+import pyglet
+import pytest
+import tomli_w
+
+pyglet.options["headless"] = True
+
+from wlr_layout_ui import profiles  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.types import Mode, Screen  # ruff: ignore[module-import-not-at-top-of-file]
+
+DOCKED = [{"uid": "eDP-1", "active": True, "width": 1920, "height": 1080, "freq": 60.0, "x": 0, "y": 0}]
+
+
+@pytest.fixture
+def cfg(tmp_path):
+    path = tmp_path / "wlrlui.toml"
+    path.write_text(tomli_w.dumps({"docked": DOCKED}))
+    return path
+
+
+def test_parsed_once(cfg, monkeypatch):
+    store = profiles.ProfileStore(cfg)
+    assert store.load() == {"docked": DOCKED}
+    monkeypatch.setattr(profiles.tomli, "load", pytest.fail)
+    assert store.load() == {"docked": DOCKED}
+    # own writes don't need a new parse either
+    store.save("laptop", DOCKED)
+    store.delete("docked")
+    assert store.load() == {"laptop": DOCKED}
+
+
+def test_external_changes(cfg):
+    store = profiles.ProfileStore(cfg)
+    first = store.load()
+    cfg.write_text(tomli_w.dumps({"docked": DOCKED, "other": DOCKED}))
+    assert set(store.load()) == {"docked", "other"}
+    assert set(first) == {"docked"}  # earlier snapshots are left alone
+    # same size and mtime, another file
+    replacement = cfg.with_name("new.toml")
+    replacement.write_text(tomli_w.dumps({"dOcked": DOCKED, "other": DOCKED}))
+    stat = cfg.stat()
+    os.utime(replacement, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    replacement.replace(cfg)
+    assert set(store.load()) == {"dOcked", "other"}
+    cfg.unlink()
+    assert store.load() == {}
+
+
+def test_atomic_write(cfg):
+    cfg.chmod(0o600)
+    link = cfg.with_name("link.toml")
+    link.symlink_to(cfg)
+    store = profiles.ProfileStore(link)
+    store.save("laptop", DOCKED)
+    assert link.is_symlink()
+    assert cfg.stat().st_mode & 0o777 == 0o600
+    assert sorted(p.name for p in cfg.parent.iterdir()) == ["link.toml", "wlrlui.toml"]
+    assert set(profiles.ProfileStore(cfg).load()) == {"docked", "laptop"}
+    store.delete("missing")
+    assert set(store.load()) == {"docked", "laptop"}
+
+
+def test_shared_store(cfg, monkeypatch):
+    monkeypatch.setattr(profiles, "cfg_file", cfg)
+    assert profiles.get_store() is profiles.get_store()
+    profiles.save_profile("laptop", DOCKED)
+    assert set(profiles.load_profiles()) == {"docked", "laptop"}
+    profiles.delete_profile("docked")
+    assert set(profiles.get_store().load()) == {"laptop"}
+
+
+def _screen(uid, identity=None):
+    modes = [Mode(1920, 1080, 60.0)]
+    return Screen(uid=uid, name=uid, active=True, mode=modes[0], available=modes, identity=identity)
+
+
+def _entry(uid, identity=None):
+    entry = dict(DOCKED[0], uid=uid)
+    if identity is not None:
+        entry["identity"] = identity
+    return entry
+
+
+def test_index(cfg, monkeypatch):
+    store = profiles.ProfileStore(cfg)
+    store.save("b-desk", [_entry("eDP-1", "LAP"), _entry("DP-1", "DELL")])
+    store.save("a-desk", [_entry("eDP-1", "LAP"), _entry("DP-2", "DELL")])
+    store.save("projector", [_entry("eDP-1", "LAP"), _entry("HDMI-A-1")])
+    path = cfg.with_name("index.json")
+    index = profiles.ProfileIndex(store, path)
+    assert index.match([_screen("eDP-1")]) == "docked"
+    # same monitors on other connectors
+    assert index.match([_screen("eDP-1", "LAP"), _screen("DP-3", "DELL")]) == "a-desk"
+    # mixed: the laptop found by identity on another connector, the projector by connector
+    assert index.match([_screen("eDP-2", "LAP"), _screen("HDMI-A-1", "EPSON")]) == "projector"
+    assert index.match([_screen("eDP-1"), _screen("DP-9")]) is None
+
+    # most recently used first, persisted
+    index.mark_used("b-desk")
+    reopened = profiles.ProfileIndex(profiles.ProfileStore(cfg), path)
+    monkeypatch.setattr(profiles, "profile_keys", pytest.fail)  # not rebuilt
+    assert reopened.match([_screen("eDP-1", "LAP"), _screen("DP-3", "DELL")]) == "b-desk"
+    monkeypatch.undo()
+
+    # rebuilt when the profiles change
+    store.delete("b-desk")
+    assert index.match([_screen("eDP-1", "LAP"), _screen("DP-3", "DELL")]) == "a-desk"
+    assert "b-desk" not in index.used
+
+
+def test_index_location(cfg, monkeypatch, cache_home):
+    monkeypatch.setattr(profiles, "cfg_file", cfg)
+    profiles.get_index().mark_used("docked")
+    assert profiles.get_index().path.parent == cache_home / "wlr-layout-ui"
+    assert profiles.get_index().path.exists()
+    assert sorted(p.name for p in cfg.parent.iterdir()) == ["cache", "wlrlui.toml"]
+
+
+def test_index_used_merged(cfg):
+    store = profiles.ProfileStore(cfg)
+    store.save("laptop", DOCKED)
+    path = cfg.with_name("index.json")
+    daemon, cli = profiles.ProfileIndex(store, path), profiles.ProfileIndex(profiles.ProfileStore(cfg), path)
+    daemon.refresh()
+    cli.refresh()
+    daemon.mark_used("docked")
+    cli.mark_used("laptop")
+    daemon.mark_used("docked")  # doesn't drop the other one
+    reopened = profiles.ProfileIndex(store, path)
+    reopened.refresh()
+    assert set(reopened.used) == {"docked", "laptop"}
+
+
+def test_index_matches_like_a_scan(cfg):
+    store = profiles.ProfileStore(cfg)
+    uids = ["eDP-1", "DP-1", "DP-2"]
+    for i in range(40):
+        store.save(f"p{i:02d}", [_entry(uid, f"M{(i + n) % 5}" if (i >> n) & 1 else None) for n, uid in enumerate(uids[: 1 + i % 3])])
+    index = profiles.ProfileIndex(store, cfg.with_name("index.json"))
+    for i in range(60):
+        screens = [_screen(uid, f"M{(i + n) % 5}" if (i >> n) & 1 else None) for n, uid in enumerate(uids[: 1 + i % 3])]
+        screens = screens[i % 2 :] + screens[: i % 2]  # other order
+        if i % 7 == 0:  # other connectors
+            screens = [_screen(f"HDMI-A-{n}", screen.identity) for n, screen in enumerate(screens)]
+        assert index.match(screens) == profiles.find_matching_profile(store.load(), screens)
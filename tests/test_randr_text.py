@@ -0,0 +1,92 @@
+"""Tests for the wlr-randr / xrandr text parsers."""
+
+import subprocess
+import sys
+
+sys.path.insert(0, "src")
+
+import pyglet
+import pytest
+
+pyglet.options["headless"] = True
+
+from fakes import FIXTURES  # ruff: ignore[module-import-not-at-top-of-file]
+
+from wlr_layout_ui import randr_text  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.types import Mode  # ruff: ignore[module-import-not-at-top-of-file]
+
+
+def _parse(name, tool):
+    return randr_text.parse((FIXTURES / tool / name).read_text(), tool)
+
+
+def test_wlr_randr():
+    parser = _parse("laptop-dock.txt", "wlr-randr")
+    assert parser.errors == []
+    edp, hdmi, dp = parser.screens
+    assert edp.uid == "eDP-1"
+    assert edp.name == "Sharp Corporation 0x14F9 (eDP-1)"
+    assert edp.active
+    assert edp.scale == pytest.approx(1.5)
+    assert edp.mode is edp.available[0] == Mode(2256, 1504, 59.999001)
+    assert hdmi.position == (1504, 0)
+    assert hdmi.transform == 1
+    assert hdmi.mode == Mode(2560, 1440, 59.951)
+    assert len(hdmi.available) == 4
+    assert not dp.active
+    assert dp.mode is None
+    assert dp.available == (Mode(1024, 768, 60.004002),)
+
+
+def test_wlr_randr_malformed():
+    parser = _parse("malformed.txt", "wlr-randr")
+    assert [n for n, _ in parser.errors] == [5, 7, 8, 9, 11]
+    first, second = parser.screens
+    assert len(first.available) == 2
+    assert first.position == (-1920, 0)
+    assert first.transform == 0
+    assert first.scale == 1
+    assert second.uid == "HEADLESS-2"
+    assert not second.active
+
+
+def test_xrandr():
+    parser = _parse("laptop-dock.txt", "xrandr")
+    assert parser.errors == []
+    assert [s.uid for s in parser.screens] == ["eDP-1", "DP-2", "DP-3"]
+    edp, dp2, dp3 = parser.screens
+    assert edp.active
+    assert edp.mode == Mode(2560, 1600, 60.0)
+    assert len(edp.available) == 11
+    assert edp.mode_index.frequencies((1600, 900)) == [60.0, 59.95, 59.82]
+    assert dp2.position == (2560, 0)
+    assert dp2.mode == Mode(1920, 1080, 60.0)
+    assert (1920, 1080) in dp2.mode_index.resolutions
+    assert len(dp2.available) == 7  # interlaced modes skipped
+    assert not dp3.active
+    assert dp3.mode is None
+
+
+def test_xrandr_malformed():
+    parser = _parse("single.txt", "xrandr")
+    assert [n for n, _ in parser.errors] == [5]
+    (screen,) = parser.screens
+    assert screen.available == (Mode(1920, 1080, 60.0), Mode(1280, 1024, 75.02), Mode(1280, 1024, 60.02))
+
+
+def test_run_streams_from_pipe():
+    script = "import sys, time\nfor line in open(sys.argv[1]):\n    sys.stdout.write(line); sys.stdout.flush()"
+    path = FIXTURES / "wlr-randr" / "laptop-dock.txt"
+    screens = randr_text.run("wlr-randr", timeout=5, args=[sys.executable, "-c", script, str(path)])
+    assert [s.uid for s in screens] == ["eDP-1", "HDMI-A-1", "DP-2"]
+
+
+def test_run_timeout():
+    args = [sys.executable, "-c", "import time; print('eDP-1 \"x\"', flush=True); time.sleep(10)"]
+    with pytest.raises(subprocess.TimeoutExpired):
+        randr_text.run("wlr-randr", timeout=0.2, args=args)
+
+
+def test_run_missing_tool():
+    with pytest.raises(FileNotFoundError):
+        randr_text.run("wlr-randr", args=["/nonexistent/wlr-randr"])
@@ -0,0 +1,81 @@
+"""Display discovery on recorded captures, through every backend."""
+
+import os
+import sys
+
+sys.path.insert(0, "src")
+
+import pyglet
+import pytest
+
+pyglet.options["headless"] = True
+
+from replay import captures, replay  # ruff: ignore[module-import-not-at-top-of-file]
+
+from wlr_layout_ui import screens  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.utils import config  # ruff: ignore[module-import-not-at-top-of-file]
+
+# capture -> (screens, active screens, current mode of the first screen)
+EXPECTED = {
+    "multi-gpu": (4, 3, (2560, 1600, 165.0)),
+    "16-heads": (16, 16, (1920, 1080, 60.0)),
+    "pathological": (3, 2, (3840, 2160, 119.88)),
+}
+
+CASES = [(backend, name) for backend in ("hyprland", "wlr-randr", "xrandr") for name in EXPECTED]
+
+
+def test_captures():
+    for backend in ("hyprland", "wlr-randr", "xrandr"):
+        assert set(EXPECTED) <= set(captures(backend))
+
+
+@pytest.mark.parametrize(("backend", "name"), CASES)
+def test_load(backend, name, tmp_path):
+    count, active, first_mode = EXPECTED[name]
+    with replay(backend, name, tmp_path):
+        screens.load()
+        assert config["hyprland"] == (backend == "hyprland")
+    info = screens.displayInfo
+    assert len(info) == count
+    assert len({s.uid for s in info}) == count
+    assert sum(s.active for s in info) == active
+    mode = info[0].mode
+    assert mode is not None
+    assert (mode.width, mode.height, mode.freq) == first_mode
+    for screen in info:
+        if screen.active:
+            assert any(screen.mode is m for m in screen.available)
+
+
+def test_pathological_modes(tmp_path):
+    with replay("xrandr", "pathological", tmp_path):
+        screens.load()
+    hdmi, tv, empty = screens.displayInfo
+    assert len(hdmi.available) > 900
+    assert len(set(hdmi.available)) < len(hdmi.available)  # duplicated EDID modes
+    assert len(hdmi.mode_index.resolutions) == len({(m.width, m.height) for m in hdmi.available})
+    assert {(m.width, m.height) for m in tv.available} == {(1920, 1080)}  # the interlaced modes are skipped
+    assert (empty.active, empty.mode, empty.available) == (False, None, ())
+
+
+def test_cached_replay(tmp_path):
+    with replay("hyprland", "16-heads", tmp_path) as server:
+        screens.load(cached=True)
+        first = list(screens.displayInfo)
+        server.requests.clear()
+        screens.load(cached=True)
+        assert server.requests == ["j/monitors all"]
+    assert screens.displayInfo == first
+
+
+def test_restores_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("WAYLAND_DISPLAY", "wayland-1")
+    legacy = screens.LEGACY
+    with replay("xrandr", "multi-gpu", tmp_path):
+        assert "WAYLAND_DISPLAY" not in os.environ
+        assert screens.LEGACY
+    assert os.environ["WAYLAND_DISPLAY"] == "wayland-1"
+    assert legacy == screens.LEGACY
+    with pytest.raises(FileNotFoundError), replay("xrandr", "no-such-capture"):
+        pass
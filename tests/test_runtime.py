@@ -0,0 +1,59 @@
+"""Tests for the runtime directory and the atomic writes."""
+
+import sys
+import tempfile
+
+sys.path.insert(0, "src")
+
+import pytest
+
+from wlr_layout_ui import runtime
+
+
+@pytest.fixture
+def no_runtime_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return tmp_path
+
+
+def test_runtime_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    assert runtime.runtime_dir() == tmp_path
+
+
+def test_private_fallback(no_runtime_dir):
+    path = runtime.runtime_dir()
+    assert path.parent == no_runtime_dir
+    assert path.stat().st_mode & 0o777 == 0o700
+    assert runtime.runtime_dir() == path
+
+
+@pytest.mark.usefixtures("no_runtime_dir")
+def test_shared_fallback_refused():
+    path = runtime.runtime_dir()
+    path.chmod(0o777)  # eg. created by another user
+    with pytest.raises(PermissionError):
+        runtime.runtime_dir()
+
+
+def test_write_atomic(tmp_path):
+    path = tmp_path / "data.json"
+    runtime.write_atomic(path, "first")
+    runtime.write_atomic(path, "second")
+    assert path.read_text(encoding="utf-8") == "second"
+    assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
+
+
+def test_write_atomic_failure(tmp_path, monkeypatch):
+    path = tmp_path / "data.json"
+    path.write_text("first", encoding="utf-8")
+
+    def refuse(*_args):
+        raise PermissionError
+
+    monkeypatch.setattr(runtime.Path, "replace", refuse)
+    with pytest.raises(PermissionError):
+        runtime.write_atomic(path, "second")
+    assert path.read_text(encoding="utf-8") == "first"
+    assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
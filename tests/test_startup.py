@@ -0,0 +1,51 @@
+"""Tests keeping the GUI stack out of the command line paths."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).parent.parent / "src"
+
+SCRIPT = """
+import sys
+from wlr_layout_ui import app
+sys.argv = ["wlrlui", *sys.argv[1:]]
+try:
+    app.main()
+except SystemExit:
+    pass
+print(" ".join(sorted(m for m in sys.modules if m.startswith(("pyglet", "wlr_layout_ui.gui", "wlr_layout_ui.widgets")))))
+"""
+
+
+def _run(tmp_path, *args):
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if key not in ("DISPLAY", "WAYLAND_DISPLAY", "HYPRLAND_INSTANCE_SIGNATURE", "SWAYSOCK")
+    }
+    env.update(HOME=str(tmp_path), XDG_RUNTIME_DIR=str(tmp_path), PYTHONPATH=str(SRC))
+    proc = subprocess.run([sys.executable, "-c", SCRIPT, *args], env=env, capture_output=True, text=True, timeout=30, check=True)
+    return proc.stdout.splitlines()[-1]
+
+
+@pytest.mark.parametrize("args", [["-l"], ["-m"], ["-h"], ["missing-profile"]])
+def test_no_gui_imports(tmp_path, args):
+    assert not _run(tmp_path, *args)
+
+
+def test_gui_still_importable():
+    import pyglet  # ruff: ignore[import-outside-top-level]
+
+    pyglet.options["headless"] = True
+    sys.path.insert(0, str(SRC))
+    from pyggets import Button, Rect  # ruff: ignore[import-outside-top-level]
+    from wlr_layout_ui import app, gui  # ruff: ignore[import-outside-top-level]
+
+    assert Rect.__module__ == "pyggets.geometry"
+    assert Button.__module__ == "pyggets.widgets"
+    assert callable(app.run_gui)
+    assert gui.UI
@@ -0,0 +1,112 @@
+"""Tests for the sway IPC backend, against a fake i3-ipc socket server."""
+
+import shlex
+import sys
+
+sys.path.insert(0, "src")
+
+import pyglet
+import pytest
+
+pyglet.options["headless"] = True
+
+from fakes import FakeSway  # ruff: ignore[module-import-not-at-top-of-file]
+
+from pyggets import Rect  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui import screens, sway, utils  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.apply import run_commands  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.types import Mode  # ruff: ignore[module-import-not-at-top-of-file]
+
+
+@pytest.fixture
+def fake_sway(tmp_path, monkeypatch, serve):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    monkeypatch.delenv("HYPRLAND_INSTANCE_SIGNATURE", raising=False)
+    monkeypatch.setitem(utils.config, "hyprland", value=False)
+    monkeypatch.setitem(utils.config, "sway", value=False)
+    yield serve(FakeSway(tmp_path))
+    client = sway.get_client()
+    if client:
+        client.close()
+
+
+@pytest.mark.usefixtures("fake_sway")
+def test_load_screens():
+    edp, dell, hdmi = sway.load_screens()
+    assert edp.uid == "eDP-1"
+    assert edp.name == "BOE 0x095F Unknown"
+    assert edp.scale == pytest.approx(1.5)
+    assert edp.mode is edp.available[0] == Mode(2256, 1504, 59.999)
+    assert dell.position == (1504, 0)
+    assert dell.transform == 1
+    assert dell.mode == Mode(2560, 1440, 59.951)
+    assert not hdmi.active
+    assert hdmi.mode is None
+    assert hdmi.scale == 1
+
+
+@pytest.mark.parametrize("scale", [None, -1, 0])
+def test_missing_scale(scale):
+    screen = sway.output_to_screen({"name": "HDMI-A-1", "active": False, "scale": scale})
+    assert screen.scale == pytest.approx(1.0)
+
+
+def test_detected_by_load(fake_sway):
+    screens.load()
+    assert utils.config["sway"]
+    assert [s.uid for s in screens.displayInfo] == ["eDP-1", "DP-3", "HDMI-A-1"]
+    assert fake_sway.messages == [(sway.GET_OUTPUTS, "")]
+
+
+def test_apply_batched(fake_sway):
+    screens.load()
+    _edp, dell, hdmi = screens.displayInfo
+    dell.mode = Mode(3840, 2160, 60.0)
+    dell.transform = 0
+    hdmi.active = True
+    hdmi.mode = hdmi.available[0]
+    rects = [Rect(0, 0, 1504, 1003), Rect(1504, 0, 3840, 2160), Rect(5344, 0, 1920, 1080)]
+    cmds = utils.make_command(screens.displayInfo, rects, wayland=True)
+    assert len(cmds) == 1
+    assert shlex.split(cmds[0])[0] == "swaymsg"
+    assert run_commands(cmds)
+
+    assert [kind for kind, _ in fake_sway.messages] == [sway.GET_OUTPUTS, sway.RUN_COMMAND]
+    assert fake_sway.messages[1][1].count("output ") == 3
+    assert fake_sway.connections == 1  # one persistent connection for the query and the apply
+    _, dell_out, hdmi_out = fake_sway.outputs
+    assert dell_out["current_mode"] == {"width": 3840, "height": 2160, "refresh": 60000}
+    assert dell_out["transform"] == "normal"
+    assert hdmi_out["active"]
+    assert hdmi_out["rect"]["x"] == 5344
+
+
+def test_disable_output(fake_sway):
+    edp, dell, hdmi = sway.load_screens()
+    edp.active = False
+    cmds = utils.make_command_sway([edp, dell, hdmi], [Rect(0, 0, 0, 0), Rect(0, 0, 1440, 2560), Rect(0, 0, 0, 0)])
+    assert "output eDP-1 disable" in cmds[0]
+    assert run_commands(cmds)
+    assert not fake_sway.outputs[0]["active"]
+
+
+@pytest.mark.usefixtures("fake_sway")
+def test_failed_command():
+    assert sway.run_swaymsg_command("swaymsg 'output DP-9 disable; output eDP-1 disable'") is False
+
+
+def test_reconnects(fake_sway):
+    sway.load_screens()
+    fake_sway.drop_clients()
+    assert len(sway.load_screens()) == 3
+    assert fake_sway.connections == 2
+
+
+def test_no_sway(tmp_path, monkeypatch):
+    monkeypatch.setenv("SWAYSOCK", str(tmp_path / "missing.sock"))
+    sway.get_client.cache_clear()
+    with pytest.raises(sway.SwayError):
+        sway.load_screens()
+    assert sway.run_swaymsg_command("swaymsg 'output eDP-1 disable'") is None
+    assert sway.run_swaymsg_command("wlr-randr --output eDP-1 --off") is None
+    sway.get_client.cache_clear()
@@ -0,0 +1,126 @@
+"""Tests for the transactional apply: verification and rollback."""
+
+import sys
+import time
+
+sys.path.insert(0, "src")
+
+import pyglet
+import pytest
+
+pyglet.options["headless"] = True
+
+from fakes import FakeHyprlandCompositor  # ruff: ignore[module-import-not-at-top-of-file]
+
+from wlr_layout_ui import screens, transaction, utils  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.plan import OutputState  # ruff: ignore[module-import-not-at-top-of-file]
+
+
+@pytest.fixture
+def compositor(tmp_path, monkeypatch, serve):
+    monkeypatch.setitem(utils.config, "hyprland", value=True)
+    return serve(FakeHyprlandCompositor(tmp_path))
+
+
+def _moved(state, x):
+    return OutputState(state.active, state.mode, (x, state.position[1]), state.scale, state.transform)
+
+
+def _monitor(server, name):
+    return next(m for m in server.monitors if m["name"] == name)
+
+
+def test_apply_verified(compositor):
+    before = transaction.current_state()
+    target = {**before, "DP-3": _moved(before["DP-3"], 2000)}
+    result = transaction.apply_layout(target, before)
+    assert result.ok
+    assert result.mismatches == []
+    assert result.rollback is None
+    assert len(result.commands) == 1
+    assert "eDP-1" not in result.commands[0]
+    assert _monitor(compositor, "DP-3")["x"] == 2000
+    assert transaction.current_state() == target
+
+
+def test_already_applied(compositor):
+    before = transaction.current_state()
+    result = transaction.apply_layout(dict(before), before)
+    assert result.ok
+    assert result.commands == []
+    assert not [r for r in compositor.requests if r.startswith("keyword")]
+
+
+def test_same_layout_elsewhere(compositor):
+    before = transaction.current_state()
+    shifted = {uid: _moved(state, state.position[0] + 500) for uid, state in before.items()}
+    result = transaction.apply_layout(shifted, before)
+    assert result.ok
+    assert result.commands == []
+    assert not [r for r in compositor.requests if r.startswith("keyword")]
+
+
+def test_refused_layout_rolled_back(compositor):
+    before = transaction.current_state()
+    target = {"eDP-1": _moved(before["eDP-1"], 3840), "DP-3": _moved(before["DP-3"], 0)}
+    compositor.refuse.add("DP-3")
+    start = time.perf_counter()
+    result = transaction.apply_layout(target, before, timeout=0.2)
+    assert time.perf_counter() - start < 1
+    assert not result.ok
+    assert result.mismatches == ["DP-3"]
+    # only eDP-1 moved, it's the only one to bring back
+    assert len(result.rollback) == 1
+    assert "DP-3" not in result.rollback[0]
+    assert transaction.current_state() == before
+
+
+def test_no_rollback_without_previous_state(compositor):
+    before = transaction.current_state()
+    compositor.refuse.add("DP-3")
+    result = transaction.apply_layout({"DP-3": _moved(before["DP-3"], 0)}, None, timeout=0)
+    assert not result.ok
+    assert result.mismatches == ["DP-3"]
+    assert result.rollback is None
+
+
+def test_unverifiable(compositor, monkeypatch):
+    before = transaction.current_state()
+
+    def fail():
+        raise OSError
+
+    monkeypatch.setattr(transaction, "query_screens", fail)
+    assert transaction.current_state() is None
+    result = transaction.apply_layout({"DP-3": _moved(before["DP-3"], 2000)}, before)
+    assert result.ok
+    assert result.rollback is None
+    assert _monitor(compositor, "DP-3")["x"] == 2000
+
+
+def test_query_screens_reports_disabled(compositor):
+    _monitor(compositor, "DP-3")["disabled"] = True
+    assert [s.active for s in screens.query_screens()] == [True, False]
+
+
+def test_gui_sends_the_whole_layout(compositor, tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))  # no profiles
+    monkeypatch.setattr(transaction, "VERIFY_TIMEOUT", 0)
+    _monitor(compositor, "eDP-1")["x"] = -1920
+    _monitor(compositor, "DP-3")["x"] = 0
+    from wlr_layout_ui import app, gui  # ruff: ignore[import-outside-top-level]
+
+    monkeypatch.setattr(gui, "LEGACY", False)
+    monkeypatch.setattr(screens, "LEGACY", False)
+    window = app.make_window()
+    try:
+        assert window.reference_state == transaction.current_state()
+        dell = next(s.screen for s in window.gui_screens if s.screen.uid == "DP-3")
+        dell.mode = next(m for m in dell.available if m.width == 3840 and m is not dell.mode)  # another refresh rate
+        window.action_save_layout()
+    finally:
+        window.close()
+    edp, dp3 = _monitor(compositor, "eDP-1"), _monitor(compositor, "DP-3")
+    assert dp3["refreshRate"] == pytest.approx(dell.mode.freq, abs=0.01)
+    assert dp3["x"] - edp["x"] == 1920  # still side by side
+    assert window.live_state == transaction.current_state()
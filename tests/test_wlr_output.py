@@ -0,0 +1,134 @@
+"""Tests for the wlr-output-management protocol client.
+
+Uses a fake compositor speaking the Wayland wire protocol on a Unix socket.
+"""
+
+import struct
+import sys
+
+sys.path.insert(0, "src")
+
+import pyglet
+import pytest
+
+pyglet.options["headless"] = True
+
+from fakes import FakeWaylandCompositor  # ruff: ignore[module-import-not-at-top-of-file]
+
+from pyggets import Rect  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui import wlr_output  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.apply import run_commands  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.utils import make_command_legacy  # ruff: ignore[module-import-not-at-top-of-file]
+
+
+def _heads():
+    return [
+        {
+            "name": "eDP-1",
+            "description": "Sharp Corporation 0x14F9",
+            "modes": [(2256, 1504, 59999, True), (1920, 1080, 60000, False)],
+            "current": 0,
+            "enabled": True,
+            "position": (0, 0),
+            "scale": 1.5,
+        },
+        {
+            "name": "HDMI-A-1",
+            "description": "LG Electronics LG ULTRAGEAR 104NTAB1F474",
+            "modes": [(2560, 1440, 143912, True), (2560, 1440, 59951, False), (1920, 1080, 60000, False)],
+            "current": 1,
+            "enabled": True,
+            "position": (1504, 0),
+            "transform": 1,
+        },
+        {
+            "name": "DP-2",
+            "description": "Unknown",
+            "modes": [(1024, 768, 60004, True)],
+            "current": None,
+            "enabled": False,
+        },
+    ]
+
+
+@pytest.fixture
+def compositor(tmp_path, serve):
+    return serve(FakeWaylandCompositor(tmp_path, _heads()))
+
+
+def test_pack_string():
+    assert wlr_output.pack_args("s", ["abc"]) == struct.pack("=I", 4) + b"abc\0"
+    assert wlr_output.pack_args("s", ["abcd"]) == struct.pack("=I", 5) + b"abcd\0\0\0\0"
+
+
+def test_unpack_roundtrip():
+    payload = wlr_output.pack_args("isuf", [-3, "hello", 7, 1.25])
+    assert wlr_output.unpack_args("isuf", payload) == [-3, "hello", 7, 1.25]
+
+
+@pytest.mark.usefixtures("compositor")
+def test_load_screens():
+    screens = wlr_output.load_screens()
+    assert [s.uid for s in screens] == ["eDP-1", "HDMI-A-1", "DP-2"]
+    edp, hdmi, dp = screens
+    assert edp.name == "Sharp Corporation 0x14F9"
+    assert edp.active
+    assert edp.scale == pytest.approx(1.5)
+    assert (edp.mode.width, edp.mode.height) == (2256, 1504)
+    assert edp.mode.freq == pytest.approx(59.999)
+    assert hdmi.position == (1504, 0)
+    assert hdmi.transform == 1
+    assert hdmi.mode.freq == pytest.approx(59.951)
+    assert len(hdmi.available) == 3
+    assert not dp.active
+    assert dp.mode is None
+
+
+def test_no_compositor(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    monkeypatch.setenv("WAYLAND_DISPLAY", "wayland-missing")
+    with pytest.raises(wlr_output.WaylandError):
+        wlr_output.load_screens()
+    assert wlr_output.run_wlr_randr_command("wlr-randr --output DP-1 --off") is None
+
+
+def test_parse_command():
+    targets = wlr_output.parse_wlr_randr_command("wlr-randr --output A --on --pos 10,20 --mode 800x600 --output B --off")
+    assert targets["A"].position == (10, 20)
+    assert targets["A"].mode == (800, 600, None)
+    assert not targets["B"].enabled
+    assert wlr_output.parse_wlr_randr_command("xrandr --output A --off") is None
+    assert wlr_output.parse_wlr_randr_command("wlr-randr --output A --bogus") is None
+
+
+def test_configure(compositor):
+    with wlr_output.OutputManager.connect() as manager:
+        ok = manager.configure({
+            "HDMI-A-1": wlr_output.HeadConfig(mode=(2560, 1440, 144.0), position=(0, 0)),
+            "eDP-1": wlr_output.HeadConfig(position=(2560, 0)),
+        })
+    assert ok
+    edp, hdmi, dp = compositor.heads
+    assert hdmi["current"] == 0
+    assert hdmi["position"] == (0, 0)
+    assert edp["position"] == (2560, 0)
+    assert edp["scale"] == pytest.approx(1.5)  # unchanged
+    assert not dp["enabled"]
+
+
+def test_test_only(compositor):
+    with wlr_output.OutputManager.connect() as manager:
+        assert manager.configure({"eDP-1": wlr_output.HeadConfig(enabled=False)}, test_only=True)
+    assert compositor.heads[0]["enabled"]
+    assert not compositor.applied
+
+
+def test_apply_generated_command(compositor):
+    screens = wlr_output.load_screens()
+    screens[0].active = False
+    rects = [Rect(0, 0, 1920, 1080), Rect(0, 0, 2560, 1440), Rect(0, 0, 0, 0)]
+    cmds = make_command_legacy(screens, rects, wayland=True)
+    assert run_commands(cmds)
+    assert not compositor.heads[0]["enabled"]
+    assert compositor.heads[1]["enabled"]
+    assert compositor.heads[1]["current"] == 1  # kept the current refresh rate
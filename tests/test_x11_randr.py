@@ -0,0 +1,111 @@
+"""Tests for the libXrandr backend.
+
+The X server tests run under ``Xvfb`` and are skipped when it or libXrandr
+isn't installed.
+"""
+
+import ctypes.util
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, "src")
+
+import pyglet
+import pytest
+
+pyglet.options["headless"] = True
+
+from pyggets import Rect  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui import x11_randr  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.types import Mode, Screen  # ruff: ignore[module-import-not-at-top-of-file]
+from wlr_layout_ui.utils import make_command_legacy  # ruff: ignore[module-import-not-at-top-of-file]
+
+
+def test_parse_command():
+    screens = [
+        Screen(uid="eDP-1", name="a", active=True, mode=Mode(1920, 1080, 60.0)),
+        Screen(uid="HDMI-1", name="b"),
+    ]
+    (cmd,) = make_command_legacy(screens, [Rect(0, 0, 1920, 1080), Rect(0, 0, 0, 0)], wayland=False)
+    targets = x11_randr.parse_xrandr_command(cmd)
+    assert targets["eDP-1"].enabled
+    assert targets["eDP-1"].position == (0, 0)
+    assert targets["eDP-1"].mode == (1920, 1080, None)
+    assert not targets["HDMI-1"].enabled
+
+
+def test_parse_command_options():
+    targets = x11_randr.parse_xrandr_command("xrandr --output DP-1 --auto --mode 2560x1440 --rate 143.91 --rotate left")
+    assert targets["DP-1"].mode == (2560, 1440, 143.91)
+    assert targets["DP-1"].transform == 1
+    assert x11_randr.parse_xrandr_command("wlr-randr --output DP-1 --off") is None
+    assert x11_randr.parse_xrandr_command("xrandr --output DP-1 --rotate sideways") is None
+    assert x11_randr.parse_xrandr_command("xrandr --dpi 96") is None
+
+
+def test_rotations():
+    for transform in range(8):
+        assert x11_randr.rotation_to_transform(x11_randr.transform_to_rotation(transform)) == transform
+    assert x11_randr.transform_to_rotation(1) == 2  # RR_Rotate_90
+
+
+def test_mode_refresh():
+    info = x11_randr.XRRModeInfo(width=1920, height=1080, dotClock=148500000, hTotal=2200, vTotal=1125)
+    assert x11_randr.mode_refresh(info) == pytest.approx(60.0)
+    info.modeFlags = x11_randr.RR_INTERLACE
+    assert x11_randr.mode_refresh(info) == pytest.approx(120.0)
+    info.hTotal = 0
+    assert x11_randr.mode_refresh(info) == pytest.approx(0.0)
+
+
+@pytest.fixture(scope="module")
+def xvfb():
+    if not shutil.which("Xvfb") or not ctypes.util.find_library("Xrandr"):
+        pytest.skip("Xvfb or libXrandr not installed")
+    display = ":73"
+    proc = subprocess.Popen(["Xvfb", display, "-screen", "0", "1920x1080x24", "+extension", "RANDR"], stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    previous = os.environ.get("DISPLAY")
+    os.environ["DISPLAY"] = display
+    x11_randr.get_connection.cache_clear()
+    yield display
+    x11_randr.get_connection().close()
+    x11_randr.get_connection.cache_clear()
+    proc.terminate()
+    proc.wait()
+    if previous is None:
+        del os.environ["DISPLAY"]
+    else:
+        os.environ["DISPLAY"] = previous
+
+
+@pytest.mark.usefixtures("xvfb")
+def test_load_screens():
+    screens = x11_randr.load_screens()
+    assert screens
+    active = [s for s in screens if s.active]
+    assert active
+    assert active[0].mode in active[0].available
+
+
+@pytest.mark.usefixtures("xvfb")
+def test_configure():
+    screen = next(s for s in x11_randr.load_screens() if s.active)
+    cmd = f"xrandr --output {screen.uid} --on --pos 0x0 --mode {screen.mode.width}x{screen.mode.height}"
+    assert x11_randr.run_xrandr_command(cmd)
+    assert next(s for s in x11_randr.load_screens() if s.uid == screen.uid).mode == screen.mode
+
+
+@pytest.mark.usefixtures("xvfb")
+def test_configure_out_of_range(monkeypatch):
+    screen = next(s for s in x11_randr.load_screens() if s.active)
+    cmd = f"xrandr --output {screen.uid} --on --pos 40000x0 --mode {screen.mode.width}x{screen.mode.height}"
+    assert x11_randr.run_xrandr_command(cmd) is False
+    assert next(s for s in x11_randr.load_screens() if s.uid == screen.uid).position == screen.position
+    # the BadValue error of the server is trapped instead of exiting the process
+    monkeypatch.setattr(x11_randr.RandRConnection, "_size_allowed", lambda *_args: True)
+    assert x11_randr.run_xrandr_command(cmd) is False
+    assert x11_randr.load_screens()